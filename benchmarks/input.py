@@ -0,0 +1,94 @@
+"""
+Input actions played into a RecordingBackend: blocking time of the call,
+latency to the first and last event, events and the system calls sending
+them (SendInput batches), and scheduling jitter
+
+    python -m benchmarks.input
+"""
+from time import perf_counter
+
+import numpy as np
+
+from core.common.entities import Pixel
+from core.input.actions import Actions
+from core.input.backends import RecordingBackend
+
+
+def measure(backend: RecordingBackend, action, runs: int) -> dict[str, float]:
+    """Per run: duration, latency to the first and last event, events, calls"""
+    durations, firsts, lasts, counts, calls = [], [], [], [], []
+    for _ in range(runs):
+        backend.clear()
+        start = perf_counter()
+        handle = action()
+        durations.append(perf_counter() - start)
+        if handle is not None:
+            handle.wait()
+        if backend.events:
+            firsts.append(backend.events[0].time - start)
+            lasts.append(backend.events[-1].time - start)
+        counts.append(len(backend))
+        calls.append(backend.calls)
+    return {
+        "duration": np.mean(durations) * 1000,
+        "first": np.mean(firsts) * 1000 if firsts else np.nan,
+        "last": np.mean(lasts) * 1000 if lasts else np.nan,
+        "events": np.mean(counts),
+        "calls": np.mean(calls),
+    }
+
+
+def main():
+    rng = np.random.default_rng(0)
+    backend = RecordingBackend(cursor=(960, 540))
+    actions = Actions(backend)
+    targets = [Pixel(*p) for p in rng.integers(0, (1920, 1080), (50, 2))]
+    targets_iter = iter(targets * 2)
+
+    def wind_mouse():
+        x, y = backend.cursor_position()
+        target = next(targets_iter)
+        actions.wind_mouse(x, y, target.x, target.y)
+
+    def queued_move():
+        target = next(targets_iter)
+        return actions.queue(lambda: actions.move_click_timeline(target), key="move")
+
+    def key_string():
+        actions.keys.parseKeyString("LCONTROL_DOWN,A,LCONTROL_UP")
+        actions.keys.wait()
+
+    cases = [
+        ("wind_mouse", wind_mouse, 50),
+        ("press", lambda: actions.press("a"), 10),
+        ("move_click", lambda: actions.move_click(next(targets_iter)), 10),
+        ("queued move", queued_move, 10),
+        ("camera", lambda: actions.move_camera(200, 0), 10),
+        ("camera rel", lambda: actions.move_camera(200, 0, relative=True), 10),
+        ("key string", key_string, 10),
+    ]
+    header = f"{'action':>12} {'call':>11} {'1st event':>11} {'last':>11}"
+    print(f"{header} {'events':>7} {'calls':>6}")
+    for name, action, runs in cases:
+        result = measure(backend, action, runs)
+        print(
+            f"{name:>12} {result['duration']:9.2f}ms {result['first']:9.3f}ms"
+            f" {result['last']:9.2f}ms {result['events']:7.1f} {result['calls']:6.1f}"
+        )
+    jitter = np.array(actions.scheduler.jitter) * 1000
+    print(
+        f"jitter over {len(jitter)} events: p50 {np.percentile(jitter, 50):.3f}ms"
+        f" p99 {np.percentile(jitter, 99):.3f}ms max {jitter.max():.3f}ms"
+        f" (min sleep {actions.scheduler.min_sleep * 1000:.2f}ms)"
+    )
+    worker = actions.keys.keys_worker
+    latency = np.array(worker.latency) * 1000
+    print(
+        f"key string latency over {len(latency)} keys:"
+        f" p50 {np.percentile(latency, 50):.3f}ms"
+        f" p99 {np.percentile(latency, 99):.3f}ms (max queue depth {worker.max_depth})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Key strings: compiling every run vs the cached macro, queued by
+parseKeyString or built into a timeline. Single keys:
+events by name (upper-cased and looked up per call) vs by key id
+
+    python -m benchmarks.macros
+"""
+from timeit import timeit
+
+from core.input.backends import RecordingBackend
+from core.input.keys import Keys
+from core.input.keytable import key_table
+from core.input.macros import compile_macro
+
+ROTATION = "DK,1,-120,2,-120,3,-80,LSHIFT_DOWN,Q,LSHIFT_UP,-200,VK,F1,DK,R"
+
+
+def main():
+    keys = Keys(backend=RecordingBackend())
+    # queue compiled strings without sending them
+    keys.keys_worker.submit = lambda *args, **kwargs: None
+    runs = 2000
+    results = [
+        ("compile", timeit(lambda: compile_macro.__wrapped__(ROTATION), number=runs)),
+        ("cached compile", timeit(lambda: compile_macro(ROTATION), number=runs)),
+        ("parseKeyString", timeit(lambda: keys.parseKeyString(ROTATION), number=runs)),
+        (
+            "cached timeline",
+            timeit(lambda: compile_macro(ROTATION).timeline(), number=runs),
+        ),
+    ]
+    print(f"{ROTATION!r}: {len(compile_macro(ROTATION))} key events, per run:")
+    for name, seconds in results:
+        print(f"{name:>16} {seconds / runs * 1e6:8.2f}us")
+
+    table = key_table()
+    key_id = keys.keyId("lshift")
+    runs = 100000
+    results = [
+        ("keyEvents", timeit(lambda: keys.keyEvents("lshift"), number=runs)),
+        ("by key id", timeit(lambda: table[key_id].events(), number=runs)),
+    ]
+    print("single key events, per lookup:")
+    for name, seconds in results:
+        print(f"{name:>16} {seconds / runs * 1e9:8.1f}ns")
+
+
+if __name__ == "__main__":
+    main()
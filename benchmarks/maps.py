@@ -0,0 +1,70 @@
+"""
+Minimap localisation benchmark on static/albion/tests frames
+
+    python -m benchmarks.maps
+"""
+import glob
+import os
+from time import perf_counter
+
+from bots.albion.actions.utils import minimap_crop
+from config import settings
+from core.common.entities import Img, ImgLoader
+from core.display.maps import FeatureIndex, MapIndex
+from core.display.vision import Vision
+
+MAP_PATH = "albion/maps/mase_knoll.png"
+
+
+def dense_sweep(vision: Vision, cluster: ImgLoader, minimap: Img):
+    """Previous Navigator approach: lower confidence until something matches"""
+    confidence = 0.85
+    while confidence > 0.6:
+        minimap.confidence = confidence
+        results = vision.find(minimap, cluster)
+        if results:
+            return results[0]
+        confidence = round(confidence - 0.01, 2)
+    return None
+
+
+def timed(func, *args, runs: int = 5):
+    start = perf_counter()
+    for _ in range(runs):
+        result = func(*args)
+    return result, (perf_counter() - start) / runs * 1000
+
+
+def main():
+    vision = Vision()
+    cluster = ImgLoader(MAP_PATH)
+    _, fft_load = timed(MapIndex.load, MAP_PATH, runs=1)
+    _, orb_load = timed(FeatureIndex.load, MAP_PATH, runs=1)
+    map_index = MapIndex.load(MAP_PATH)
+    feature_index = FeatureIndex.load(MAP_PATH)
+    print(f"Index load: fft {fft_load:.1f} ms, orb {orb_load:.1f} ms")
+
+    frames = sorted(glob.glob(settings.STATIC_PATH + "albion/tests/*.png"))
+    totals = {"dense": 0.0, "fft": 0.0, "orb": 0.0}
+    print(f"{'frame':>8} {'dense':>22} {'fft':>22} {'orb':>22}")
+    for frame in frames:
+        search_img = ImgLoader(os.path.relpath(frame, settings.STATIC_PATH))
+        minimap = Img(search_img.derived(crop=minimap_crop(), scale=0.70))
+        dense, dense_ms = timed(dense_sweep, vision, cluster, minimap)
+        fft, fft_ms = timed(map_index.locate, minimap, 0.6)
+        orb, orb_ms = timed(feature_index.locate, minimap)
+        totals["dense"] += dense_ms
+        totals["fft"] += fft_ms
+        totals["orb"] += orb_ms
+        cells = [
+            f"{str(tuple(result.center) if result else None):>13} {ms:6.1f}ms"
+            for result, ms in ((dense, dense_ms), (fft, fft_ms), (orb, orb_ms))
+        ]
+        print(f"{os.path.basename(frame):>8} " + " ".join(cells))
+
+    count = len(frames) or 1
+    print(", ".join(f"{k} avg {v / count:.1f} ms" for k, v in totals.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+YOLO start: model load (graph cache build or hit), warm-up runs and the
+first frames after it against the steady state
+
+    python -m benchmarks.models [model_path]
+"""
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+
+from bots.albion.bots.children import Gatherer
+from core.common.entities import Img
+from core.display.vision import YoloVision
+
+
+def main():
+    # the model the gatherer runs, unless another one is given
+    model_path = sys.argv[1] if len(sys.argv) > 1 else Gatherer.model_file_path
+    if not os.path.exists(model_path):
+        print(f"model unavailable: {model_path} not found")
+        return
+    shape = (YoloVision.input_size.y, YoloVision.input_size.x)
+    cached = YoloVision.graph_cache.path(model_path, shape)
+    state = "not optimized" if cached is None else f"cached: {os.path.exists(cached)}"
+    print(f"{model_path} ({state})")
+
+    start = perf_counter()
+    try:
+        yolo = YoloVision(model_path, Gatherer.classes, background=False)
+    except Exception as e:  # no torch / CUDA / yolov5 hub
+        print(f"model unavailable: {e}")
+        return
+    print(f"load + warm-up: {(perf_counter() - start) * 1000:9.1f}ms")
+    warmup = ", ".join(f"{seconds * 1000:.1f}" for seconds in yolo.warmup_times)
+    print(f"warm-up runs:   {warmup}ms")
+
+    frame = Img(np.zeros((1080, 1920, 3), dtype=np.uint8))
+    times = []
+    for _ in range(23):
+        start = perf_counter()
+        yolo.find(frame)
+        times.append((perf_counter() - start) * 1000)
+    first = ", ".join(f"{ms:.1f}" for ms in times[:3])
+    print(f"first frames:   {first}ms")
+    print(f"steady state:   {np.median(times[3:]):.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
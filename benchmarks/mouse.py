@@ -0,0 +1,79 @@
+"""
+WindMouse paths: scalar NumPy loop vs wind_mouse_path vs batched wind_mouse_paths
+
+    python -m benchmarks.mouse
+"""
+from time import perf_counter
+
+import numpy as np
+
+from core.input.mouse import wind_mouse_path, wind_mouse_paths
+
+
+def scalar_numpy_path(start_x, start_y, dest_x, dest_y, G_0=12, W_0=3, M_0=13, D_0=13):
+    """Previous Actions.wind_mouse loop, collecting points instead of moving"""
+    sqrt3 = np.sqrt(3)
+    sqrt5 = np.sqrt(5)
+    current_x, current_y = start_x, start_y
+    v_x = v_y = W_x = W_y = 0
+    points = []
+    while (dist := np.hypot(dest_x - start_x, dest_y - start_y)) >= 1:
+        W_mag = min(W_0, dist)
+        if dist >= D_0:
+            W_x = W_x / sqrt3 + (2 * np.random.random() - 1) * W_mag / sqrt5
+            W_y = W_y / sqrt3 + (2 * np.random.random() - 1) * W_mag / sqrt5
+        else:
+            W_x /= sqrt3
+            W_y /= sqrt3
+            if M_0 < 3:
+                M_0 = np.random.random() * 3 + 3
+            else:
+                M_0 /= sqrt5
+        v_x += W_x + G_0 * (dest_x - start_x) / dist
+        v_y += W_y + G_0 * (dest_y - start_y) / dist
+        v_mag = np.hypot(v_x, v_y)
+        if v_mag > M_0:
+            v_clip = M_0 / 2 + np.random.random() * M_0 / 2
+            v_x = (v_x / v_mag) * v_clip
+            v_y = (v_y / v_mag) * v_clip
+        start_x += v_x
+        start_y += v_y
+        move_x = int(np.round(start_x))
+        move_y = int(np.round(start_y))
+        if current_x != move_x or current_y != move_y:
+            points.append((current_x := move_x, current_y := move_y))
+    return points
+
+
+def main():
+    rng = np.random.default_rng(0)
+    count = 200
+    starts = rng.integers(0, (1920, 1080), (count, 2)).tolist()
+    dests = rng.integers(0, (1920, 1080), (count, 2)).tolist()
+
+    start = perf_counter()
+    scalar = [scalar_numpy_path(*s, *d) for s, d in zip(starts, dests)]
+    scalar_ms = (perf_counter() - start) / count * 1000
+
+    start = perf_counter()
+    single = [
+        wind_mouse_path(s, d, seed=i) for i, (s, d) in enumerate(zip(starts, dests))
+    ]
+    single_ms = (perf_counter() - start) / count * 1000
+
+    start = perf_counter()
+    batched = wind_mouse_paths(starts, dests, seed=0)
+    batched_ms = (perf_counter() - start) / count * 1000
+
+    print(f"{count} paths, per path:")
+    for name, ms, paths in [
+        ("scalar numpy", scalar_ms, scalar),
+        ("wind_mouse_path", single_ms, single),
+        ("wind_mouse_paths", batched_ms, batched),
+    ]:
+        points = np.mean([len(path) for path in paths])
+        print(f"{name:>17} {ms:7.3f}ms {points:6.1f} points")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Text regions: uncached recognition vs TextReader cache hits, single vs batched
+
+    python -m benchmarks.ocr
+"""
+from time import perf_counter
+
+import cv2 as cv
+import numpy as np
+
+from core.common.entities import Img, Pixel, Rect
+from core.display.ocr import TextReader
+
+TEXTS = ["Pine Logs", "x12", "Rough Stone", "Tier 4", "Gathering", "1,250 silver"]
+
+
+def frame_with_texts() -> tuple[Img, list[Rect]]:
+    data = np.full((len(TEXTS) * 40, 300, 3), 30, dtype=np.uint8)
+    crops = []
+    for i, text in enumerate(TEXTS):
+        cv.putText(
+            data, text, (5, i * 40 + 28), cv.FONT_HERSHEY_SIMPLEX, 0.8, (230,) * 3, 2
+        )
+        crops.append(Rect(Pixel(0, i * 40), Pixel(300, i * 40 + 40)))
+    return Img(data), crops
+
+
+def timed(func, runs: int) -> float:
+    start = perf_counter()
+    for _ in range(runs):
+        func()
+    return (perf_counter() - start) / runs * 1000
+
+
+def main():
+    img, crops = frame_with_texts()
+    reader = TextReader(psm=7)
+    print(f"engine: {type(reader.engine).__name__}")
+
+    def uncached_single():
+        reader.clear()
+        for crop in crops:
+            reader.read(img, crop)
+
+    def uncached_batch():
+        reader.clear()
+        reader.read_many(img, crops)
+
+    try:
+        single_ms = timed(uncached_single, 3)
+    except Exception as e:  # no tesseract binary / language data
+        print(f"recognition unavailable: {e}")
+        single_ms = None
+    if single_ms is not None:
+        batch_ms = timed(uncached_batch, 3)
+        print(f"{len(crops)} regions, single: {single_ms:8.2f}ms")
+        print(f"{len(crops)} regions, batch:  {batch_ms:8.2f}ms")
+        print(f"texts: {reader.read_many(img, crops)}")
+        cached_ms = timed(lambda: reader.read_many(img, crops), 200)
+        print(f"{len(crops)} regions, cached: {cached_ms:8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Closest node lookups: linear find_closest scan vs SpatialIndex
+
+    python -m benchmarks.spatial
+"""
+from time import perf_counter
+
+import numpy as np
+
+from core.common.entities import Node, Pixel
+from core.common.spatial import SpatialIndex
+from core.common.utils import find_closest
+
+
+def timed(func, queries: list[Pixel]) -> float:
+    start = perf_counter()
+    for origin in queries:
+        func(origin)
+    return (perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    rng = np.random.default_rng(0)
+    queries = [Pixel(*p) for p in rng.uniform(0, 4000, (200, 2))]
+    print(
+        f"{'nodes':>7} {'find_closest':>14} {'nearest':>10} {'masked':>10} {'k=5':>10}"
+    )
+    for count in (100, 1000, 5000, 20000):
+        nodes = [Node(*p) for p in rng.uniform(0, 4000, (count, 2)).round()]
+        available = rng.random(count) > 0.3
+        start = perf_counter()
+        index = SpatialIndex(nodes)
+        build = (perf_counter() - start) * 1000
+        results = [
+            timed(lambda origin: find_closest(origin, nodes), queries),
+            timed(index.nearest, queries),
+            timed(lambda origin: index.nearest(origin, mask=available), queries),
+            timed(lambda origin: index.k_nearest(origin, 5), queries),
+        ]
+        cells = " ".join(f"{us:8.1f}us" for us in results)
+        print(f"{count:>7} {cells}  (build {build:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
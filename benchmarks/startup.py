@@ -0,0 +1,57 @@
+"""
+Cold import time of core packages from `python -X importtime`, each in a
+fresh interpreter, with the packages taking most of it
+
+    python -m benchmarks.startup
+"""
+import subprocess
+import sys
+from collections import Counter
+
+MODULES = [
+    "config",
+    "core.common.entities",
+    "core.input.actions",
+    "core.display.vision",
+    "bots.albion.bots.children",
+]
+
+
+def import_times(module: str) -> list[tuple[int, int, str]]:
+    """(self, cumulative) microseconds and name of every module imported"""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode:
+        raise ImportError(process.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def main():
+    print(f"{'module':>26} {'import':>9}  heaviest packages")
+    for module in MODULES:
+        try:
+            rows = import_times(module)
+        except ImportError as error:
+            print(f"{module:>26} {'failed':>9}  {error}")
+            continue
+        total = next(cumulative for _, cumulative, name in rows if name == module)
+        packages = Counter()
+        for self_us, _, name in rows:
+            packages[name.split(".")[0]] += self_us
+        heaviest = ", ".join(
+            f"{name} {us / 1000:.0f}ms" for name, us in packages.most_common(3)
+        )
+        print(f"{module:>26} {total / 1000:7.1f}ms  {heaviest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Boolean HUD checks: SearchResult path vs Vision.exists on static/albion/tests,
+and color detection vs template matching for the mount HP bar
+
+    python -m benchmarks.vision
+"""
+import glob
+import os
+from time import perf_counter
+
+from bots.albion.actions.vision import AlbionVision
+from config import settings
+from core.common.entities import ImgLoader
+
+CHECKS = [
+    ("cast_bar", "casting"),
+    ("skill_teleport", "skill_panel"),
+    ("g_failed", "small_screen"),
+    ("g_tool_failed", "small_screen"),
+    ("g_done", "small_screen"),
+    ("mount_hp", "small_screen"),
+]
+
+
+def timed(func, frames: list, runs: int = 5) -> tuple[list, float]:
+    results = [func(frame) for frame in frames]  # warm derived image caches
+    start = perf_counter()
+    for _ in range(runs):
+        for frame in frames:
+            func(frame)
+    return results, (perf_counter() - start) / runs / len(frames) * 1000
+
+
+def main():
+    vision = AlbionVision()
+    paths = sorted(glob.glob(settings.STATIC_PATH + "albion/tests/*.png"))
+    frames = [ImgLoader(os.path.relpath(path, settings.STATIC_PATH)) for path in paths]
+
+    print(f"{'template':>15} {'find':>9} {'exists':>9} {'found':>6} {'agree':>6}")
+    for ref_key, crop_key in CHECKS:
+        ref_img = vision.ref_images[ref_key]
+        crop = vision.crop_areas[crop_key]
+        found, find_ms = timed(lambda f: bool(vision.find(ref_img, f, crop)), frames)
+        exists, exists_ms = timed(lambda f: vision.exists(ref_img, f, crop)[0], frames)
+        agree = sum(a == b for a, b in zip(found, exists))
+        print(
+            f"{ref_key:>15} {find_ms:7.2f}ms {exists_ms:7.2f}ms"
+            f" {sum(found):>6} {agree:>3}/{len(frames)}"
+        )
+
+    crop = vision.crop_areas["small_screen"]
+    ref_img = vision.ref_image("mount_hp")
+    color = vision.bar_colors["mount_hp"]
+    # both with warm caches: grayscale and HSV conversions are shared per frame
+    _, exists_ms = timed(lambda f: vision.exists(ref_img, f, crop), frames)
+    _, color_ms = timed(lambda f: vision.find_color(f, color, crop), frames)
+    fills, fill_ms = timed(vision.mount_hp_fill, frames)
+    print(f"\n{'mount_hp bar':>15} {'exists':>9} {'color':>9} {'fill':>9}")
+    print(f"{'':>15} {exists_ms:7.2f}ms {color_ms:7.2f}ms {fill_ms:7.2f}ms")
+    print(f"{'fills':>15} " + " ".join(f"{fill:.2f}" for fill in fills))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,27 @@
+from functools import partial
+
 from core.common.entities import Pixel
 from core.input.actions import Actions
+from core.input.executor import HIGH, ActionHandle
 
 
 class AlbionActions(Actions):
+    """Actions are queued: mounting goes before moves, and a new move
+    replaces the one still waiting to start"""
+
     keybinds = {"mount": "a"}
 
-    def mount(self):
-        self.press(self.keybinds["mount"], delay=0.3)
+    def mount(self) -> ActionHandle:
+        press = partial(self.press_timeline, self.keybinds["mount"], delay=0.3)
+        return self.queue(press, priority=HIGH, key="mount")
 
-    def dismount(self):
-        self.press(self.keybinds["mount"], delay=0.3)
+    def dismount(self) -> ActionHandle:
+        press = partial(self.press_timeline, self.keybinds["mount"], delay=0.3)
+        return self.queue(press, priority=HIGH, key="mount")
 
-    def gather(self, resource_node: Pixel) -> None:
-        self.move_click(resource_node)
+    def gather(self, resource_node: Pixel, interrupt=False) -> ActionHandle:
+        return self.move(resource_node, interrupt)
 
-    def move(self, location: Pixel) -> None:
-        self.move_click(location)
+    def move(self, location: Pixel, interrupt=False) -> ActionHandle:
+        move_click = partial(self.move_click_timeline, location)
+        return self.queue(move_click, key="move", interrupt=interrupt)
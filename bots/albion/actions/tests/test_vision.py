@@ -81,3 +81,13 @@ class AlbionVisionTests(TestCase):
     # def test_is_monster_nearby_false(self):
     #     for i, case in enumerate(self.cases["monster_not_nearby"]):
     #         self.assertFalse(self.vision.is_monster_nearby(case), f"Failed: {i}")
+
+    def test_mount_hp_fill(self):
+        self.assertAlmostEqual(
+            self.vision.mount_hp_fill(ImgLoader("albion/tests/2.png")), 0.46, 2
+        )
+        self.assertAlmostEqual(
+            self.vision.mount_hp_fill(ImgLoader("albion/tests/19.png")), 0.9, 2
+        )
+        for i, case in enumerate(self.cases["gathering_failed"]):
+            self.assertEqual(self.vision.mount_hp_fill(case), 0, f"Failed: {i}")
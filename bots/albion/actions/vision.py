@@ -1,29 +1,60 @@
-from core.common.entities import Img, ImgLoader, Pixel, Rect
+import numpy as np
+
+from core.common.entities import Color, Img, Pixel, Rect
+from core.common.warmup import warm_up
+from core.display.changes import RegionChangeDetector
+from core.display.templates import Template, templates
 from core.display.vision import Vision
 
 
 class AlbionVision(Vision):
+    ref_paths = {
+        "mount_hp": ("albion/ui/mount_hp.png", 0.85),
+        "monster_hp": ("albion/ui/monster_hp.png", 0.8),
+        "skill_teleport": ("albion/ui/skill_teleport.png", 0.85),
+        "cast_bar": ("albion/ui/cast_bar.png", 0.9),  # masked, see ui/masks
+        "g_failed": ("albion/ui/gathering_failed.png", 0.75),
+        "g_tool_failed": ("albion/ui/gathering_tool_failed.png", 0.75),
+        "g_done": ("albion/ui/gathering_0.png", 0.75),
+    }
+    bar_colors = {
+        "mount_hp": Color(197, 197, 0),
+    }
+    mount_hp_width = 113
+    mount_hp_min_width = 16
+
     def __init__(self):
         self.crop_areas = {
             "skill_panel": Rect(Pixel(475, 960), Pixel(1480, 1080)),
             "casting": Rect(Pixel(630, 540), Pixel(1255, 780)),
             "small_screen": Rect(Pixel(550, 160), Pixel(1415, 850)),
         }
-        self.ref_images = {
-            "mount_hp": ImgLoader("albion/ui/mount_hp.png", 0.85),
-            "monster_hp": ImgLoader("albion/ui/monster_hp.png", 0.8),
-            "skill_teleport": ImgLoader("albion/ui/skill_teleport.png", 0.85),
-            "cast_bar": ImgLoader("albion/ui/cast_bar.png", 0.85),
-            "g_failed": ImgLoader("albion/ui/gathering_failed.png", 0.75),
-            "g_tool_failed": ImgLoader("albion/ui/gathering_tool_failed.png", 0.75),
-            "g_done": ImgLoader("albion/ui/gathering_0.png", 0.75),
-        }
+        self.changes = RegionChangeDetector()
+        # load shared templates in the background, missing files raise from
+        # ready.result(), templates used before are loaded on demand
+        self.ready = warm_up(self.load_refs)
+
+    def load_refs(self) -> dict[str, Template]:
+        return self.ref_images
+
+    def ref_image(self, key: str) -> Template:
+        """Shared reference template, reloaded when the file changes"""
+        return templates.get(*self.ref_paths[key])
+
+    @property
+    def ref_images(self) -> dict[str, Template]:
+        return {key: self.ref_image(key) for key in self.ref_paths}
 
     def _bool_find(self, ref_img_key: str, crop_key: str, search_img: Img) -> bool:
-        ref_img = self.ref_images.get(ref_img_key)
+        ref_img = self.ref_image(ref_img_key)
         crop = self.crop_areas.get(crop_key)
-        result = self.find(ref_img, search_img, crop)
-        return bool(result)
+        # HUD regions rarely change, skip matching while they look the same
+        return self.changes.cached(
+            (ref_img_key, crop_key, ref_img.stamp),
+            search_img,
+            crop,
+            lambda: self.exists(ref_img, search_img, crop)[0],
+        )
 
     def is_mounting(self, search_img: Img) -> bool:
         return self._bool_find("cast_bar", "casting", search_img)
@@ -44,3 +75,25 @@ class AlbionVision(Vision):
 
     def is_monster_nearby(self, search_img: Img) -> bool:
         return self._bool_find("mount_hp", "small_screen", search_img)
+
+    def mount_hp_fill(self, search_img: Img) -> float:
+        """Mount HP bar fill (0-1), 0 when the bar is not on screen
+
+        The bar is the widest row of thin yellow segments, its fill is measured
+        against the full bar width starting at the leftmost segment.
+        """
+        result = self.find_color(
+            search_img, self.bar_colors["mount_hp"], self.crop_areas["small_screen"]
+        )
+        segments = result.filter((result.rects.heights <= 6) & (result.scores >= 0.8))
+        if not segments:
+            return 0.0
+        rows = segments.boxes[:, 1]
+        widths = np.array([segments.rects.widths[rows == row].sum() for row in rows])
+        if widths.max() < self.mount_hp_min_width:
+            return 0.0
+        bar = segments.filter(rows == rows[widths.argmax()]).rects
+        left, top = int(bar.boxes[:, 0].min()), int(bar.boxes[:, 1].min())
+        bottom = int(bar.boxes[:, 3].max())
+        bar = Rect(Pixel(left, top), Pixel(left + self.mount_hp_width, bottom))
+        return self.bar_fill(search_img, self.bar_colors["mount_hp"], bar)
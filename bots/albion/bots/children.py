@@ -1,16 +1,20 @@
 import math
-from time import sleep, time
+from time import sleep
 
 from config import settings
 from core.common.bots import BotChild
-from core.common.entities import Img, ImgLoader, Node, Pixel, Rect, Vector2d
+from core.common.entities import Img, Node, Pixel, SearchResult, Vector2d
 from core.common.enums import State
-from core.common.utils import find_closest, log
+from core.common.spatial import SpatialIndex
+from core.common.utils import log
 from core.display.utils import draw_circles
 from core.display.vision import YoloVision
+from core.navigation.atlas import WorldAtlas
+from core.navigation.nodes import NodeStore, NodeView
+from core.navigation.routes import RoutePlanner, walkable_mask
 
 from ..actions.input import AlbionActions
-from ..actions.utils import extract_minimap
+from ..actions.utils import minimap_crop
 from ..actions.vision import AlbionVision
 
 
@@ -19,6 +23,7 @@ class Mounter(BotChild):
         super().__init__()
         self.actions = AlbionActions()
         self.vision = AlbionVision()
+        self.action = None
 
     def manage_state(self):
         if self.state == State.START:
@@ -30,8 +35,8 @@ class Mounter(BotChild):
             elif is_mounted:
                 log("Mounted")
                 self.set_state(State.DONE)
-            else:
-                self.actions.mount()
+            elif self.action is None or self.action.done():
+                self.action = self.actions.mount()
                 log("Trying to mount")
         else:
             sleep(0.2)
@@ -60,14 +65,31 @@ class Gatherer(BotChild):
         self.monsters = ["Heretic", "Elemental"]
         self.goal = ["Limestone", "Rough Stone", "Logs", "Copper Ore"]
         self.targets = {}
+        self.target = None
+        self.action = None
 
-    def filter_targets(self, targets: list[Rect]) -> list[Rect]:
-        return [target for target in targets if target.label in self.goal]
+    def filter_targets(self, targets: SearchResult) -> SearchResult:
+        return targets.with_labels(self.goal)
 
-    def get_closest_target(self, targets: list[Rect]):
+    def get_closest_target(self, targets: SearchResult) -> Pixel:
         origin = Pixel(1920 / 2, 1080 / 2)
-        targets = [target for target in targets if target.label in self.goal]
-        return find_closest(origin, targets)
+        spatial = SpatialIndex(targets.rects.centers, targets.labels)
+        index = spatial.nearest(origin, labels=self.goal)
+        return None if index is None else targets[index].center
+
+    def gather(self, target: Pixel) -> None:
+        """Queue a move to target, replacing the previous one if not started"""
+        self.target = target
+        self.action = self.actions.gather(target)
+        log("Trying to gather")
+
+    def update_target(self):
+        """Retarget the queued move while it waits for another action"""
+        if self.action is None or self.action.started or not self.targets:
+            return
+        target = self.get_closest_target(self.targets)
+        if target and target != self.target:
+            self.gather(target)
 
     def manage_killing(self):
         pass
@@ -79,6 +101,8 @@ class Gatherer(BotChild):
 
         if is_gathering:
             log("Gathering", delay=0.2)
+        elif self.action is not None and not self.action.done():
+            self.update_target()
         elif is_gathering_failed:
             log("Gathering failed")
             self.set_state(State.START)
@@ -89,6 +113,13 @@ class Gatherer(BotChild):
     def manage_state(self):
         if not self.state:
             return
+        if not self.yolo.ready.done():
+            log("Loading model", delay=0.2)
+            return
+        if (error := self.yolo.ready.exception()) is not None:
+            log(f"Model failed to load: {error!r}")
+            self.stop()
+            return
 
         targets = self.yolo.find(self.search_img, confidence=0.85)
         self.targets = self.filter_targets(targets)
@@ -97,8 +128,7 @@ class Gatherer(BotChild):
             if self.targets:
                 target = self.get_closest_target(self.targets)
                 if target:
-                    self.actions.gather(target)
-                    log("Trying to gather")
+                    self.gather(target)
                     self.set_state(State.GATHERING)
             else:
                 self.set_state(State.DONE)
@@ -134,20 +164,47 @@ class Navigator(BotChild):
         super().__init__()
         self.actions = AlbionActions()
         self.vision = AlbionVision()
+        self.atlas = self.load_atlas()
+        self.zone = next(iter(self.clusters))
         self.cluster = self.load_cluster()
         self.nodes = self.load_cluster_nodes()
+        self.planner = self.load_planner()
         self.current_node = None
+        self.action = None
+
+    @property
+    def nodes(self) -> NodeStore:
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes: list[Node] | NodeStore) -> None:
+        self._nodes = nodes if isinstance(nodes, NodeStore) else NodeStore(nodes)
+
+    def load_atlas(self) -> WorldAtlas:
+        atlas = WorldAtlas()
+        for name, cluster in self.clusters.items():
+            atlas.register(name, cluster["path"], cluster["nodes"])
+        atlas.discover()
+        return atlas
 
     def load_cluster(self) -> Img:
-        return ImgLoader(self.clusters["mase_knoll"]["path"])
+        return self.atlas.maps(self.zone).img
 
     def load_cluster_nodes(self) -> list[Node]:
-        return self.clusters["mase_knoll"]["nodes"]
+        return self.atlas.zones[self.zone].nodes
+
+    def load_planner(self) -> RoutePlanner:
+        return RoutePlanner(self.nodes, walkable_mask(self.cluster))
+
+    def set_zone(self, zone: str) -> None:
+        log(f"Entered zone: {zone}")
+        self.zone = zone
+        self.cluster = self.load_cluster()
+        self.nodes = self.load_cluster_nodes()
+        self.planner = self.load_planner()
 
     def extract_minimap(self, search_img: Img) -> Img:
-        ref_img = extract_minimap(search_img)
-        ref_img.resize_x(0.70)
-        return ref_img
+        return Img(search_img.derived(crop=minimap_crop(), scale=0.70))
 
     def create_node_vector(self, node: Node, current_pos: Pixel) -> Vector2d:
         return Vector2d(node.x - current_pos.x, current_pos.y - node.y)
@@ -162,41 +219,47 @@ class Navigator(BotChild):
         y = int(origin.y - radius * math.sin(radians))
         return Pixel(x, y)
 
-    def get_closest_node(self, char_pos: Pixel) -> Node:
-        nodes = [node for node in self.nodes if not node.cooldown]
-        return find_closest(char_pos, nodes)
+    def get_next_node(self, char_pos: Pixel) -> NodeView:
+        """Next node of the planned gathering route"""
+        available = self.nodes.available_indexes()
+        index = self.planner.next_node(char_pos, available)
+        return None if index is None else self.nodes[index]
 
     def find_character_on_map(self) -> Pixel:
-        confidence = 0.85
-        while confidence > 0.6:
-            minimap = self.extract_minimap(self.search_img)
-            minimap.confidence = confidence
-            results = self.vision.find(minimap, self.cluster)
-            if results:
-                return results[0].center
-            confidence = round(confidence - 0.01, 2)
+        minimap = self.extract_minimap(self.search_img)
+        location = self.atlas.locate(minimap, hint=self.zone)
+        if location:
+            if location.zone.name != self.zone:
+                self.set_zone(location.zone.name)
+            return location.center
         print(f"- No result found in: [{self.find_character_on_map.__name__}]")
 
-    def add_node_cooldown(self, node: Node, duration: float = 20):
-        node.update_cooldown(time() + duration)
+    def add_node_cooldown(self, node: NodeView, duration: float = 20):
+        self.nodes.visit(node.index, duration)
 
     def clear_node_cooldowns(self):
-        for node in self.nodes:
-            if node.cooldown < time():
-                node.reset_cooldown()
+        self.nodes.expire()
 
     def manage_nodes(self):
         self.cluster.reset()
         char_location = self.find_character_on_map()
-        current_node = self.get_closest_node(char_location)
+        if char_location is None:
+            return
+        current_node = self.get_next_node(char_location)
+        if current_node is None:
+            self.clear_node_cooldowns()
+            return
         node_vector = self.create_node_vector(current_node, char_location)
         node_direction = self.node_vector_to_pixel_direction(node_vector)
         node_distance = abs(node_vector)
 
         self.clear_node_cooldowns()
 
-        if 2 < node_distance < 50:
-            self.actions.move_click(node_direction)
+        # a move still waiting to start is replaced by the fresher direction
+        action = self.action
+        moving = action is not None and action.started and not action.done()
+        if 2 < node_distance < 50 and not moving:
+            self.action = self.actions.move(node_direction)
         if node_distance < 4:
             self.add_node_cooldown(current_node)
 
@@ -205,7 +268,7 @@ class Navigator(BotChild):
             draw_circles(self.cluster, self.nodes, bgr=(255, 255, 0))
             draw_circles(
                 self.cluster,
-                [node for node in self.nodes if node.cooldown],
+                self.nodes.on_cooldown(),
                 bgr=(0, 0, 0),
             )
             draw_circles(self.cluster, [current_node], bgr=(255, 0, 255))
@@ -2,6 +2,7 @@ from time import time
 from unittest import TestCase
 
 from core.common.entities import ImgLoader, Node, Pixel, Vector2d
+from core.navigation.routes import RoutePlanner
 
 from ..children import Navigator
 
@@ -50,30 +51,22 @@ class NavigatorTests(TestCase):
                 expected_result,
             )
 
-    def test_get_closest_node(self):
+    def test_get_next_node(self):
         self.navigator.nodes = [
             Node(self.origin.x - 100, self.origin.y - 100),
             Node(self.origin.x - 200, self.origin.y - 200),
             Node(self.origin.x - 300, self.origin.y - 300),
         ]
-        cases = [  # char_pos, expected_result
-            (self.origin, self.navigator.nodes[0]),
-            (Pixel(self.origin.x + 100, self.origin.y + 100), self.navigator.nodes[0]),
-            (Pixel(self.origin.x - 149, self.origin.y - 149), self.navigator.nodes[0]),
-            (Pixel(self.origin.x - 151, self.origin.y - 151), self.navigator.nodes[1]),
-            (Pixel(self.origin.x - 249, self.origin.y - 249), self.navigator.nodes[1]),
-            (Pixel(self.origin.x - 251, self.origin.y - 251), self.navigator.nodes[2]),
-        ]
-        for char_pos, expected_result in cases:
-            self.assertEqual(
-                self.navigator.get_closest_node(char_pos),
-                expected_result,
-            )
+        self.navigator.planner = RoutePlanner(self.navigator.nodes)
+        nodes = self.navigator.nodes
+        self.assertEqual(self.navigator.get_next_node(self.origin), nodes[0])
+        self.navigator.add_node_cooldown(nodes[0])
+        self.assertEqual(self.navigator.get_next_node(self.origin), nodes[1])
 
     def test_find_character_on_map(self):
         self.navigator.search_img = self.search_img
         result = self.navigator.find_character_on_map()
-        self.assertEqual(result, Pixel(x=620, y=692))
+        self.assertEqual(result, Pixel(x=620, y=694))
 
     def test_add_node_cooldown(self):
         self.navigator.add_node_cooldown(self.navigator.nodes[0])
@@ -0,0 +1,22 @@
+from concurrent.futures import Future
+from unittest import TestCase
+from unittest.mock import Mock
+
+from core.common.enums import State
+
+from ..children import Gatherer
+
+
+class GathererTests(TestCase):
+    def setUp(self) -> None:
+        # no model, vision or input, only what manage_state needs
+        self.gatherer = Gatherer.__new__(Gatherer)
+        self.gatherer.yolo = Mock(ready=Future())
+        self.gatherer.state = State.START
+        self.gatherer.running = True
+
+    def test_model_failed(self):
+        self.gatherer.yolo.ready.set_exception(FileNotFoundError("best.engine"))
+        self.gatherer.manage_state()
+        self.assertFalse(self.gatherer.running)
+        self.gatherer.yolo.find.assert_not_called()
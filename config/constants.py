@@ -3,10 +3,20 @@ import configparser
 
 
 class Settings:
+    """Settings of config.ini, read on first access instead of on import"""
+
+    constants = ("DEFAULT", "DEBUG", "STATIC_PATH", "CLIENT")
+
     def __init__(self, config_path="config.ini"):
         self.config_path = config_path
         self.config = configparser.ConfigParser()
-        self._load_constants()
+
+    def __getattr__(self, name):
+        # only called for missing attributes, constants are set once loaded
+        if name in self.constants:
+            self._load_constants()
+            return self.__dict__[name]
+        raise AttributeError(f"'Settings' object has no attribute '{name}'")
 
     def _load_constants(self):
         self.config = self.load_config()
@@ -1,6 +1,7 @@
 from unittest import TestCase
 
 from config import settings
+from config.constants import Settings
 
 
 class TestConfig(TestCase):
@@ -13,3 +14,11 @@ class TestConfig(TestCase):
         self.assertIsInstance(settings.STATIC_PATH, str)
         self.assertTrue(settings.STATIC_PATH.endswith("/"))
         self.assertTrue(settings.CLIENT)
+
+    def test_lazy_load(self):
+        lazy = Settings(settings.config_path)
+        self.assertNotIn("DEBUG", vars(lazy))
+        self.assertEqual(lazy.CLIENT, settings.CLIENT)
+        self.assertIn("DEBUG", vars(lazy))
+        with self.assertRaises(AttributeError):
+            lazy.MISSING
@@ -1,7 +1,10 @@
 import copy
 import math
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple
+from itertools import count
+from threading import Lock
+from typing import List, Optional, Sequence, Tuple
 
 import cv2 as cv
 import numpy as np
@@ -15,28 +18,32 @@ class ValueObject:
     """A base class for all value objects"""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class VectorBase:
     x: int
     y: int
 
     def __iter__(self):
-        return (i for i in (self.x, self.y))
+        return iter((self.x, self.y))
 
     def __eq__(self, other):
-        return tuple(self) == tuple(other)
+        if isinstance(other, VectorBase):
+            return self.x == other.x and self.y == other.y
+        return (self.x, self.y) == tuple(other)
 
     def __hash__(self):
-        return hash(tuple(self))
+        return hash((self.x, self.y))
 
     def __abs__(self):
         return math.hypot(self.x, self.y)
 
     def __bool__(self):
-        return bool(abs(self))
+        return bool(self.x or self.y)
 
 
 class Vector2d(VectorBase):
+    __slots__ = ()
+
     def angle(self) -> float:
         return math.atan2(self.y, self.x)
 
@@ -47,8 +54,12 @@ class Vector2d(VectorBase):
 class Pixel(VectorBase):
     """A Pixel in pixel-coordinate system"""
 
+    __slots__ = ()
+
 
 class Node(VectorBase):
+    """Map node, the only vector with an instance dict (mutable cooldown)"""
+
     cooldown: float = 0
 
     def update_cooldown(self, cooldown_time: float):
@@ -59,10 +70,13 @@ class Node(VectorBase):
         self.cooldown = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Rect:
     """A 2d rectangle
 
+    The center is cached with the corners it was computed from, assigning
+    another corner computes it again.
+
     #### Attributes:
         :left_top: Pixel
         :right_bottom: Optional[Pixel] = None
@@ -72,6 +86,7 @@ class Rect:
     #### Example:
         - Rect(left_top=Pixel(0, 0), right_bottom=Pixel(100, 100))
         - Rect(left_top=Pixel(0, 0), width=100, height=100)
+        - Rect.from_xyxy_array(np.array([[0, 0, 100, 100]]), labels=["Logs"])
     """
 
     left_top: Pixel
@@ -79,6 +94,9 @@ class Rect:
     width: Optional[int] = None
     height: Optional[int] = None
     label: Optional[str] = ""
+    _center: Optional[tuple[Pixel, Pixel, Pixel]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self):
         if self.right_bottom is None and (self.width is None or self.height is None):
@@ -95,14 +113,43 @@ class Rect:
         return f"<Rect({self.label}, left_top=({self.left_top.x}, {self.left_top.y}), width={self.width}, height={self.height}>"
 
     def __iter__(self):
-        return (i for i in (self.left_top, self.right_bottom, self.width, self.height))
+        return iter((self.left_top, self.right_bottom, self.width, self.height))
+
+    @classmethod
+    def from_xyxy_array(
+        cls, boxes: np.ndarray, labels: Optional[Sequence[str]] = None
+    ) -> List["Rect"]:
+        """Rects from an (n, 4) array of x1, y1, x2, y2 rows"""
+        rows = np.asarray(boxes).reshape(-1, 4).tolist()
+        if labels is None:
+            labels = [""] * len(rows)
+        return [
+            cls(Pixel(x1, y1), Pixel(x2, y2), x2 - x1, y2 - y1, label)
+            for (x1, y1, x2, y2), label in zip(rows, labels)
+        ]
 
     @property
     def center(self) -> Pixel:
         """Returns the middle point of the rectangle"""
-        x = round((self.left_top.x + self.right_bottom.x) / 2)
-        y = round((self.left_top.y + self.right_bottom.y) / 2)
-        return Pixel(x, y)
+        cached = self._center
+        if (
+            cached is None
+            or cached[0] is not self.left_top
+            or cached[1] is not self.right_bottom
+        ):
+            x = round((self.left_top.x + self.right_bottom.x) / 2)
+            y = round((self.left_top.y + self.right_bottom.y) / 2)
+            cached = self._center = (self.left_top, self.right_bottom, Pixel(x, y))
+        return cached[2]
+
+    @property
+    def xyxy(self) -> Tuple[int, int, int, int]:
+        return (
+            self.left_top.x,
+            self.left_top.y,
+            self.right_bottom.x,
+            self.right_bottom.y,
+        )
 
     def _calc_right_bottom(self) -> Pixel:
         """The bottom right point of the rectangle"""
@@ -117,6 +164,110 @@ class Rect:
         self.height = self.right_bottom.y - self.left_top.y
 
 
+class RectArray:
+    """Array of rectangles stored as an (n, 4) x1, y1, x2, y2 float array
+
+    Geometry is computed for all rectangles at once; `Rect` objects are only
+    built when indexed or iterated.
+
+    #### Attributes:
+        :boxes: np.ndarray - (n, 4) x1, y1, x2, y2
+        :labels: np.ndarray - (n,) labels, "" when not labelled
+
+    #### Example:
+        - rects = RectArray.from_rects(targets)
+        - rects.filter(rects.contains(Pixel(960, 540)))
+        - rects.iou(rects)  # (n, n) overlap matrix
+    """
+
+    def __init__(self, boxes: np.ndarray, labels: Optional[Sequence[str]] = None):
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if labels is None:
+            labels = [""] * len(self.boxes)
+        self.labels = np.asarray(labels, dtype=object).reshape(len(self.boxes))
+
+    @classmethod
+    def from_rects(cls, rects: Sequence[Rect]) -> "RectArray":
+        return cls([rect.xyxy for rect in rects], [rect.label for rect in rects])
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __iter__(self):
+        return iter(self.to_rects())
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return Rect.from_xyxy_array(
+                self._values(self.boxes[index]), self.labels[[index]]
+            )[0]
+        return RectArray(self.boxes[index], self.labels[index])
+
+    def __repr__(self):
+        return f"<RectArray(count={len(self)})>"
+
+    @staticmethod
+    def _values(boxes: np.ndarray) -> np.ndarray:
+        """Integral boxes as ints, so Rects keep int coordinates"""
+        if np.all(boxes == np.round(boxes)):
+            return boxes.astype(np.int64)
+        return boxes
+
+    def to_rects(self) -> List[Rect]:
+        return Rect.from_xyxy_array(self._values(self.boxes), self.labels)
+
+    def filter(self, mask: np.ndarray) -> "RectArray":
+        return self[np.asarray(mask, dtype=bool)]
+
+    @property
+    def widths(self) -> np.ndarray:
+        return self.boxes[:, 2] - self.boxes[:, 0]
+
+    @property
+    def heights(self) -> np.ndarray:
+        return self.boxes[:, 3] - self.boxes[:, 1]
+
+    @property
+    def areas(self) -> np.ndarray:
+        return self.widths * self.heights
+
+    @property
+    def centers(self) -> np.ndarray:
+        """(n, 2) centers, rounded like Rect.center"""
+        return np.rint((self.boxes[:, :2] + self.boxes[:, 2:]) / 2)
+
+    def contains(self, point: Pixel) -> np.ndarray:
+        """Mask of rectangles containing point (borders included)"""
+        x, y = point.x, point.y
+        boxes = self.boxes
+        return (
+            (boxes[:, 0] <= x)
+            & (x <= boxes[:, 2])
+            & (boxes[:, 1] <= y)
+            & (y <= boxes[:, 3])
+        )
+
+    def distances(self, origin: Pixel) -> np.ndarray:
+        """Euclidean distances from origin to rectangle centers"""
+        deltas = self.centers - (origin.x, origin.y)
+        return np.hypot(deltas[:, 0], deltas[:, 1])
+
+    def iou(self, other: "RectArray | Rect") -> np.ndarray:
+        """Intersection over union, (n,) for a Rect or (n, m) for a RectArray"""
+        single = isinstance(other, Rect)
+        boxes = np.array([other.xyxy], dtype=np.float64) if single else other.boxes
+        left_top = np.maximum(self.boxes[:, None, :2], boxes[None, :, :2])
+        right_bottom = np.minimum(self.boxes[:, None, 2:], boxes[None, :, 2:])
+        sizes = np.clip(right_bottom - left_top, 0, None)
+        intersection = sizes[..., 0] * sizes[..., 1]
+        other_areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        union = self.areas[:, None] + other_areas[None, :] - intersection
+        result = np.divide(
+            intersection, union, out=np.zeros_like(intersection), where=union > 0
+        )
+        return result[:, 0] if single else result
+
+
 @dataclass(frozen=True)
 class Polygon(ValueObject):
     """A 2d polygon
@@ -195,11 +346,81 @@ class Color(ValueError):
         return self.b, self.g, self.r, self.a
 
 
+class ImgCache:
+    """LRU cache for images derived from a single frame
+
+    Entries are keyed by the transformations applied to the frame and evicted
+    in least-recently-used order once `max_bytes` is exceeded. Safe to share
+    between threads, values are computed outside the lock.
+    """
+
+    max_bytes: int = 64 * 1024 * 1024
+
+    def __init__(self, max_bytes: Optional[int] = None) -> None:
+        self.max_bytes = max_bytes or self.max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._items: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key: tuple):
+        return key in self._items
+
+    def __repr__(self):
+        return (
+            f"<ImgCache(items={len(self)}, nbytes={self.nbytes}, "
+            f"hits={self.hits}, misses={self.misses})>"
+        )
+
+    def __deepcopy__(self, memo):
+        # copies start empty, cached values are derived again on demand
+        return self.__class__(self.max_bytes)
+
+    def get(self, key: tuple, factory) -> np.ndarray:
+        """Return cached value for key, computing it with factory on a miss"""
+        with self._lock:
+            if key in self._items:
+                self.hits += 1
+                self._items.move_to_end(key)
+                return self._items[key]
+            self.misses += 1
+
+        value = factory()
+        value.flags.writeable = False
+        if value.nbytes <= self.max_bytes:
+            with self._lock:
+                # another thread may have stored it meanwhile
+                if key in self._items:
+                    return self._items[key]
+                self._items[key] = value
+                self.nbytes += value.nbytes
+                self._evict()
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def _evict(self) -> None:
+        while self.nbytes > self.max_bytes:
+            _, value = self._items.popitem(last=False)
+            self.nbytes -= value.nbytes
+
+
 class ImgBase:
     _data: Optional[np.ndarray] = None
-    data: Optional[np.ndarray] = None
+    _current: Optional[np.ndarray] = None
+    _ops: tuple = ()
+    _cache: Optional[ImgCache] = None
+    _assignments = count()
     path: Optional[str] = ""
     confidence: Optional[float] = None
+    mask: Optional[np.ndarray] = None
     width: Optional[int] = None
     height: Optional[int] = None
     channels: Optional[int] = 1
@@ -208,6 +429,22 @@ class ImgBase:
     def initial(self):
         return self._data
 
+    @property
+    def data(self) -> Optional[np.ndarray]:
+        return self._current
+
+    @data.setter
+    def data(self, value: np.ndarray) -> None:
+        """Direct assignment can't be replayed, so it gets a unique cache key"""
+        self._current = value
+        self._ops = (("assigned", next(self._assignments)),)
+
+    @property
+    def cache(self) -> ImgCache:
+        if self._cache is None:
+            self._cache = ImgCache()
+        return self._cache
+
     def __iter__(self):
         return (i for i in (self.width, self.height, self.channels))
 
@@ -218,7 +455,8 @@ class ImgBase:
         return msg
 
     def _set_params(self) -> None:
-        self.data = copy.deepcopy(self.initial)
+        self._current = copy.deepcopy(self.initial)
+        self._ops = ()
         self._set_dimensions()
 
     def _set_dimensions(self):
@@ -228,9 +466,54 @@ class ImgBase:
             self.height, self.width = self.data.shape[:2]
             self.channels = 1
 
+    def _apply(self, data: np.ndarray, op: tuple) -> None:
+        """Replace current data and record the transformation for cache keys"""
+        self._current = data
+        self._ops += (op,)
+        self._set_dimensions()
+
     def reset(self):
         self._set_params()
 
+    def modified(self) -> None:
+        """Data was changed in place (drawn on), derived images are outdated"""
+        self._ops += (("modified", next(self._assignments)),)
+
+    def invalidate(self) -> None:
+        """Drop derived images, required after replacing the initial frame"""
+        if self._cache is not None:
+            self._cache.clear()
+
+    def derived(
+        self,
+        fmt: Optional[int] = None,
+        crop: Optional[Rect] = None,
+        size: Optional[Pixel] = None,
+        scale: Optional[float] = None,
+    ) -> np.ndarray:
+        """Cached copy of current data: color conversion -> crop -> resize
+
+        Every stage is cached and read-only, so each conversion runs once per
+        frame state and never touches `data`.
+        """
+        key = self._ops
+        data = self.data
+        if fmt is not None:
+            key += (("cvt", fmt),)
+            data = self.cache.get(key, lambda src=data: _convert_color(src, fmt))
+        if crop is not None:
+            key += (("crop", *crop.left_top, *crop.right_bottom),)
+            data = self.cache.get(key, lambda src=data: _crop_rect(src, crop))
+        if size is not None:
+            key += (("resize", *size),)
+            data = self.cache.get(key, lambda src=data: cv.resize(src, tuple(size)))
+        elif scale is not None:
+            key += (("resize_x", scale),)
+            data = self.cache.get(
+                key, lambda src=data: cv.resize(src, None, fx=scale, fy=scale)
+            )
+        return data
+
     def save(self, img_path: str) -> None:
         cv.imwrite(settings.STATIC_PATH + img_path, self.data)
 
@@ -239,13 +522,10 @@ class ImgBase:
             self._crop_rect(region)
         if isinstance(region, Polygon):
             self._crop_polygon(region)
-        self._set_dimensions()
 
     def _crop_rect(self, region: Rect) -> None:
-        self.data = self.data[
-            region.left_top.y : region.right_bottom.y,
-            region.left_top.x : region.right_bottom.x,
-        ]
+        op = ("crop", *region.left_top, *region.right_bottom)
+        self._apply(_crop_rect(self.data, region), op)
 
     def _crop_polygon(self, region: Polygon) -> None:
         """Crop out polygon from image and fill background"""
@@ -256,27 +536,40 @@ class ImgBase:
         # Apply the mask to the image
         masked_img = cv.bitwise_and(self.data, self.data, mask=mask)
         # Crop out the masked region
-        self.data = masked_img[
+        data = masked_img[
             min(points[:, 1]) : max(points[:, 1]), min(points[:, 0]) : max(points[:, 0])
         ]
+        self._apply(data, ("polygon", *map(tuple, region.points)))
 
     def resize(self, size: Pixel) -> None:
-        self.data = cv.resize(self.data, tuple(size))
-        self._set_dimensions()
+        self._apply(cv.resize(self.data, tuple(size)), ("resize", *size))
 
     def resize_x(self, x_factor: float = 2) -> None:
-        self.data = cv.resize(self.data, None, fx=x_factor, fy=x_factor)
-        self._set_dimensions()
+        data = cv.resize(self.data, None, fx=x_factor, fy=x_factor)
+        self._apply(data, ("resize_x", x_factor))
 
     def cvt_color(self, fmt: ColorFormat) -> None:
-        self.data = cv.cvtColor(self.data, fmt)
-        self._set_dimensions()
+        self._apply(cv.cvtColor(self.data, fmt), ("cvt", fmt))
 
     def show(self, window_name: str = "Window") -> None:
         cv.imshow(window_name, self.data)
         cv.waitKey(0)
 
 
+def _crop_rect(data: np.ndarray, region: Rect) -> np.ndarray:
+    return data[
+        region.left_top.y : region.right_bottom.y,
+        region.left_top.x : region.right_bottom.x,
+    ]
+
+
+def _convert_color(data: np.ndarray, fmt: int) -> np.ndarray:
+    """cv.cvtColor, passing through data that is already single channel"""
+    if fmt == ColorFormat.BGR_GRAY and data.ndim == 2:
+        return data.view()
+    return cv.cvtColor(data, fmt)
+
+
 class Img(ImgBase):
     def __init__(self, data: str) -> None:
         self._data = data
@@ -297,32 +590,89 @@ class ImgLoader(ImgBase):
         return img
 
 
-@dataclass
 class SearchResult:
     """Entity representing a collection of detected locations
 
+    Locations are stored as arrays of boxes, scores and labels; `Rect`
+    objects are only built when locations are accessed. Scores are NaN when
+    the detector did not provide them.
+
     #### Attributes:
         :ref_img: Img
         :search_img: Img
         :locations: Optional[List[Rect]]
+        :scores: np.ndarray
+
+    #### Example:
+        - result = SearchResult.from_arrays(boxes, scores, labels)
+        - result.top(3).within(region).locations
     """
 
-    ref_img: Img
-    search_img: Img
-    locations: Optional[List[Rect]] = field(default_factory=list)
+    def __init__(
+        self,
+        ref_img: Optional[Img] = None,
+        search_img: Optional[Img] = None,
+        locations: Optional[Sequence[Rect] | RectArray] = None,
+        scores: Optional[Sequence[float]] = None,
+    ) -> None:
+        self.ref_img = ref_img
+        self.search_img = search_img
+        if not isinstance(locations, RectArray):
+            locations = RectArray.from_rects(locations or [])
+        self.rects = locations
+        if scores is None:
+            scores = np.full(len(locations), np.nan)
+        self.scores = np.asarray(scores, dtype=np.float64).reshape(len(locations))
+        self._locations: Optional[List[Rect]] = None
+
+    @classmethod
+    def from_arrays(
+        cls,
+        boxes: np.ndarray,
+        scores: Optional[np.ndarray] = None,
+        labels: Optional[Sequence[str]] = None,
+        ref_img: Optional[Img] = None,
+        search_img: Optional[Img] = None,
+    ) -> "SearchResult":
+        return cls(ref_img, search_img, RectArray(boxes, labels), scores)
+
+    @property
+    def boxes(self) -> np.ndarray:
+        return self.rects.boxes
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self.rects.labels
+
+    @property
+    def locations(self) -> List[Rect]:
+        if self._locations is None:
+            self._locations = self.rects.to_rects()
+        return self._locations
 
     @property
     def count(self):
-        return len(self.locations)
+        return len(self.rects)
+
+    @property
+    def best(self) -> Optional[Rect]:
+        """Highest scoring location, the first one when there are no scores"""
+        if not self.count:
+            return None
+        if np.isnan(self.scores).all():
+            return self[0]
+        return self[int(np.nanargmax(self.scores))]
 
     def __len__(self):
-        return len(self.locations)
+        return len(self.rects)
 
     def __iter__(self):
-        return (i for i in self.locations)
+        return iter(self.locations)
 
     def __getitem__(self, index):
-        return self.locations[index]
+        if isinstance(index, (int, np.integer)):
+            return self.locations[index]
+        return self._subset(index)
 
     def __repr__(self):
         return f"<SearchResult(count={self.count}, locations={self.locations})>"
@@ -330,8 +680,47 @@ class SearchResult:
     def __bool__(self):
         return bool(self.count)
 
-    def add(self, rect: Rect) -> None:
-        self.locations.append(rect)
+    def _subset(self, index) -> "SearchResult":
+        return SearchResult(
+            self.ref_img, self.search_img, self.rects[index], self.scores[index]
+        )
+
+    def add(self, rect: Rect, score: float = np.nan) -> None:
+        boxes = np.vstack([self.rects.boxes, rect.xyxy])
+        labels = np.append(self.rects.labels, rect.label)
+        self.rects = RectArray(boxes, labels)
+        self.scores = np.append(self.scores, score)
+        if self._locations is not None:
+            self._locations.append(rect)
 
     def remove(self, rect: Rect) -> None:
-        self.locations.remove(rect)
+        index = self.locations.index(rect)
+        keep = np.arange(self.count) != index
+        self.rects = self.rects[keep]
+        self.scores = self.scores[keep]
+        del self._locations[index]
+
+    def sort(self, descending: bool = True) -> "SearchResult":
+        """Locations ordered by score, missing scores last"""
+        keys = -self.scores if descending else self.scores
+        return self._subset(np.argsort(keys, kind="stable"))
+
+    def top(self, k: int) -> "SearchResult":
+        return self.sort()[:k]
+
+    def filter(self, mask: np.ndarray) -> "SearchResult":
+        return self._subset(np.asarray(mask, dtype=bool))
+
+    def with_labels(self, labels: Sequence[str]) -> "SearchResult":
+        return self.filter(np.isin(self.labels, list(labels)))
+
+    def within(self, region: Rect) -> "SearchResult":
+        """Locations lying entirely inside region"""
+        left, top, right, bottom = region.xyxy
+        boxes = self.boxes
+        return self.filter(
+            (boxes[:, 0] >= left)
+            & (boxes[:, 1] >= top)
+            & (boxes[:, 2] <= right)
+            & (boxes[:, 3] <= bottom)
+        )
@@ -0,0 +1,198 @@
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from core.common.entities import Pixel, Rect
+
+
+def as_points(positions: Sequence) -> np.ndarray:
+    """(n, 2) float array from pixels, nodes, rects (centers) or array-likes"""
+    if hasattr(positions, "__array__"):
+        return np.asarray(positions, dtype=float).reshape(-1, 2)
+    points = np.empty((len(positions), 2), dtype=float)
+    for i, pos in enumerate(positions):
+        if isinstance(pos, Rect):
+            pos = pos.center
+        points[i] = pos.x, pos.y
+    return points
+
+
+class SpatialIndex:
+    """Grid hash over 2d points for nearest, k-nearest and radius queries
+
+    Points are bucketed into square cells of `cell_size` pixels. Queries scan
+    rings of cells around the origin and stop as soon as no unvisited cell can
+    hold a closer point. Small sets are scanned with one vectorized distance
+    computation instead. Every query accepts a boolean `mask` (e.g. nodes not
+    on cooldown) and a set of `labels` to restrict candidates. Queries return
+    indexes into the positions the index was built from.
+
+    #### Attributes:
+        :cell_size: grid cell size in pixels
+        :brute_limit: point count up to which queries scan all points
+
+    #### Example:
+        - index = SpatialIndex(nodes)
+        - closest = nodes[index.nearest(char_pos, mask=available)]
+        - index = SpatialIndex(targets, labels=[t.label for t in targets])
+        - nearby = index.within(origin, 300, labels={"Logs"})
+    """
+
+    cell_size: int = 64
+    brute_limit: int = 256
+
+    def __init__(
+        self,
+        positions: Sequence,
+        labels: Sequence[str] = None,
+        cell_size: int = None,
+    ) -> None:
+        self.cell_size = cell_size or self.cell_size
+        self.points = as_points(positions)
+        self.labels = None if labels is None else np.asarray(labels, dtype=object)
+        self._cells = self._build_cells()
+
+    @classmethod
+    def from_rects(cls, rects: Sequence[Rect], cell_size: int = None) -> "SpatialIndex":
+        return cls(rects, [rect.label for rect in rects], cell_size)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __repr__(self):
+        return f"<SpatialIndex(points={len(self)}, cells={len(self._cells)})>"
+
+    def _build_cells(self) -> dict[tuple[int, int], np.ndarray]:
+        if not len(self.points):
+            self._cell_min = self._cell_max = np.zeros(2, dtype=int)
+            return {}
+        cells = np.floor(self.points / self.cell_size).astype(int)
+        self._cell_min, self._cell_max = cells.min(axis=0), cells.max(axis=0)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        keys, starts = np.unique(cells[order], axis=0, return_index=True)
+        groups = np.split(order, starts[1:])
+        return {(int(cx), int(cy)): group for (cx, cy), group in zip(keys, groups)}
+
+    def allowed(
+        self, mask: np.ndarray = None, labels: Iterable[str] = None
+    ) -> Optional[np.ndarray]:
+        """Combined candidate mask, None when every point is allowed"""
+        if labels is not None:
+            if self.labels is None:
+                raise ValueError("Index was built without labels")
+            label_mask = np.isin(self.labels, list(labels))
+            mask = label_mask if mask is None else mask & label_mask
+        return None if mask is None else np.asarray(mask, dtype=bool)
+
+    def _distances(self, origin: Pixel, indexes: np.ndarray) -> np.ndarray:
+        deltas = self.points[indexes] - (origin.x, origin.y)
+        return np.hypot(deltas[:, 0], deltas[:, 1])
+
+    def _ring(self, center: tuple[int, int], radius: int) -> list[np.ndarray]:
+        """Point groups of cells at Chebyshev distance radius from center"""
+        cx, cy = center
+        if radius == 0:
+            group = self._cells.get(center)
+            return [] if group is None else [group]
+        groups = []
+        for x in range(cx - radius, cx + radius + 1):
+            for y in (cy - radius, cy + radius):
+                if (group := self._cells.get((x, y))) is not None:
+                    groups.append(group)
+        for y in range(cy - radius + 1, cy + radius):
+            for x in (cx - radius, cx + radius):
+                if (group := self._cells.get((x, y))) is not None:
+                    groups.append(group)
+        return groups
+
+    def _max_ring(self, center: tuple[int, int]) -> int:
+        lower = np.abs(np.array(center) - self._cell_min)
+        upper = np.abs(self._cell_max - np.array(center))
+        return int(max(lower.max(), upper.max()))
+
+    def k_nearest(
+        self,
+        origin: Pixel,
+        k: int,
+        mask: np.ndarray = None,
+        labels: Iterable[str] = None,
+    ) -> list[int]:
+        """Indexes of the k closest allowed points, closest first"""
+        allowed = self.allowed(mask, labels)
+        if not len(self) or k <= 0:
+            return []
+        if len(self) <= self.brute_limit:
+            indexes = np.arange(len(self))
+            if allowed is not None:
+                indexes = indexes[allowed]
+            distances = self._distances(origin, indexes)
+            order = np.argsort(distances, kind="stable")[:k]
+            return indexes[order].tolist()
+
+        center = (
+            int(np.floor(origin.x / self.cell_size)),
+            int(np.floor(origin.y / self.cell_size)),
+        )
+        indexes = np.empty(0, dtype=int)
+        distances = np.empty(0)
+        for radius in range(self._max_ring(center) + 1):
+            groups = self._ring(center, radius)
+            if groups:
+                found = np.concatenate(groups)
+                if allowed is not None:
+                    found = found[allowed[found]]
+                indexes = np.concatenate([indexes, found])
+                distances = np.concatenate([distances, self._distances(origin, found)])
+            # points in further rings are at least radius cells away
+            if len(indexes) >= k:
+                kth = np.partition(distances, k - 1)[k - 1]
+                if kth <= radius * self.cell_size:
+                    break
+        order = np.lexsort((indexes, distances))[:k]
+        return indexes[order].tolist()
+
+    def nearest(
+        self, origin: Pixel, mask: np.ndarray = None, labels: Iterable[str] = None
+    ) -> Optional[int]:
+        """Index of the closest allowed point, None if there is none"""
+        found = self.k_nearest(origin, 1, mask, labels)
+        return found[0] if found else None
+
+    def within(
+        self,
+        origin: Pixel,
+        radius: float,
+        mask: np.ndarray = None,
+        labels: Iterable[str] = None,
+    ) -> list[int]:
+        """Indexes of allowed points within radius of origin, closest first"""
+        allowed = self.allowed(mask, labels)
+        if not len(self):
+            return []
+        if len(self) <= self.brute_limit:
+            indexes = np.arange(len(self))
+        else:
+            low_x, low_y = np.floor(
+                (np.array([origin.x, origin.y]) - radius) / self.cell_size
+            ).astype(int)
+            high_x, high_y = np.floor(
+                (np.array([origin.x, origin.y]) + radius) / self.cell_size
+            ).astype(int)
+            low_x, low_y = max(low_x, self._cell_min[0]), max(low_y, self._cell_min[1])
+            high_x = min(high_x, self._cell_max[0])
+            high_y = min(high_y, self._cell_max[1])
+            groups = [
+                group
+                for x in range(low_x, high_x + 1)
+                for y in range(low_y, high_y + 1)
+                if (group := self._cells.get((x, y))) is not None
+            ]
+            if not groups:
+                return []
+            indexes = np.concatenate(groups)
+        if allowed is not None:
+            indexes = indexes[allowed[indexes]]
+        distances = self._distances(origin, indexes)
+        inside = distances <= radius
+        indexes, distances = indexes[inside], distances[inside]
+        return indexes[np.lexsort((indexes, distances))].tolist()
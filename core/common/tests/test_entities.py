@@ -1,20 +1,25 @@
+import copy
 import os
+from threading import Thread
 from unittest import TestCase, skip
 
 import cv2 as cv
 import numpy as np
 
 from config import settings
+from core.display.utils import draw_circles
 from core.display.window import WindowHandler
 
 from ..entities import (
     Color,
     Img,
     ImgBase,
+    ImgCache,
     ImgLoader,
     Pixel,
     Polygon,
     Rect,
+    RectArray,
     SearchResult,
 )
 from ..enums import ColorFormat
@@ -50,6 +55,12 @@ class PixelTests(TestCase):
 
         self.assertEqual(loc1, loc2)
         self.assertNotEqual(loc1, loc3)
+        self.assertEqual(loc1, (10.5, 20.5))
+        self.assertEqual(hash(loc1), hash(loc2))
+
+    def test_slots(self):
+        loc = Pixel(x=1, y=2)
+        self.assertFalse(hasattr(loc, "__dict__"))
 
 
 class RectTests(TestCase):
@@ -98,6 +109,72 @@ class RectTests(TestCase):
         expected_values = [self.left_top, self.right_bottom, self.width, self.height]
         self.assertEqual(rect_values, expected_values)
 
+    def test_center_cached(self):
+        rect = Rect(left_top=self.left_top, right_bottom=self.right_bottom)
+        self.assertIs(rect.center, rect.center)
+
+    def test_center_after_corner_change(self):
+        rect = Rect(left_top=Pixel(0, 0), right_bottom=Pixel(10, 10))
+        self.assertEqual(rect.center, Pixel(5, 5))
+        rect.left_top = Pixel(10, 10)
+        rect.right_bottom = Pixel(30, 30)
+        self.assertEqual(rect.center, Pixel(20, 20))
+
+    def test_from_xyxy_array(self):
+        boxes = np.array([[0, 0, 10, 20], [5, 5, 6, 7]])
+        rects = Rect.from_xyxy_array(boxes, labels=["a", "b"])
+        self.assertEqual(len(rects), 2)
+        self.assertEqual(rects[0].left_top, Pixel(0, 0))
+        self.assertEqual(rects[0].right_bottom, Pixel(10, 20))
+        self.assertEqual((rects[0].width, rects[0].height), (10, 20))
+        self.assertEqual(rects[1].label, "b")
+        self.assertIsInstance(rects[1].left_top.x, int)
+        self.assertEqual(Rect.from_xyxy_array(np.empty((0, 4))), [])
+
+
+class RectArrayTests(TestCase):
+    def setUp(self) -> None:
+        self.rects = [
+            Rect(left_top=Pixel(0, 0), width=10, height=10, label="Logs"),
+            Rect(left_top=Pixel(5, 5), width=10, height=10, label="Heretic"),
+            Rect(left_top=Pixel(100, 100), width=20, height=40),
+        ]
+        self.array = RectArray.from_rects(self.rects)
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.array), 3)
+        self.assertEqual(self.array.to_rects(), self.rects)
+        self.assertEqual(self.array[2], self.rects[2])
+        self.assertEqual(list(self.array), self.rects)
+
+    def test_geometry(self):
+        self.assertEqual(self.array.widths.tolist(), [10, 10, 20])
+        self.assertEqual(self.array.areas.tolist(), [100, 100, 800])
+        centers = [tuple(rect.center) for rect in self.rects]
+        self.assertEqual([tuple(c) for c in self.array.centers], centers)
+
+    def test_contains(self):
+        self.assertEqual(self.array.contains(Pixel(7, 7)).tolist(), [True, True, False])
+        self.assertEqual(self.array.contains(Pixel(50, 50)).tolist(), [False] * 3)
+
+    def test_distances(self):
+        distances = self.array.distances(Pixel(5, 5))
+        self.assertEqual(distances[0], 0)
+        self.assertAlmostEqual(distances[1], np.hypot(5, 5))
+
+    def test_iou(self):
+        iou = self.array.iou(self.array)
+        self.assertEqual(iou.shape, (3, 3))
+        np.testing.assert_allclose(np.diag(iou), 1)
+        self.assertAlmostEqual(iou[0, 1], 25 / 175)
+        self.assertEqual(iou[0, 2], 0)
+        np.testing.assert_allclose(self.array.iou(self.rects[0]), iou[:, 0])
+
+    def test_filter(self):
+        filtered = self.array.filter(self.array.labels == "Logs")
+        self.assertIsInstance(filtered, RectArray)
+        self.assertEqual(filtered.to_rects(), [self.rects[0]])
+
 
 class PolygonTests(TestCase):
     def test_valid_polygon(self):
@@ -248,6 +325,66 @@ class ImgBaseTests(TestCase):
         self.img.show(window_name="Test window")
 
 
+class ImgCacheTests(TestCase):
+    def setUp(self) -> None:
+        self.cache = ImgCache(max_bytes=200)
+
+    def test_get_counts_hits_and_misses(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return np.zeros(10, dtype=np.uint8)
+
+        first = self.cache.get(("a",), factory)
+        second = self.cache.get(("a",), factory)
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertFalse(first.flags.writeable)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.get(("a",), lambda: np.zeros(100, dtype=np.uint8))
+        self.cache.get(("b",), lambda: np.zeros(100, dtype=np.uint8))
+        self.cache.get(("a",), lambda: np.zeros(100, dtype=np.uint8))
+        self.cache.get(("c",), lambda: np.zeros(100, dtype=np.uint8))
+        self.assertIn(("a",), self.cache)
+        self.assertNotIn(("b",), self.cache)
+        self.assertEqual(self.cache.nbytes, 200)
+
+    def test_oversized_value_not_stored(self):
+        value = self.cache.get(("a",), lambda: np.zeros(300, dtype=np.uint8))
+        self.assertEqual(value.shape, (300,))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_clear(self):
+        self.cache.get(("a",), lambda: np.zeros(100, dtype=np.uint8))
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.nbytes, 0)
+
+    def test_shared_between_threads(self):
+        def worker(seed):
+            rng = np.random.default_rng(seed)
+            for key in rng.integers(0, 10, 2000).tolist():
+                self.cache.get((key,), lambda: np.zeros(30, dtype=np.uint8))
+
+        threads = [Thread(target=worker, args=(seed,)) for seed in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.hits + self.cache.misses, 16000)
+        self.assertEqual(self.cache.nbytes, 30 * len(self.cache))
+        self.assertLessEqual(self.cache.nbytes, 200)
+
+    def test_deepcopy(self):
+        self.cache.get(("a",), lambda: np.zeros(100, dtype=np.uint8))
+        copied = copy.deepcopy(self.cache)
+        self.assertEqual((len(copied), copied.max_bytes), (0, 200))
+
+
 class ImgTests(TestCase):
     def setUp(self) -> None:
         self.img_path = "static/tests/vision/test_template.png"
@@ -264,6 +401,38 @@ class ImgTests(TestCase):
         self.assertEqual(self.img.height, self.height)
         self.assertEqual(self.img.channels, self.channels)
 
+    def test_derived_runs_conversion_once(self):
+        gray = self.img.derived(ColorFormat.BGR_GRAY)
+        self.assertEqual(gray.shape, (self.height, self.width))
+        self.assertIs(self.img.derived(ColorFormat.BGR_GRAY), gray)
+        self.assertEqual(self.img.cache.misses, 1)
+        self.assertEqual(self.img.cache.hits, 1)
+        # data itself is untouched
+        self.assertEqual(self.img.channels, self.channels)
+
+    def test_derived_crop_and_resize(self):
+        crop = Rect(left_top=Pixel(10, 20), width=50, height=40)
+        cropped = self.img.derived(ColorFormat.BGR_GRAY, crop=crop)
+        self.assertEqual(cropped.shape, (40, 50))
+        resized = self.img.derived(ColorFormat.BGR_GRAY, crop=crop, size=Pixel(25, 20))
+        self.assertEqual(resized.shape, (20, 25))
+        scaled = self.img.derived(crop=crop, scale=0.5)
+        self.assertEqual(scaled.shape, (20, 25, self.channels))
+
+    def test_derived_follows_data_transformations(self):
+        gray = self.img.derived(ColorFormat.BGR_GRAY)
+        self.img.crop(Rect(left_top=Pixel(0, 0), width=30, height=30))
+        self.assertEqual(self.img.derived(ColorFormat.BGR_GRAY).shape, (30, 30))
+        self.img.reset()
+        self.assertIs(self.img.derived(ColorFormat.BGR_GRAY), gray)
+
+    def test_derived_after_drawing(self):
+        gray = self.img.derived(ColorFormat.BGR_GRAY)
+        draw_circles(self.img, [Pixel(5, 5)], radius=3, bgr=(255, 255, 255))
+        drawn = self.img.derived(ColorFormat.BGR_GRAY)
+        self.assertIsNot(drawn, gray)
+        self.assertEqual(drawn[5, 5], 255)
+
 
 class ImgLoaderTests(TestCase):
     def setUp(self) -> None:
@@ -426,3 +595,35 @@ class SearchResultTests(TestCase):
         self.assertEqual(len(self.search_result), 1)
         self.search_result.remove(self.rect1)
         self.assertEqual(len(self.search_result), 0)
+
+    def test_from_arrays(self):
+        boxes = np.array([[0, 0, 10, 10], [5, 5, 15, 15], [50, 50, 60, 60]])
+        result = SearchResult.from_arrays(boxes, [0.7, 0.9, 0.8], ["a", "b", "a"])
+        self.assertEqual(len(result), 3)
+        self.assertEqual(result[1].left_top, Pixel(5, 5))
+        self.assertEqual(result[1].label, "b")
+        self.assertEqual(result.best, result[1])
+
+    def test_sort_and_top(self):
+        boxes = np.array([[0, 0, 10, 10], [5, 5, 15, 15], [50, 50, 60, 60]])
+        result = SearchResult.from_arrays(boxes, [0.7, 0.9, 0.8])
+        self.assertEqual(result.sort().scores.tolist(), [0.9, 0.8, 0.7])
+        self.assertEqual(result.sort(descending=False).scores.tolist(), [0.7, 0.8, 0.9])
+        top = result.top(2)
+        self.assertIsInstance(top, SearchResult)
+        self.assertEqual(top.locations, [result[1], result[2]])
+
+    def test_filters(self):
+        boxes = np.array([[0, 0, 10, 10], [5, 5, 15, 15], [50, 50, 60, 60]])
+        result = SearchResult.from_arrays(boxes, labels=["a", "b", "a"])
+        self.assertEqual(len(result.with_labels(["a"])), 2)
+        region = Rect(left_top=Pixel(0, 0), width=12, height=12)
+        self.assertEqual(result.within(region).locations, [result[0]])
+        self.assertEqual(len(result.filter(result.scores > 0)), 0)
+
+    def test_scores_default(self):
+        self.search_result.add(self.rect1)
+        self.search_result.add(self.rect2, score=0.5)
+        self.assertTrue(np.isnan(self.search_result.scores[0]))
+        self.assertEqual(self.search_result.best, self.rect2)
+        self.assertEqual(self.search_result.sort().locations, [self.rect2, self.rect1])
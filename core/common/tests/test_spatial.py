@@ -0,0 +1,90 @@
+from unittest import TestCase
+
+import numpy as np
+
+from ..entities import Node, Pixel, Rect
+from ..spatial import SpatialIndex, as_points
+
+
+class GridIndex(SpatialIndex):
+    brute_limit = 0  # always go through the grid
+
+
+class SpatialIndexTests(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.points = rng.uniform(0, 2000, (3000, 2))
+        self.labels = rng.choice(["Logs", "Limestone", "Heretic"], len(self.points))
+        self.index = GridIndex(self.points, self.labels, cell_size=50)
+        self.origins = [Pixel(*p) for p in rng.uniform(-200, 2200, (25, 2))]
+
+    def brute(self, origin: Pixel, mask: np.ndarray = None) -> np.ndarray:
+        distances = np.hypot(*(self.points - (origin.x, origin.y)).T)
+        if mask is not None:
+            distances[~mask] = np.inf
+        return distances
+
+    def test_as_points(self):
+        rect = Rect(left_top=Pixel(0, 0), width=10, height=20)
+        points = as_points([Pixel(1, 2), Node(3, 4), rect])
+        self.assertEqual(points.tolist(), [[1, 2], [3, 4], [5, 10]])
+
+    def test_nearest(self):
+        for origin in self.origins:
+            expected = int(np.argmin(self.brute(origin)))
+            self.assertEqual(self.index.nearest(origin), expected)
+
+    def test_k_nearest(self):
+        for origin in self.origins:
+            expected = np.argsort(self.brute(origin), kind="stable")[:7].tolist()
+            self.assertEqual(self.index.k_nearest(origin, 7), expected)
+
+    def test_within(self):
+        for origin in self.origins:
+            distances = self.brute(origin)
+            expected = set(np.flatnonzero(distances <= 120).tolist())
+            found = self.index.within(origin, 120)
+            self.assertEqual(set(found), expected)
+            self.assertEqual(found, sorted(found, key=lambda i: distances[i]))
+
+    def test_mask(self):
+        mask = np.arange(len(self.points)) % 3 == 0
+        for origin in self.origins:
+            expected = int(np.argmin(self.brute(origin, mask)))
+            self.assertEqual(self.index.nearest(origin, mask=mask), expected)
+
+    def test_labels(self):
+        mask = self.labels == "Logs"
+        for origin in self.origins:
+            expected = int(np.argmin(self.brute(origin, mask)))
+            self.assertEqual(self.index.nearest(origin, labels={"Logs"}), expected)
+
+    def test_brute_matches_grid(self):
+        index = SpatialIndex(self.points[:200], self.labels[:200])
+        grid = GridIndex(self.points[:200], self.labels[:200])
+        for origin in self.origins:
+            self.assertEqual(index.k_nearest(origin, 5), grid.k_nearest(origin, 5))
+            self.assertEqual(index.within(origin, 300), grid.within(origin, 300))
+
+    def test_nothing_allowed(self):
+        mask = np.zeros(len(self.points), dtype=bool)
+        self.assertIsNone(self.index.nearest(Pixel(0, 0), mask=mask))
+        self.assertEqual(self.index.within(Pixel(0, 0), 5000, mask=mask), [])
+
+    def test_empty(self):
+        index = SpatialIndex([])
+        self.assertIsNone(index.nearest(Pixel(0, 0)))
+        self.assertEqual(index.within(Pixel(0, 0), 10), [])
+
+    def test_from_rects(self):
+        rects = [
+            Rect(left_top=Pixel(0, 0), width=10, height=10, label="Logs"),
+            Rect(left_top=Pixel(100, 100), width=10, height=10, label="Heretic"),
+        ]
+        index = SpatialIndex.from_rects(rects)
+        self.assertEqual(index.nearest(Pixel(90, 90)), 1)
+        self.assertEqual(index.nearest(Pixel(90, 90), labels=["Logs"]), 0)
+
+    def test_labels_required(self):
+        with self.assertRaises(ValueError):
+            SpatialIndex(self.points).nearest(Pixel(0, 0), labels=["Logs"])
@@ -0,0 +1,20 @@
+from threading import Event
+from unittest import TestCase
+
+from ..warmup import all_ready, warm_up
+
+
+class TestWarmUp(TestCase):
+    def test_warm_up(self):
+        loaded = Event()
+        future = warm_up(loaded.wait, 1)
+        self.assertFalse(future.done())
+        self.assertFalse(all_ready([future], timeout=0.01))
+        loaded.set()
+        self.assertTrue(all_ready([future], timeout=1))
+        self.assertTrue(future.result())
+
+    def test_errors(self):
+        future = warm_up(open, "missing/model.pt")
+        with self.assertRaises(FileNotFoundError):
+            future.result(1)
@@ -0,0 +1,27 @@
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from threading import Lock
+from typing import Callable, Iterable, Optional
+
+max_workers = 2
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = Lock()
+
+
+def warm_up(func: Callable, *args, **kwargs) -> Future:
+    """Run slow setup (model, reference images) in the background
+
+    The returned future is the readiness of what func loads: done() to poll
+    it from a bot loop, result() to block until it's loaded.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers, thread_name_prefix="warmup")
+    return _executor.submit(func, *args, **kwargs)
+
+
+def all_ready(futures: Iterable[Future], timeout: float = None) -> bool:
+    """Wait until every future is done, False on timeout"""
+    _, pending = wait(list(futures), timeout)
+    return not pending
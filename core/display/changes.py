@@ -0,0 +1,68 @@
+from time import time
+from typing import Any, Callable, Hashable
+
+import cv2 as cv
+import numpy as np
+
+from core.common.entities import Img, Rect
+from core.common.enums import ColorFormat
+
+
+class RegionChangeDetector:
+    """Reuse results computed on screen regions that did not change
+
+    Each region is reduced to a small grayscale thumbnail (signature). A cached
+    result stays valid while the signature of the region stays within
+    `tolerance` of the one recorded when the result was computed.
+
+    #### Attributes:
+        :size: thumbnail size (width, height)
+        :tolerance: max absolute per-pixel difference of thumbnails
+        :max_age: seconds after which a result is recomputed anyway
+    """
+
+    size: tuple[int, int] = (16, 16)
+    tolerance: int = 2
+    max_age: float = 2.0
+
+    def __init__(
+        self, size: tuple[int, int] = None, tolerance: int = None, max_age: float = None
+    ) -> None:
+        self.size = size or self.size
+        self.tolerance = self.tolerance if tolerance is None else tolerance
+        self.max_age = self.max_age if max_age is None else max_age
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[Hashable, tuple[np.ndarray, float, Any]] = {}
+
+    def signature(self, img: Img, crop: Rect = None) -> np.ndarray:
+        gray = img.derived(ColorFormat.BGR_GRAY, crop=crop)
+        return cv.resize(gray, self.size, interpolation=cv.INTER_AREA)
+
+    def is_changed(self, old: np.ndarray, new: np.ndarray) -> bool:
+        diff = cv.absdiff(old, new)
+        return int(diff.max()) > self.tolerance
+
+    def cached(
+        self, key: Hashable, img: Img, crop: Rect, compute: Callable[[], Any]
+    ) -> Any:
+        """Return previous result for key if the region is unchanged, else compute"""
+        signature = self.signature(img, crop)
+        entry = self._entries.get(key)
+        if entry is not None:
+            old_signature, created, result = entry
+            fresh = time() - created < self.max_age
+            if fresh and not self.is_changed(old_signature, signature):
+                self.hits += 1
+                return result
+
+        self.misses += 1
+        result = compute()
+        self._entries[key] = (signature, time(), result)
+        return result
+
+    def invalidate(self, key: Hashable = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
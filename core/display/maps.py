@@ -0,0 +1,291 @@
+import math
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2 as cv
+import numpy as np
+
+from config import settings
+from core.common.entities import Img, ImgLoader, Pixel, Rect
+from core.common.enums import ColorFormat
+
+
+class PersistentMapIndex:
+    """Base class for indexes computed from a map and saved next to it
+
+    Subclasses define `build`, `_from_arrays` and `_arrays`. The saved file
+    carries a stamp of the map file, so a changed map triggers a rebuild.
+    """
+
+    suffix = ".index.npz"
+    version = 1
+
+    @classmethod
+    def index_path(cls, map_path: str) -> str:
+        return settings.STATIC_PATH + os.path.splitext(map_path)[0] + cls.suffix
+
+    @classmethod
+    def _source_stamp(cls, map_path: str) -> np.ndarray:
+        stat = os.stat(settings.STATIC_PATH + map_path)
+        return np.array([cls.version, stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+    @classmethod
+    def build(cls, map_img: Img, map_path: str = ""):
+        raise NotImplementedError()
+
+    @classmethod
+    def _from_arrays(cls, arrays: dict[str, np.ndarray], map_path: str):
+        raise NotImplementedError()
+
+    def _arrays(self) -> dict[str, np.ndarray]:
+        raise NotImplementedError()
+
+    @classmethod
+    def load(cls, map_path: str):
+        """Load persisted index for map_path, rebuilding it if the map changed"""
+        index_path = cls.index_path(map_path)
+        stamp = cls._source_stamp(map_path)
+        if os.path.exists(index_path):
+            with np.load(index_path) as data:
+                if np.array_equal(data["stamp"], stamp):
+                    return cls._from_arrays(dict(data), map_path)
+
+        index = cls.build(ImgLoader(map_path), map_path)
+        index.save(index_path, stamp)
+        return index
+
+    def save(self, index_path: str, stamp: np.ndarray) -> None:
+        with open(index_path, "wb") as file:
+            np.savez(file, stamp=stamp, **self._arrays())
+
+
+class MapIndex(PersistentMapIndex):
+    """Precomputed FFT of a map for fast normalized template matching
+
+    The map spectrum and its integral images (normalization terms) are built
+    once and persisted next to the map image, so localising a patch costs one
+    FFT of the patch, a spectrum product and an inverse FFT. Results match
+    cv.matchTemplate with TM_CCOEFF_NORMED.
+
+    #### Example:
+        - index = MapIndex.load("albion/maps/mase_knoll.png")
+        - rect = index.locate(minimap, confidence=0.6)
+    """
+
+    suffix = ".fft.npz"
+
+    def __init__(
+        self,
+        spectrum: np.ndarray,
+        sums: np.ndarray,
+        sq_sums: np.ndarray,
+        map_path: str = "",
+    ) -> None:
+        self.spectrum = spectrum
+        self.sums = sums
+        self.sq_sums = sq_sums
+        self.map_path = map_path
+        self.height, self.width = sums.shape[0] - 1, sums.shape[1] - 1
+        self._window_norms: dict[tuple[int, int], np.ndarray] = {}
+
+    def __repr__(self):
+        return f"<MapIndex({self.map_path}, width={self.width}, height={self.height})>"
+
+    @classmethod
+    def build(cls, map_img: Img, map_path: str = "") -> "MapIndex":
+        gray = map_img.derived(ColorFormat.BGR_GRAY).astype(np.float32)
+        height, width = gray.shape
+        size = (cv.getOptimalDFTSize(height), cv.getOptimalDFTSize(width))
+        # correlation with a zero-mean patch ignores the map offset,
+        # centering keeps the float32 spectrum well conditioned
+        padded = np.zeros(size, dtype=np.float32)
+        padded[:height, :width] = gray - gray.mean()
+        spectrum = cv.dft(padded, nonzeroRows=height)
+        sums, sq_sums = cv.integral2(gray, sdepth=cv.CV_64F, sqdepth=cv.CV_64F)
+        return cls(spectrum, sums, sq_sums, map_path)
+
+    @classmethod
+    def _from_arrays(cls, arrays: dict[str, np.ndarray], map_path: str) -> "MapIndex":
+        return cls(arrays["spectrum"], arrays["sums"], arrays["sq_sums"], map_path)
+
+    def _arrays(self) -> dict[str, np.ndarray]:
+        return {"spectrum": self.spectrum, "sums": self.sums, "sq_sums": self.sq_sums}
+
+    def match(self, patch: np.ndarray) -> np.ndarray:
+        """TM_CCOEFF_NORMED response of a grayscale patch over the map"""
+        patch_h, patch_w = patch.shape[:2]
+        res_h, res_w = self.height - patch_h + 1, self.width - patch_w + 1
+        if res_h <= 0 or res_w <= 0:
+            raise ValueError("Patch is larger than the indexed map")
+
+        template = patch.astype(np.float32)
+        template -= template.mean()
+        template_norm = float(np.sum(template * template))
+        if template_norm == 0:
+            return np.zeros((res_h, res_w), dtype=np.float32)
+
+        padded = np.zeros(self.spectrum.shape, dtype=np.float32)
+        padded[:patch_h, :patch_w] = template
+        patch_spectrum = cv.dft(padded, nonzeroRows=patch_h)
+        product = cv.mulSpectrums(self.spectrum, patch_spectrum, 0, conjB=True)
+        corr = cv.idft(product, flags=cv.DFT_SCALE | cv.DFT_REAL_OUTPUT)
+        corr = corr[:res_h, :res_w]
+
+        response = corr * self.inverse_window_norm(patch_h, patch_w)
+        response *= 1 / math.sqrt(template_norm)
+        return response
+
+    def inverse_window_norm(self, height: int, width: int) -> np.ndarray:
+        """1 / norm of the zero-mean map window at each position, cached per size
+
+        Flat windows get 0, so they never match.
+        """
+        key = (height, width)
+        if key not in self._window_norms:
+            window_sum = self._window_sum(self.sums, height, width)
+            window_sq_sum = self._window_sum(self.sq_sums, height, width)
+            variance = window_sq_sum - window_sum * window_sum / (height * width)
+            norm = np.sqrt(np.maximum(variance, 0))
+            inverse = np.divide(1, norm, out=np.zeros_like(norm), where=norm > 1e-6)
+            self._window_norms[key] = inverse.astype(np.float32)
+        return self._window_norms[key]
+
+    @staticmethod
+    def _window_sum(integral: np.ndarray, height: int, width: int) -> np.ndarray:
+        return (
+            integral[height:, width:]
+            - integral[:-height, width:]
+            - integral[height:, :-width]
+            + integral[:-height, :-width]
+        )
+
+    def locate(self, patch: Img, confidence: float = 0.65) -> Optional[Rect]:
+        """Best location of patch on the map, if its score reaches confidence"""
+        response = self.match(patch.derived(ColorFormat.BGR_GRAY))
+        _, max_val, _, max_loc = cv.minMaxLoc(response)
+        if max_val < confidence:
+            return None
+        return Rect(left_top=Pixel(*max_loc), width=patch.width, height=patch.height)
+
+
+@dataclass(frozen=True)
+class MapLocation:
+    """Position of a patch on a map estimated from keypoint matches
+
+    #### Attributes:
+        :center: Pixel - map position of the patch center
+        :scale: float - map units per patch pixel
+        :angle: float - patch rotation in degrees
+        :inliers: int - matches consistent with the estimated transform
+    """
+
+    center: Pixel
+    scale: float
+    angle: float
+    inliers: int
+
+
+class FeatureIndex(PersistentMapIndex):
+    """ORB keypoint index of a map for rotation and scale tolerant localisation
+
+    Map keypoints are detected once and saved next to the map. Patch
+    descriptors are matched through a FLANN LSH index and the patch pose is
+    estimated with a RANSAC similarity transform (a homography restricted to
+    translation, rotation and uniform scale, which is what a minimap can do).
+
+    #### Example:
+        - index = FeatureIndex.load("albion/maps/mase_knoll.png")
+        - location = index.locate(minimap)
+    """
+
+    suffix = ".orb.npz"
+    ratio = 0.8
+    min_inliers = 6
+    scale_range = (0.5, 2.0)
+    ransac_threshold = 3.0
+    flann_index = {
+        "algorithm": 6,  # FLANN_INDEX_LSH
+        "table_number": 6,
+        "key_size": 12,
+        "multi_probe_level": 1,
+    }
+
+    def __init__(
+        self, points: np.ndarray, descriptors: np.ndarray, map_path: str = ""
+    ) -> None:
+        self.points = points
+        self.descriptors = descriptors
+        self.map_path = map_path
+        self.matcher = cv.FlannBasedMatcher(self.flann_index, {"checks": 50})
+        self.matcher.add([descriptors])
+        self.matcher.train()
+
+    def __repr__(self):
+        return f"<FeatureIndex({self.map_path}, keypoints={len(self.points)})>"
+
+    @staticmethod
+    def detector(nfeatures: int = 500) -> cv.ORB:
+        # small patches keep keypoints close to the borders of a minimap crop
+        return cv.ORB_create(
+            nfeatures=nfeatures,
+            scaleFactor=1.2,
+            nlevels=4,
+            edgeThreshold=15,
+            patchSize=15,
+            fastThreshold=5,
+        )
+
+    @classmethod
+    def build(cls, map_img: Img, map_path: str = "") -> "FeatureIndex":
+        gray = map_img.derived(ColorFormat.BGR_GRAY)
+        keypoints, descriptors = cls.detector(30000).detectAndCompute(gray, None)
+        if descriptors is None:
+            raise ValueError(f"No keypoints found on map: {map_path}")
+        points = np.float32([keypoint.pt for keypoint in keypoints])
+        return cls(points, descriptors, map_path)
+
+    @classmethod
+    def _from_arrays(
+        cls, arrays: dict[str, np.ndarray], map_path: str
+    ) -> "FeatureIndex":
+        return cls(arrays["points"], arrays["descriptors"], map_path)
+
+    def _arrays(self) -> dict[str, np.ndarray]:
+        return {"points": self.points, "descriptors": self.descriptors}
+
+    def locate(self, patch: Img) -> Optional[MapLocation]:
+        """Estimate patch pose on the map, None if matches are not consistent"""
+        gray = patch.derived(ColorFormat.BGR_GRAY)
+        keypoints, descriptors = self.detector().detectAndCompute(gray, None)
+        if descriptors is None or len(keypoints) < self.min_inliers:
+            return None
+
+        good = []
+        for pair in self.matcher.knnMatch(descriptors, k=2):
+            if len(pair) == 2 and pair[0].distance < self.ratio * pair[1].distance:
+                good.append(pair[0])
+        if len(good) < self.min_inliers:
+            return None
+
+        src = np.float32([keypoints[match.queryIdx].pt for match in good])
+        dst = self.points[[match.trainIdx for match in good]]
+        transform, inliers = cv.estimateAffinePartial2D(
+            src, dst, method=cv.RANSAC, ransacReprojThreshold=self.ransac_threshold
+        )
+        if transform is None or int(inliers.sum()) < self.min_inliers:
+            return None
+
+        scale = math.hypot(transform[0, 0], transform[1, 0])
+        if not self.scale_range[0] <= scale <= self.scale_range[1]:
+            return None
+        angle = math.degrees(math.atan2(transform[1, 0], transform[0, 0]))
+        center_x, center_y = transform @ np.array(
+            [patch.width / 2, patch.height / 2, 1]
+        )
+        return MapLocation(
+            center=Pixel(round(center_x), round(center_y)),
+            scale=scale,
+            angle=angle,
+            inliers=int(inliers.sum()),
+        )
@@ -0,0 +1,113 @@
+"""
+Template masks from pixel variance across sample frames
+
+Pixels of a reference image that change between occurrences of the element
+on screen (background behind a UI element) are masked out of matching.
+
+    python -m core.display.masks albion/ui/cast_bar.png --frames "albion/tests/*.png"
+"""
+import argparse
+import glob
+import os
+from typing import Optional, Sequence
+
+import cv2 as cv
+import numpy as np
+
+from config import settings
+from core.common.entities import Img, ImgLoader, Rect
+from core.common.enums import ColorFormat
+
+MASK_DIR = "masks"
+
+
+def mask_path(template_path: str) -> str:
+    """Mask file of a template: masks/<name> next to it"""
+    directory, name = os.path.split(template_path)
+    return os.path.join(directory, MASK_DIR, name)
+
+
+def collect_patches(
+    template: Img, frames: Sequence[Img], min_score: float, crop: Rect = None
+) -> list[np.ndarray]:
+    """Grayscale patches at the best match of template in each frame"""
+    ref_data = template.derived(ColorFormat.BGR_GRAY)
+    height, width = ref_data.shape
+    patches = []
+    for frame in frames:
+        search_data = frame.derived(ColorFormat.BGR_GRAY, crop=crop)
+        response = cv.matchTemplate(search_data, ref_data, cv.TM_CCOEFF_NORMED)
+        _, max_val, _, (loc_x, loc_y) = cv.minMaxLoc(response)
+        if max_val >= min_score:
+            patches.append(search_data[loc_y : loc_y + height, loc_x : loc_x + width])
+    return patches
+
+
+def variance_mask(
+    patches: Sequence[np.ndarray],
+    max_std: float = 12.0,
+    min_samples: int = 3,
+    min_coverage: float = 0.3,
+) -> Optional[np.ndarray]:
+    """Mask of pixels that stay stable across patches
+
+    None when there are too few samples or too little of the template is
+    stable to be worth masking (the element itself changes).
+    """
+    if len(patches) < min_samples:
+        return None
+    std = np.stack(patches).astype(np.float32).std(axis=0)
+    mask = np.where(std <= max_std, 255, 0).astype(np.uint8)
+    mask = cv.medianBlur(mask, 3)
+    coverage = np.count_nonzero(mask) / mask.size
+    if coverage < min_coverage or coverage == 1:
+        return None
+    return mask
+
+
+def build_mask(
+    template_path: str,
+    frame_paths: Sequence[str],
+    min_score: float = 0.85,
+    crop: Rect = None,
+    **kwargs,
+) -> Optional[np.ndarray]:
+    template = ImgLoader(template_path)
+    frames = [ImgLoader(path) for path in frame_paths]
+    patches = collect_patches(template, frames, min_score, crop)
+    return variance_mask(patches, **kwargs)
+
+
+def save_mask(template_path: str, mask: np.ndarray) -> str:
+    path = mask_path(template_path)
+    os.makedirs(os.path.dirname(settings.STATIC_PATH + path), exist_ok=True)
+    cv.imwrite(settings.STATIC_PATH + path, mask)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("templates", nargs="+", help="paths relative to static")
+    parser.add_argument("--frames", default="albion/tests/*.png")
+    parser.add_argument("--min-score", type=float, default=0.85)
+    parser.add_argument("--max-std", type=float, default=12.0)
+    args = parser.parse_args()
+
+    pattern = settings.STATIC_PATH + args.frames
+    frame_paths = [
+        os.path.relpath(path, settings.STATIC_PATH)
+        for path in sorted(glob.glob(pattern))
+    ]
+    for template_path in args.templates:
+        mask = build_mask(
+            template_path, frame_paths, args.min_score, max_std=args.max_std
+        )
+        if mask is None:
+            print(f"- {template_path}: not enough stable samples, no mask")
+            continue
+        coverage = np.count_nonzero(mask) / mask.size
+        print(f"- {template_path}: {save_mask(template_path, mask)} ({coverage:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Optimized inference graphs of detection models, cached next to the model
+
+Optimizing a graph for an input shape (ONNX Runtime graph optimizations,
+TorchScript tracing) takes seconds to minutes, so the result is written to
+`<model dir>/cache/<name>-<model hash>-<height>x<width>.<format>` once and
+reused by later starts. A changed model file gets a new hash, so stale
+graphs are never loaded.
+
+onnxruntime and torch are imported only when a graph is built.
+"""
+import hashlib
+import json
+import os
+from threading import Lock
+from typing import Callable, Optional, Sequence
+
+hash_chunk = 1 << 20
+
+_hashes: dict[tuple[str, float, int], str] = {}
+_hashes_lock = Lock()
+
+
+def model_hash(path: str) -> str:
+    """Short content hash of a model file, cached by modification time and size"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+    with _hashes_lock:
+        if key in _hashes:
+            return _hashes[key]
+    digest = hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as file:
+        while chunk := file.read(hash_chunk):
+            digest.update(chunk)
+    with _hashes_lock:
+        _hashes[key] = digest.hexdigest()
+    return _hashes[key]
+
+
+def optimize_onnx(source: str, target: str, shape: Sequence[int]) -> None:
+    """Save the ONNX Runtime optimized graph of source (all optimizations)"""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.optimized_model_filepath = target
+    ort.InferenceSession(source, options, providers=ort.get_available_providers())
+
+
+def script_torch(source: str, target: str, shape: Sequence[int]) -> None:
+    """Save a YOLOv5 .pt model traced for shape, loadable as custom weights"""
+    import torch
+
+    model = torch.hub.load("ultralytics/yolov5", "custom", source, autoshape=False)
+    module = model.model.float().eval()
+    example = torch.zeros(1, 3, *shape)
+    traced = torch.jit.trace(module, example, strict=False)
+    config = {
+        "shape": list(example.shape),
+        "stride": int(max(module.stride)),
+        "names": module.names,
+    }
+    torch.jit.save(traced, target, _extra_files={"config.txt": json.dumps(config)})
+
+
+class GraphCache:
+    """Optimized graphs keyed by model hash and input shape
+
+    Only model formats with a builder are optimized, others (TensorRT
+    .engine files are already built for their shape) are used as they are.
+
+    #### Attributes:
+        :builders: model extension -> (graph extension, build(source, target, shape))
+        :dirname: cache directory, next to the model file
+
+    #### Example:
+        - path = graph_cache.get("ai/albion/models/best.onnx", (640, 640))
+    """
+
+    dirname = "cache"
+    builders: dict[str, tuple[str, Callable[[str, str, Sequence[int]], None]]] = {
+        ".onnx": (".onnx", optimize_onnx),
+        ".pt": (".torchscript", script_torch),
+    }
+
+    def __init__(self, root: str = None) -> None:
+        self.root = root
+        self.builds = 0
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f"<GraphCache({self.root or self.dirname}, builds={self.builds})>"
+
+    def path(self, model_path: str, shape: Sequence[int]) -> Optional[str]:
+        """Cached graph path of a model for shape, None if it isn't optimized"""
+        name, extension = os.path.splitext(os.path.basename(model_path))
+        if extension not in self.builders:
+            return None
+        root = self.root or os.path.join(os.path.dirname(model_path), self.dirname)
+        size = "x".join(str(side) for side in shape)
+        suffix = self.builders[extension][0]
+        return os.path.join(root, f"{name}-{model_hash(model_path)}-{size}{suffix}")
+
+    def get(self, model_path: str, shape: Sequence[int]) -> str:
+        """Path of the optimized graph, built on the first call for shape"""
+        path = self.path(model_path, shape)
+        if path is None:
+            return model_path
+        with self._lock:
+            if not os.path.exists(path):
+                build = self.builders[os.path.splitext(model_path)[1]][1]
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # a half written graph must never be picked up
+                partial = path + ".partial"
+                build(model_path, partial, shape)
+                os.replace(partial, path)
+                self.builds += 1
+        return path
+
+
+graph_cache = GraphCache()
@@ -0,0 +1,222 @@
+"""
+Text recognition of screen regions
+
+Regions are hashed before recognition, unchanged text costs a hash lookup.
+Recognition runs on a persistent tesseract API (tesserocr) when installed,
+otherwise on a pool of pytesseract worker threads, each running its own
+tesseract process.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Optional, Sequence
+
+import cv2 as cv
+import numpy as np
+
+from core.common.entities import Img, Rect
+from core.common.enums import ColorFormat
+
+
+class OcrEngine:
+    """Recognizes text of preprocessed (binary, dark on light) images"""
+
+    def __init__(self, lang: str = "eng", psm: Optional[int] = None) -> None:
+        self.lang = lang
+        self.psm = psm
+
+    def recognize(self, data: np.ndarray) -> str:
+        raise NotImplementedError
+
+    def recognize_many(self, images: Sequence[np.ndarray]) -> list[str]:
+        return [self.recognize(data) for data in images]
+
+    def close(self) -> None:
+        """Release processes or native resources held by the engine"""
+
+
+class TesseractApiEngine(OcrEngine):
+    """One tesseract instance kept loaded for the whole process (tesserocr)"""
+
+    def __init__(self, lang: str = "eng", psm: Optional[int] = None) -> None:
+        import tesserocr
+
+        super().__init__(lang, psm)
+        kwargs = {} if psm is None else {"psm": psm}
+        self._api = tesserocr.PyTessBaseAPI(lang=lang, **kwargs)
+        self._lock = Lock()
+
+    def recognize(self, data: np.ndarray) -> str:
+        height, width = data.shape[:2]
+        channels = 1 if data.ndim == 2 else data.shape[2]
+        data = np.ascontiguousarray(data)
+        with self._lock:
+            self._api.SetImageBytes(
+                data.tobytes(), width, height, channels, data.strides[0]
+            )
+            return self._api.GetUTF8Text().strip()
+
+    def close(self) -> None:
+        self._api.End()
+
+
+class TesseractProcessEngine(OcrEngine):
+    """pytesseract calls, batches spread over a pool of worker threads"""
+
+    def __init__(
+        self, lang: str = "eng", psm: Optional[int] = None, workers: int = None
+    ) -> None:
+        import pytesseract
+
+        super().__init__(lang, psm)
+        self._pytesseract = pytesseract
+        self.config = "" if psm is None else f"--psm {psm}"
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def recognize(self, data: np.ndarray) -> str:
+        text = self._pytesseract.image_to_string(
+            data, lang=self.lang, config=self.config
+        )
+        return text.strip()
+
+    def recognize_many(self, images: Sequence[np.ndarray]) -> list[str]:
+        if len(images) <= 1:
+            return super().recognize_many(images)
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="ocr")
+        return list(self._pool.map(self.recognize, images))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def default_engine(lang: str = "eng", psm: Optional[int] = None) -> OcrEngine:
+    """Persistent API when tesserocr is installed, worker processes otherwise"""
+    try:
+        return TesseractApiEngine(lang, psm)
+    except ImportError:
+        return TesseractProcessEngine(lang, psm)
+
+
+class TextReader:
+    """OCR of image regions with preprocessing and a result cache
+
+    Regions are converted to grayscale, upscaled by `scale`, binarized (Otsu)
+    and turned into dark text on a light background with a margin, which is
+    what tesseract reads best. Results are cached by a hash of the region
+    pixels, so reading text that didn't change skips recognition. Batches
+    recognize every missing region in one engine call. The engine is created
+    on first recognition.
+
+    #### Attributes:
+        :scale: upscale factor before binarization
+        :margin: border in pixels added around the text
+        :cache_size: results kept, least recently used are dropped first
+
+    #### Example:
+        - reader = TextReader(psm=7)
+        - text = reader.read(img, Rect(Pixel(10, 10), Pixel(200, 40)))
+        - texts = reader.read_many(img, [name_crop, count_crop])
+    """
+
+    scale: float = 2.0
+    margin: int = 8
+    cache_size: int = 256
+
+    def __init__(
+        self,
+        engine: OcrEngine = None,
+        lang: str = "eng",
+        psm: Optional[int] = None,
+        cache_size: int = None,
+    ) -> None:
+        self.lang = lang
+        self.psm = psm
+        self.cache_size = cache_size or self.cache_size
+        self.hits = 0
+        self.misses = 0
+        self._engine = engine
+        self._lock = Lock()
+        self._cache: OrderedDict[bytes, str] = OrderedDict()
+
+    def __repr__(self):
+        return (
+            f"<TextReader(cached={len(self._cache)}, hits={self.hits}, "
+            f"misses={self.misses})>"
+        )
+
+    @property
+    def engine(self) -> OcrEngine:
+        if self._engine is None:
+            self._engine = default_engine(self.lang, self.psm)
+        return self._engine
+
+    def preprocess(self, data: np.ndarray) -> np.ndarray:
+        if data.ndim == 3:
+            data = cv.cvtColor(data, cv.COLOR_BGR2GRAY)
+        if self.scale != 1:
+            data = cv.resize(
+                data, None, fx=self.scale, fy=self.scale, interpolation=cv.INTER_CUBIC
+            )
+        _, binary = cv.threshold(data, 0, 255, cv.THRESH_BINARY + cv.THRESH_OTSU)
+        # the background is the majority, make it white
+        if cv.countNonZero(binary) * 2 < binary.size:
+            binary = cv.bitwise_not(binary)
+        return cv.copyMakeBorder(
+            binary, *(self.margin,) * 4, cv.BORDER_CONSTANT, value=255
+        )
+
+    @staticmethod
+    def region_key(data: np.ndarray) -> bytes:
+        digest = hashlib.blake2b(np.ascontiguousarray(data), digest_size=16)
+        digest.update(np.array(data.shape, dtype=np.int32).tobytes())
+        return digest.digest()
+
+    def read(self, img: Img, crop: Rect = None) -> str:
+        """Text of img, or of the crop region of it"""
+        return self.read_many(img, [crop])[0]
+
+    def read_many(self, img: Img, crops: Sequence[Optional[Rect]]) -> list[str]:
+        """Text of every crop region of img, recognizing only changed ones"""
+        regions = [img.derived(ColorFormat.BGR_GRAY, crop=crop) for crop in crops]
+        keys = [self.region_key(region) for region in regions]
+        with self._lock:
+            texts = [self._cache.get(key) for key in keys]
+            for key, text in zip(keys, texts):
+                if text is not None:
+                    self._cache.move_to_end(key)
+
+        missing: dict[bytes, np.ndarray] = {}
+        for key, region, text in zip(keys, regions, texts):
+            if text is None and key not in missing:
+                missing[key] = region
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            images = [self.preprocess(region) for region in missing.values()]
+            found = dict(zip(missing, self.engine.recognize_many(images)))
+            with self._lock:
+                for key, text in found.items():
+                    self._cache[key] = text
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            texts = [
+                found[key] if text is None else text for key, text in zip(keys, texts)
+            ]
+        return texts
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        if self._engine is not None:
+            self._engine.close()
+
+
+reader = TextReader()
@@ -0,0 +1,213 @@
+import copy
+import glob
+import os
+from threading import Lock
+from time import monotonic
+from typing import Optional
+
+import cv2 as cv
+import numpy as np
+
+from config import settings
+from core.common.entities import ImgBase
+from core.common.enums import ColorFormat
+
+from .masks import mask_path
+
+
+class Template(ImgBase):
+    """Immutable reference image with its matching variants precomputed
+
+    Grayscale, the grayscale pyramid, the alpha mask and normalization stats
+    are computed once at load time. Data is read-only and in place
+    transformations raise, so one template can be shared by every `Vision`
+    in the process. Templates differing only by confidence share arrays and
+    derived image cache (`with_confidence`).
+
+    #### Attributes:
+        :path: str - path relative to the registry root
+        :mask: Optional[np.ndarray] - pixels used for matching, None for all
+        :pyramid: list[np.ndarray] - grayscale levels, each half the previous
+        :mask_pyramid: list[np.ndarray] - mask resized to each pyramid level
+        :mean: float - grayscale mean
+        :std: float - grayscale standard deviation
+        :stamp: tuple - (mtime_ns, size) of the image and mask files
+    """
+
+    pyramid_min_size = 4
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        path: str = "",
+        confidence: float = 0.65,
+        mask: Optional[np.ndarray] = None,
+        stamp: tuple = (),
+    ) -> None:
+        data.flags.writeable = False
+        if mask is not None:
+            mask.flags.writeable = False
+        self._data = self._current = data
+        self.path = path
+        self.confidence = confidence
+        self.mask = mask
+        self.stamp = stamp
+        self._set_dimensions()
+        self._prepare()
+
+    def __repr__(self):
+        return (
+            f"<Template({self.path}, width={self.width}, height={self.height}, "
+            f"confidence={self.confidence})>"
+        )
+
+    def _prepare(self) -> None:
+        gray = self.derived(ColorFormat.BGR_GRAY)
+        self.pyramid = [gray]
+        scale = 0.5
+        while min(self.width, self.height) * scale >= self.pyramid_min_size:
+            self.pyramid.append(self.derived(ColorFormat.BGR_GRAY, scale=scale))
+            scale /= 2
+        self.mask_pyramid = []
+        if self.mask is not None:
+            self.mask_pyramid = [
+                cv.resize(self.mask, level.shape[::-1], interpolation=cv.INTER_NEAREST)
+                for level in self.pyramid
+            ]
+        mean, std = cv.meanStdDev(gray, mask=self.mask)
+        self.mean, self.std = float(mean[0, 0]), float(std[0, 0])
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._current
+
+    @data.setter
+    def data(self, value: np.ndarray) -> None:
+        raise AttributeError("Templates are immutable")
+
+    @property
+    def is_flat(self) -> bool:
+        """Constant templates have no normalized correlation with anything"""
+        return self.std == 0
+
+    def _apply(self, data: np.ndarray, op: tuple) -> None:
+        raise TypeError("Templates are immutable, use derived() instead")
+
+    def reset(self):
+        """Nothing to reset, templates never change"""
+
+    def with_confidence(self, confidence: float) -> "Template":
+        """Same template and caches with another confidence"""
+        template = copy.copy(self)
+        template.confidence = confidence
+        return template
+
+
+class TemplateRegistry:
+    """Process-wide store of reference images
+
+    Each file is loaded and prepared once and shared by every caller. Files
+    are checked for changes on disk at most every `reload_interval` seconds
+    and reloaded when their modification time or size changed. The mask is
+    read from `masks/<name>` next to the image when it exists (see
+    core.display.masks), otherwise from the PNG alpha channel.
+
+    #### Example:
+        - template = templates.get("albion/ui/cast_bar.png", 0.85)
+        - templates.preload("albion/ui/")
+    """
+
+    reload_interval: float = 1.0
+
+    def __init__(self, root: str = None, reload_interval: float = None) -> None:
+        self._root = root
+        if reload_interval is not None:
+            self.reload_interval = reload_interval
+        self.loads = 0
+        self._lock = Lock()
+        self._templates: dict[str, Template] = {}
+        self._variants: dict[tuple[str, float], Template] = {}
+        self._checked: dict[str, float] = {}
+
+    def __len__(self):
+        return len(self._templates)
+
+    @property
+    def root(self) -> str:
+        # settings are read on first use, not when the registry is created
+        return self._root or settings.STATIC_PATH
+
+    def __contains__(self, path: str):
+        return path in self._templates
+
+    def __repr__(self):
+        return f"<TemplateRegistry({self.root}, templates={len(self)})>"
+
+    def get(self, path: str, confidence: float = 0.65) -> Template:
+        """Shared template for path, reloaded if the file changed"""
+        template = self._templates.get(path)
+        # read without the lock, a concurrent clear() may drop the entry
+        checked = self._checked.get(path, float("-inf"))
+        if template is None or monotonic() - checked >= self.reload_interval:
+            with self._lock:
+                template = self._refresh(path)
+
+        variant = self._variants.get((path, confidence))
+        if variant is None or variant.stamp != template.stamp:
+            variant = template.with_confidence(confidence)
+            self._variants[(path, confidence)] = variant
+        return variant
+
+    def preload(self, directory: str, pattern: str = "*.png") -> list[Template]:
+        """Load every matching file of a directory relative to root"""
+        paths = sorted(glob.glob(os.path.join(self.root + directory, pattern)))
+        return [self.get(os.path.relpath(path, self.root)) for path in paths]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+            self._variants.clear()
+            self._checked.clear()
+
+    def _stamp(self, path: str) -> tuple[int, ...]:
+        try:
+            stat = os.stat(self.root + path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Can't load img from this path: {path}") from None
+        try:
+            mask_stat = os.stat(self.root + mask_path(path))
+            mask_stamp = (mask_stat.st_mtime_ns, mask_stat.st_size)
+        except FileNotFoundError:
+            mask_stamp = (0, 0)
+        return (stat.st_mtime_ns, stat.st_size, *mask_stamp)
+
+    def _refresh(self, path: str) -> Template:
+        stamp = self._stamp(path)
+        self._checked[path] = monotonic()
+        template = self._templates.get(path)
+        if template is None or template.stamp != stamp:
+            template = self._load(path, stamp)
+            self._templates[path] = template
+        return template
+
+    def _load(self, path: str, stamp: tuple) -> Template:
+        data = cv.imread(self.root + path, cv.IMREAD_UNCHANGED)
+        if data is None or not data.any():
+            raise FileNotFoundError(f"Can't load img from this path: {path}")
+        mask = None
+        if data.ndim == 2:
+            data = cv.cvtColor(data, cv.COLOR_GRAY2BGR)
+        elif data.shape[2] == 4:
+            alpha = data[:, :, 3]
+            if alpha.min() < 255:
+                mask = np.ascontiguousarray(alpha)
+            data = np.ascontiguousarray(data[:, :, :3])
+        if os.path.exists(self.root + mask_path(path)):
+            mask = cv.imread(self.root + mask_path(path), cv.IMREAD_GRAYSCALE)
+            if mask is None or mask.shape != data.shape[:2]:
+                raise ValueError(f"Mask doesn't fit template: {mask_path(path)}")
+        self.loads += 1
+        return Template(data, path, mask=mask, stamp=stamp)
+
+
+templates = TemplateRegistry()
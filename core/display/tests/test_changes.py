@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+import numpy as np
+
+from core.common.entities import Img, Pixel, Rect
+
+from ..changes import RegionChangeDetector
+
+
+class RegionChangeDetectorTests(TestCase):
+    def setUp(self) -> None:
+        self.detector = RegionChangeDetector()
+        self.crop = Rect(left_top=Pixel(0, 0), width=50, height=50)
+        self.frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_unchanged_region_reuses_result(self):
+        first = self.detector.cached("key", Img(self.frame), self.crop, self.compute)
+        second = self.detector.cached("key", Img(self.frame), self.crop, self.compute)
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.detector.hits, 1)
+        self.assertEqual(self.detector.misses, 1)
+
+    def test_changed_region_recomputes(self):
+        self.detector.cached("key", Img(self.frame), self.crop, self.compute)
+        frame = self.frame.copy()
+        frame[10:30, 10:30] = 255
+        self.detector.cached("key", Img(frame), self.crop, self.compute)
+        self.assertEqual(self.calls, 2)
+
+    def test_change_outside_region_ignored(self):
+        self.detector.cached("key", Img(self.frame), self.crop, self.compute)
+        frame = self.frame.copy()
+        frame[60:90, 60:90] = 255
+        self.detector.cached("key", Img(frame), self.crop, self.compute)
+        self.assertEqual(self.calls, 1)
+
+    def test_expired_result_recomputes(self):
+        self.detector.max_age = 0
+        self.detector.cached("key", Img(self.frame), self.crop, self.compute)
+        self.detector.cached("key", Img(self.frame), self.crop, self.compute)
+        self.assertEqual(self.calls, 2)
+
+    def test_invalidate(self):
+        self.detector.cached("key", Img(self.frame), self.crop, self.compute)
+        self.detector.invalidate("key")
+        self.detector.cached("key", Img(self.frame), self.crop, self.compute)
+        self.assertEqual(self.calls, 2)
@@ -0,0 +1,78 @@
+import os
+from unittest import TestCase
+
+import cv2 as cv
+import numpy as np
+
+from bots.albion.actions.utils import minimap_crop
+from core.common.entities import Img, ImgLoader, Pixel
+
+from ..maps import FeatureIndex, MapIndex
+
+
+class MapIndexTests(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        noise = rng.integers(0, 255, (60, 80), dtype=np.uint8)
+        self.map_data = cv.GaussianBlur(noise, (5, 5), 0)
+        self.index = MapIndex.build(Img(self.map_data))
+
+    def test_match_equals_match_template(self):
+        patch = self.map_data[20:36, 30:50]
+        expected = cv.matchTemplate(self.map_data, patch, cv.TM_CCOEFF_NORMED)
+        response = self.index.match(patch)
+        self.assertEqual(response.shape, expected.shape)
+        np.testing.assert_allclose(response, expected, atol=1e-3)
+
+    def test_locate(self):
+        patch = Img(self.map_data[20:36, 30:50].copy())
+        rect = self.index.locate(patch, confidence=0.9)
+        self.assertEqual(rect.left_top, Pixel(30, 20))
+        self.assertEqual((rect.width, rect.height), (20, 16))
+
+    def test_locate_not_found(self):
+        patch = Img(np.full((16, 20), 128, dtype=np.uint8))
+        self.assertIsNone(self.index.locate(patch, confidence=0.5))
+
+    def test_patch_too_large(self):
+        with self.assertRaises(ValueError):
+            self.index.match(np.zeros((100, 100), dtype=np.uint8))
+
+    def test_load_persists_index(self):
+        map_path = "albion/maps/mase_knoll.png"
+        index = MapIndex.load(map_path)
+        self.assertTrue(os.path.exists(MapIndex.index_path(map_path)))
+        loaded = MapIndex.load(map_path)
+        np.testing.assert_array_equal(index.spectrum, loaded.spectrum)
+        self.assertEqual((loaded.width, loaded.height), (1120, 840))
+
+
+class FeatureIndexTests(TestCase):
+    def setUp(self) -> None:
+        self.map_path = "albion/maps/mase_knoll.png"
+        self.index = FeatureIndex.load(self.map_path)
+        search_img = ImgLoader("albion/tests/7.png")
+        self.minimap = Img(search_img.derived(crop=minimap_crop(), scale=0.70))
+
+    def test_load_persists_index(self):
+        self.assertTrue(os.path.exists(FeatureIndex.index_path(self.map_path)))
+        loaded = FeatureIndex.load(self.map_path)
+        np.testing.assert_array_equal(self.index.descriptors, loaded.descriptors)
+
+    def test_locate(self):
+        location = self.index.locate(self.minimap)
+        self.assertAlmostEqual(location.center.x, 620, delta=3)
+        self.assertAlmostEqual(location.center.y, 694, delta=3)
+        self.assertGreaterEqual(location.inliers, self.index.min_inliers)
+
+    def test_locate_rotated(self):
+        rotation = cv.getRotationMatrix2D((45.5, 45.5), 30, 1)
+        rotated = cv.warpAffine(self.minimap.data, rotation, (91, 91))
+        location = self.index.locate(Img(rotated))
+        self.assertAlmostEqual(location.center.x, 620, delta=4)
+        self.assertAlmostEqual(location.center.y, 694, delta=4)
+        self.assertAlmostEqual(abs(location.angle), 30, delta=5)
+
+    def test_locate_flat_patch(self):
+        patch = Img(np.full((91, 91, 3), 128, dtype=np.uint8))
+        self.assertIsNone(self.index.locate(patch))
@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+import numpy as np
+
+from ..masks import mask_path, variance_mask
+
+
+class VarianceMaskTests(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        element = rng.integers(0, 255, (10, 20), dtype=np.uint8)
+        self.patches = []
+        for _ in range(5):
+            patch = element.copy()
+            patch[:, 14:] = rng.integers(0, 255, (10, 6))  # changing background
+            self.patches.append(patch)
+
+    def test_mask_path(self):
+        self.assertEqual(
+            mask_path("albion/ui/cast_bar.png"), "albion/ui/masks/cast_bar.png"
+        )
+
+    def test_background_masked(self):
+        mask = variance_mask(self.patches)
+        self.assertEqual(mask.shape, (10, 20))
+        self.assertTrue((mask[:, :13] == 255).all())
+        self.assertTrue((mask[:, 15:] == 0).all())
+
+    def test_too_few_samples(self):
+        self.assertIsNone(variance_mask(self.patches[:2]))
+
+    def test_nothing_stable(self):
+        rng = np.random.default_rng(1)
+        patches = [rng.integers(0, 255, (10, 20), dtype=np.uint8) for _ in range(5)]
+        self.assertIsNone(variance_mask(patches))
+
+    def test_everything_stable(self):
+        self.assertIsNone(variance_mask([self.patches[0]] * 5))
@@ -0,0 +1,78 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from ..models import GraphCache, model_hash
+from ..vision import YoloVision
+
+
+def copy_builder(source: str, target: str, shape) -> None:
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        dst.write(src.read() + bytes(str(list(shape)), "utf-8"))
+
+
+class TestGraphCache(TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmp.name, "best.onnx")
+        with open(self.model_path, "wb") as file:
+            file.write(b"model")
+        self.cache = GraphCache()
+        self.cache.builders = {".onnx": (".onnx", copy_builder)}
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_model_hash(self):
+        digest = model_hash(self.model_path)
+        self.assertEqual(len(digest), 16)
+        self.assertEqual(model_hash(self.model_path), digest)
+        with open(self.model_path, "ab") as file:
+            file.write(b"v2")
+        self.assertNotEqual(model_hash(self.model_path), digest)
+
+    def test_path(self):
+        path = self.cache.path(self.model_path, (640, 640))
+        expected = f"best-{model_hash(self.model_path)}-640x640.onnx"
+        self.assertEqual(path, os.path.join(self.tmp.name, "cache", expected))
+        self.assertNotEqual(self.cache.path(self.model_path, (320, 320)), path)
+        self.assertIsNone(self.cache.path("models/best.engine", (640, 640)))
+
+    def test_get(self):
+        path = self.cache.get(self.model_path, (640, 640))
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(self.cache.get(self.model_path, (640, 640)), path)
+        self.assertEqual(self.cache.builds, 1)
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), b"model[640, 640]")
+        self.assertFalse(
+            [
+                name
+                for name in os.listdir(os.path.dirname(path))
+                if name.endswith(".partial")
+            ]
+        )
+        # other formats are used as they are
+        self.assertEqual(
+            self.cache.get("models/best.engine", (640, 640)), "models/best.engine"
+        )
+
+
+class CountingYolo(YoloVision):
+    def load_model(self):
+        # the "model" keeps every frame it is called with
+        frames = []
+        self.warm_up(frames.append)
+        return frames
+
+
+class TestYoloWarmUp(TestCase):
+    def test_warm_up(self):
+        yolo = CountingYolo("best.engine", ["Logs"])
+        self.assertIs(yolo.ready.result(1), yolo.model)
+        self.assertEqual(len(yolo.model), yolo.warmup_runs)
+        self.assertEqual(yolo.model[0].shape, (640, 640, 3))
+        self.assertEqual(yolo.model[0].dtype, np.uint8)
+        self.assertEqual(len(yolo.warmup_times), yolo.warmup_runs)
@@ -0,0 +1,98 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import cv2 as cv
+import numpy as np
+
+from core.common.entities import Img, Pixel, Rect
+
+from ..ocr import OcrEngine, TesseractProcessEngine, TextReader, default_engine
+from ..vision import Vision
+
+
+class CountingEngine(OcrEngine):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def recognize(self, data: np.ndarray) -> str:
+        return f"text-{data.shape[1]}x{data.shape[0]}"
+
+    def recognize_many(self, images):
+        self.calls.append(len(images))
+        return super().recognize_many(images)
+
+
+def text_image(text: str, size=(40, 200), light_text=True) -> np.ndarray:
+    background, color = (30, 230) if light_text else (230, 30)
+    data = np.full((*size, 3), background, dtype=np.uint8)
+    cv.putText(data, text, (5, 28), cv.FONT_HERSHEY_SIMPLEX, 0.8, (color,) * 3, 2)
+    return data
+
+
+class TextReaderTests(TestCase):
+    def setUp(self) -> None:
+        self.engine = CountingEngine()
+        self.reader = TextReader(self.engine)
+        data = np.zeros((100, 400, 3), dtype=np.uint8)
+        data[10:50, 0:200] = text_image("Pine Logs")
+        data[60:100, 0:200] = text_image("x12")
+        self.img = Img(data)
+        self.name_crop = Rect(Pixel(0, 10), Pixel(200, 50))
+        self.count_crop = Rect(Pixel(0, 60), Pixel(200, 100))
+
+    def test_preprocess(self):
+        for light_text in (True, False):
+            data = self.reader.preprocess(text_image("Logs", light_text=light_text))
+            margin = self.reader.margin
+            self.assertEqual(data.shape, (80 + margin * 2, 400 + margin * 2))
+            self.assertEqual(set(np.unique(data)), {0, 255})
+            # dark text on a white background
+            self.assertGreater(np.count_nonzero(data), data.size / 2)
+            self.assertTrue((data[:margin] == 255).all())
+
+    def test_read_cached(self):
+        self.assertEqual(self.reader.read(self.img, self.name_crop), "text-416x96")
+        self.reader.read(self.img, self.name_crop)
+        self.reader.read(Img(self.img.data.copy()), self.name_crop)
+        self.assertEqual(self.engine.calls, [1])
+        self.assertEqual((self.reader.hits, self.reader.misses), (2, 1))
+
+    def test_read_changed(self):
+        self.reader.read(self.img, self.name_crop)
+        data = self.img.data.copy()
+        data[10:50, 0:200] = text_image("Pine Logs 2")
+        self.reader.read(Img(data), self.name_crop)
+        self.assertEqual(self.engine.calls, [1, 1])
+
+    def test_read_many(self):
+        texts = self.reader.read_many(
+            self.img, [self.name_crop, self.count_crop, self.name_crop]
+        )
+        self.assertEqual(len(texts), 3)
+        self.assertEqual(texts[0], texts[2])
+        # duplicate regions are recognized once, in a single batch
+        self.assertEqual(self.engine.calls, [2])
+        self.reader.read_many(self.img, [self.count_crop, self.name_crop])
+        self.assertEqual(self.engine.calls, [2])
+
+    def test_cache_size(self):
+        reader = TextReader(self.engine, cache_size=1)
+        reader.read(self.img, self.name_crop)
+        reader.read(self.img, self.count_crop)
+        reader.read(self.img, self.name_crop)
+        self.assertEqual(self.engine.calls, [1, 1, 1])
+
+    def test_img_unchanged(self):
+        vision = Vision()
+        vision.text_reader = self.reader
+        data = self.img.data.copy()
+        self.assertEqual(vision.find_text(self.img, self.name_crop), "text-416x96")
+        np.testing.assert_array_equal(self.img.data, data)
+        texts = vision.find_texts(self.img, [self.name_crop, self.count_crop])
+        self.assertEqual(len(texts), 2)
+        np.testing.assert_array_equal(self.img.data, data)
+
+    def test_default_engine(self):
+        with patch.dict("sys.modules", {"tesserocr": None}):
+            self.assertIsInstance(default_engine(), TesseractProcessEngine)
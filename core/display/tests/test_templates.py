@@ -0,0 +1,133 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import cv2 as cv
+import numpy as np
+
+from core.common.entities import ImgLoader, Pixel
+from core.common.enums import ColorFormat
+
+from ..templates import Template, TemplateRegistry
+
+
+class TemplateTests(TestCase):
+    def setUp(self) -> None:
+        data = np.random.default_rng(0).integers(0, 255, (40, 60, 3), dtype=np.uint8)
+        self.template = Template(data, "test.png", confidence=0.8)
+
+    def test_precomputed(self):
+        gray = self.template.derived(ColorFormat.BGR_GRAY)
+        self.assertIs(self.template.pyramid[0], gray)
+        self.assertEqual(
+            [level.shape for level in self.template.pyramid][:2], [(40, 60), (20, 30)]
+        )
+        self.assertIs(
+            self.template.derived(ColorFormat.BGR_GRAY, scale=0.5),
+            self.template.pyramid[1],
+        )
+        self.assertAlmostEqual(self.template.mean, float(gray.mean()), places=3)
+        self.assertFalse(self.template.is_flat)
+
+    def test_immutable(self):
+        with self.assertRaises(ValueError):
+            self.template.data[0, 0] = 0
+        with self.assertRaises(AttributeError):
+            self.template.data = np.zeros((2, 2))
+        with self.assertRaises(TypeError):
+            self.template.resize(Pixel(10, 10))
+        self.template.reset()
+        self.assertEqual(self.template.width, 60)
+
+    def test_with_confidence(self):
+        template = self.template.with_confidence(0.5)
+        self.assertEqual(template.confidence, 0.5)
+        self.assertEqual(self.template.confidence, 0.8)
+        self.assertIs(template.data, self.template.data)
+        self.assertIs(template.cache, self.template.cache)
+
+
+class TemplateRegistryTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name + "/"
+        self.registry = TemplateRegistry(self.root, reload_interval=0)
+        self.write("ui/a.png", np.full((10, 12, 3), 100, dtype=np.uint8))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def write(self, path: str, data: np.ndarray) -> None:
+        os.makedirs(os.path.dirname(self.root + path), exist_ok=True)
+        cv.imwrite(self.root + path, data)
+
+    def test_shared(self):
+        first = self.registry.get("ui/a.png", 0.8)
+        second = self.registry.get("ui/a.png", 0.8)
+        other = self.registry.get("ui/a.png", 0.5)
+        self.assertIs(first, second)
+        self.assertIs(other.data, first.data)
+        self.assertEqual(other.confidence, 0.5)
+        self.assertEqual(self.registry.loads, 1)
+        self.assertIn("ui/a.png", self.registry)
+
+    def test_hot_reload(self):
+        first = self.registry.get("ui/a.png")
+        self.write("ui/a.png", np.full((20, 12, 3), 100, dtype=np.uint8))
+        os.utime(self.root + "ui/a.png", ns=(0, first.stamp[0] + 10**9))
+        second = self.registry.get("ui/a.png")
+        self.assertIsNot(first, second)
+        self.assertEqual(second.height, 20)
+        self.assertEqual(self.registry.loads, 2)
+
+    def test_reload_interval(self):
+        registry = TemplateRegistry(self.root, reload_interval=60)
+        first = registry.get("ui/a.png")
+        self.write("ui/a.png", np.full((20, 12, 3), 100, dtype=np.uint8))
+        self.assertIs(registry.get("ui/a.png"), first)
+
+    def test_checked_dropped(self):
+        registry = TemplateRegistry(self.root, reload_interval=60)
+        first = registry.get("ui/a.png")
+        # what a clear() between the two reads of get() leaves behind
+        registry._checked.clear()
+        self.assertIs(registry.get("ui/a.png"), first)
+
+    def test_alpha_mask(self):
+        data = np.full((10, 10, 4), 255, dtype=np.uint8)
+        data[:5, :, 3] = 0
+        self.write("ui/alpha.png", data)
+        template = self.registry.get("ui/alpha.png")
+        self.assertEqual(template.channels, 3)
+        self.assertEqual(int(template.mask.sum()), 5 * 10 * 255)
+        self.assertIsNone(self.registry.get("ui/a.png").mask)
+
+    def test_mask_file(self):
+        first = self.registry.get("ui/a.png")
+        self.assertIsNone(first.mask)
+        mask = np.full((10, 12), 255, dtype=np.uint8)
+        mask[:, 6:] = 0
+        self.write("ui/masks/a.png", mask)
+        template = self.registry.get("ui/a.png")
+        self.assertIsNot(template, first)
+        np.testing.assert_array_equal(template.mask, mask)
+        self.assertEqual(template.mask_pyramid[1].shape, template.pyramid[1].shape)
+
+    def test_mask_file_size_mismatch(self):
+        self.write("ui/masks/a.png", np.zeros((3, 3), dtype=np.uint8))
+        with self.assertRaises(ValueError):
+            self.registry.get("ui/a.png")
+
+    def test_matches_img_loader(self):
+        template = TemplateRegistry().get("albion/ui/skill_teleport.png")
+        img = ImgLoader("albion/ui/skill_teleport.png")
+        np.testing.assert_array_equal(template.data, img.data)
+
+    def test_preload(self):
+        self.write("ui/b.png", np.full((10, 12, 3), 50, dtype=np.uint8))
+        loaded = self.registry.preload("ui/")
+        self.assertEqual([t.path for t in loaded], ["ui/a.png", "ui/b.png"])
+
+    def test_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            self.registry.get("ui/missing.png")
@@ -1,9 +1,10 @@
 from unittest import TestCase
 
 import cv2 as cv
+import numpy as np
 
 from config import settings
-from core.common.entities import ImgLoader, Pixel, Rect, SearchResult
+from core.common.entities import Color, Img, ImgLoader, Pixel, Rect, SearchResult
 
 from ..vision import Vision
 
@@ -51,6 +52,122 @@ class VisionTests(TestCase):
                 self.assertEqual(loc.width, 219)
                 self.assertEqual(loc.height, 319)
 
+    def test_find_scores(self):
+        result = self.vision.find(self.ref_img, self.search_img)
+        self.assertEqual(len(result.scores), 1)
+        self.assertGreaterEqual(result.scores[0], self.ref_img.confidence)
+
+    def test_find_max_results(self):
+        result = self.vision.find(self.ref_img, self.search_img, max_results=1)
+        first_hit = self.vision.find(self.ref_img, self.search_img)
+        # best match instead of the first one above confidence
+        self.assertEqual(len(result), 1)
+        self.assertGreaterEqual(result.scores[0], first_hit.scores[0])
+        self.assertGreater(result.rects.iou(first_hit[0])[0], 0.9)
+
+    def test_exists(self):
+        found, score = self.vision.exists(self.ref_img, self.search_img)
+        self.assertTrue(found)
+        self.assertGreaterEqual(score, self.ref_img.confidence)
+
+        found, score = self.vision.exists(self.ref_img1, self.search_img)
+        self.assertFalse(found)
+        self.assertLess(score, self.ref_img1.confidence)
+
+    def test_exists_with_crop(self):
+        crop = Rect(left_top=Pixel(100, 100), right_bottom=Pixel(600, 600))
+        self.assertTrue(self.vision.exists(self.ref_img, self.search_img, crop)[0])
+        crop = Rect(left_top=Pixel(500, 100), right_bottom=Pixel(961, 789))
+        self.assertFalse(self.vision.exists(self.ref_img, self.search_img, crop)[0])
+
+    def test_exists_small_template(self):
+        ref_img = Img(self.search_img.data[180:188, 230:240].copy())
+        ref_img.confidence = 0.9
+        found, score = self.vision.exists(ref_img, self.search_img)
+        self.assertTrue(found)
+        self.assertAlmostEqual(score, 1, places=3)
+
+    def test_masked_template(self):
+        rng = np.random.default_rng(0)
+        search_data = rng.integers(0, 255, (200, 300), dtype=np.uint8)
+        ref_data = search_data[50:90, 100:180].copy()
+        ref_data[:, 40:] = 255 - ref_data[:, 40:]  # background differs
+        ref_img = Img(ref_data)
+        ref_img.confidence = 0.9
+        search_img = Img(search_data)
+        self.assertFalse(self.vision.exists(ref_img, search_img)[0])
+
+        ref_img.mask = np.zeros(ref_data.shape, dtype=np.uint8)
+        ref_img.mask[:, :40] = 255
+        found, score = self.vision.exists(ref_img, search_img)
+        self.assertTrue(found)
+        self.assertAlmostEqual(score, 1, places=3)
+        result = self.vision.find(ref_img, search_img)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0].left_top, Pixel(100, 50))
+
+    def test_masked_flat_windows(self):
+        search_img = Img(np.zeros((50, 50), dtype=np.uint8))
+        ref_img = Img(np.arange(100, dtype=np.uint8).reshape(10, 10))
+        ref_img.confidence = 0.5
+        ref_img.mask = np.full((10, 10), 255, dtype=np.uint8)
+        found, score = self.vision.exists(ref_img, search_img)
+        self.assertFalse(found)
+        self.assertTrue(np.isfinite(score))
+
+    def test_any(self):
+        self.assertTrue(self.vision.any(self.ref_img, self.search_img))
+        self.assertFalse(self.vision.any(self.ref_img1, self.search_img))
+
+    def test_hsv_ranges(self):
+        ranges = self.vision.hsv_ranges(Color(197, 197, 0), (5, 50, 50))
+        self.assertEqual(len(ranges), 1)
+        lower, upper = ranges[0]
+        self.assertEqual(tuple(lower), (25, 205, 147))
+        self.assertEqual(tuple(upper), (35, 255, 247))
+        # red wraps around hue 0
+        ranges = self.vision.hsv_ranges(Color(214, 20, 0), (8, 60, 60))
+        self.assertEqual([(low[0], up[0]) for low, up in ranges], [(0, 11), (175, 179)])
+        ranges = self.vision.hsv_ranges(((170, 100, 100), (10, 255, 255)), None)
+        self.assertEqual([(low[0], up[0]) for low, up in ranges], [(0, 10), (170, 179)])
+
+    def test_find_color(self):
+        data = np.zeros((100, 200, 3), dtype=np.uint8)
+        data[10:14, 20:42] = (0, 197, 197)
+        data[10:14, 43:60] = (0, 197, 197)
+        data[50:80, 100:130] = (0, 0, 214)  # red
+        data[90:92, 5:7] = (0, 197, 197)  # too small
+        search_img = Img(data)
+        yellow = Color(197, 197, 0)
+
+        result = self.vision.find_color(search_img, yellow)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0], Rect(Pixel(20, 10), Pixel(42, 14)))
+        self.assertEqual(result[1], Rect(Pixel(43, 10), Pixel(60, 14)))
+        np.testing.assert_allclose(result.scores, 1)
+
+        crop = Rect(Pixel(40, 0), Pixel(200, 100))
+        result = self.vision.find_color(search_img, yellow, crop)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0], Rect(Pixel(43, 10), Pixel(60, 14)))
+
+        result = self.vision.find_color(search_img, Color(214, 0, 0))
+        self.assertEqual(result[0], Rect(Pixel(100, 50), Pixel(130, 80)))
+        self.assertFalse(self.vision.find_color(search_img, Color(0, 0, 255)))
+
+    def test_bar_fill(self):
+        data = np.zeros((20, 120, 3), dtype=np.uint8)
+        data[5:9, 10:55] = (0, 197, 197)
+        data[5:9, 32] = 0  # segment separator
+        search_img = Img(data)
+        yellow = Color(197, 197, 0)
+        bar = Rect(Pixel(10, 5), Pixel(110, 9))
+        self.assertAlmostEqual(self.vision.bar_fill(search_img, yellow, bar), 0.45)
+        self.assertEqual(
+            self.vision.bar_fill(search_img, yellow, Rect(Pixel(60, 5), Pixel(110, 9))),
+            0,
+        )
+
     def test_find_with_no_result(self):
         result = self.vision.find(
             self.ref_img1,
@@ -22,6 +22,7 @@ def draw_rectangles(img: Img, rectangles: list[Rect], with_label=False):
                 bgr,
                 thickness,
             )
+    img.modified()
     return img
 
 
@@ -32,6 +33,7 @@ def draw_crosshairs(img: Img, rectangles: list[Rect]):
     for rect in rectangles:
         center = tuple(rect.center)
         cv.drawMarker(img.data, center, bgr, marker_type)
+    img.modified()
     return img
 
 
@@ -51,6 +53,7 @@ def draw_circles(
             pos = tuple(pos)
 
         cv.circle(img.data, pos, radius, bgr, thickness=thickness, lineType=line_type)
+    img.modified()
     return img
 
 
@@ -63,4 +66,5 @@ def draw_lines(img: Img, rectangles: list[Rect]):
         end = list(rect.right_bottom)
         # Draw the line
         cv.line(img.data, start, end, bgr, thickness=thickness)
+    img.modified()
     return img
@@ -1,130 +1,366 @@
-from time import time
-from typing import List
+from time import perf_counter, time
+from typing import List, Optional
 
 import cv2 as cv
 import numpy as np
-import pytesseract
-import torch
 
 from config import settings
-from core.common.entities import Img, ImgLoader, Pixel, Rect, SearchResult
+from core.common.entities import Color, Img, ImgLoader, Pixel, Rect, SearchResult
 from core.common.enums import ColorFormat
+from core.common.warmup import warm_up
 from core.display.utils import draw_rectangles
-from core.display.window import WindowHandler
 
+from .models import GraphCache, graph_cache
+from .ocr import TextReader, reader
 from .utils import draw_circles, draw_rectangles
 
 
 class Vision:
     method = cv.TM_CCOEFF_NORMED
+    pyramid_min_size = 12
+    pyramid_margin = 0.45
+    pyramid_candidates = 3
+    pyramid_pad = 3
+    color_tolerance = (8, 60, 60)
+    color_min_area = 10
+    text_reader: TextReader = reader
 
     def match_template(
         self, ref_img: Img, search_img: Img, confidence: float = 0.65
     ) -> List[tuple[int, int]]:
         """cv2 match template based on confidence value"""
+        return self._match_template(ref_img.data, search_img.data, confidence)
 
-        result = cv.matchTemplate(search_img.data, ref_img.data, self.method)
+    def _match_template(
+        self, ref_data: np.ndarray, search_data: np.ndarray, confidence: float
+    ) -> List[tuple[int, int]]:
+        result = cv.matchTemplate(search_data, ref_data, self.method)
         locations = np.where(result >= confidence)
         locations = list(zip(*locations[::-1]))  # removes empty arrays
         return locations
 
-    def find(self, ref_img: Img, search_img: Img, crop: Rect = None) -> SearchResult:
+    def response(
+        self, search_data: np.ndarray, ref_data: np.ndarray, mask: np.ndarray = None
+    ) -> np.ndarray:
+        """matchTemplate response, ignoring ref pixels where mask is 0"""
+        if mask is None:
+            return cv.matchTemplate(search_data, ref_data, self.method)
+        response = cv.matchTemplate(search_data, ref_data, self.method, mask=mask)
+        # flat search windows give inf/nan with a mask
+        return np.nan_to_num(response, copy=False, nan=0, posinf=0, neginf=0)
+
+    @staticmethod
+    def ref_mask(ref_img: Img, level: int = 0) -> Optional[np.ndarray]:
+        """Mask of ref_img at a pyramid level (each level halves the size)"""
+        if ref_img.mask is None or level == 0:
+            return ref_img.mask
+        pyramid = getattr(ref_img, "mask_pyramid", [])
+        if level < len(pyramid):
+            return pyramid[level]
+        size = ref_img.derived(ColorFormat.BGR_GRAY, scale=0.5**level).shape[::-1]
+        return cv.resize(ref_img.mask, size, interpolation=cv.INTER_NEAREST)
+
+    def find(
+        self,
+        ref_img: Img,
+        search_img: Img,
+        crop: Rect = None,
+        max_results: int = None,
+    ) -> SearchResult:
+        """Find ref_img in search_img, using cached grayscale versions of both
+
+        Pixels outside ref_img.mask (if any) don't count. With max_results only
+        the best scoring non-overlapping matches are kept, max_results=1 takes
+        the single best match without scanning for peaks.
+        """
         ref_width, ref_height = ref_img.width, ref_img.height
-        ref_img.cvt_color(ColorFormat.BGR_GRAY)
-        search_img.cvt_color(ColorFormat.BGR_GRAY)
-
-        if crop:
-            search_img.crop(crop)
-
-        locations = self.match_template(ref_img, search_img, ref_img.confidence)
-        mask = np.zeros(search_img.data.shape[:2], dtype=np.uint8)
-        # reset images for next search
-        ref_img.reset()
-        search_img.reset()
-
-        result = SearchResult(ref_img, search_img)
-
-        for loc_x, loc_y in locations:
+        ref_data = ref_img.derived(ColorFormat.BGR_GRAY)
+        search_data = search_img.derived(ColorFormat.BGR_GRAY, crop=crop)
+
+        response = self.response(search_data, ref_data, ref_img.mask)
+        if max_results == 1:
+            _, max_val, _, (loc_x, loc_y) = cv.minMaxLoc(response)
+            found = max_val >= ref_img.confidence
+            xs, ys = (np.array([loc_x]), np.array([loc_y])) if found else ([], [])
+        else:
+            ys, xs = np.where(response >= ref_img.confidence)
+            if max_results:
+                order = np.argsort(-response[ys, xs], kind="stable")
+                xs, ys = xs[order], ys[order]
+
+        mask = np.zeros(search_data.shape[:2], dtype=np.uint8)
+        boxes, scores = [], []
+        for loc_x, loc_y in zip(xs, ys):
             center_x = loc_x + ref_width // 2
             center_y = loc_y + ref_height // 2
 
             if mask[center_y, center_x] != 255:
                 # Mask out detected object
                 mask[loc_y : loc_y + ref_height, loc_x : loc_x + ref_width] = 255
+                boxes.append((loc_x, loc_y, loc_x + ref_width, loc_y + ref_height))
+                scores.append(response[loc_y, loc_x])
+                if max_results and len(boxes) >= max_results:
+                    break
 
-                if crop:
-                    loc_x += crop.left_top.x
-                    loc_y += crop.left_top.y
-
-                loc = Rect(
-                    left_top=Pixel(loc_x, loc_y), width=ref_width, height=ref_height
-                )
-                result.add(loc)
-
-        return result
+        boxes = np.array(boxes, dtype=np.int64).reshape(-1, 4)
+        if crop:
+            boxes += (crop.left_top.x, crop.left_top.y) * 2
+        return SearchResult.from_arrays(
+            boxes, scores, ref_img=ref_img, search_img=search_img
+        )
 
-    def find_color(self):
+    def exists(
+        self, ref_img: Img, search_img: Img, crop: Rect = None
+    ) -> tuple[bool, float]:
+        """Whether ref_img is in search_img, and the best score seen
+
+        Templates of at least pyramid_min_size pixels are matched at half
+        resolution first. Without a coarse score within pyramid_margin of the
+        confidence the full resolution pass is skipped (the coarse score is
+        returned), otherwise the best coarse peaks are verified at full
+        resolution around their positions. Smaller templates use a single
+        full resolution minMaxLoc.
         """
-        TODO
+        confidence = ref_img.confidence
+        ref_data = ref_img.derived(ColorFormat.BGR_GRAY)
+        search_data = search_img.derived(ColorFormat.BGR_GRAY, crop=crop)
+        mask = ref_img.mask
+        if min(ref_img.width, ref_img.height) < self.pyramid_min_size:
+            response = self.response(search_data, ref_data, mask)
+            _, max_val, _, _ = cv.minMaxLoc(response)
+            return max_val >= confidence, max_val
+
+        ref_coarse = ref_img.derived(ColorFormat.BGR_GRAY, scale=0.5)
+        search_coarse = search_img.derived(ColorFormat.BGR_GRAY, crop=crop, scale=0.5)
+        response = self.response(search_coarse, ref_coarse, self.ref_mask(ref_img, 1))
+        coarse_h, coarse_w = ref_coarse.shape[:2]
+        coarse_best, verified = None, []
+        for _ in range(self.pyramid_candidates):
+            _, coarse_val, _, (loc_x, loc_y) = cv.minMaxLoc(response)
+            if coarse_best is None:
+                coarse_best = coarse_val
+            if coarse_val < confidence - self.pyramid_margin:
+                break
+            max_val = self._match_near(
+                ref_data, search_data, loc_x * 2, loc_y * 2, mask
+            )
+            if max_val >= confidence:
+                return True, max_val
+            verified.append(max_val)
+            # suppress the peak, the next one must be a different location
+            response[
+                max(loc_y - coarse_h // 2, 0) : loc_y + coarse_h // 2 + 1,
+                max(loc_x - coarse_w // 2, 0) : loc_x + coarse_w // 2 + 1,
+            ] = -1
+        return False, max(verified) if verified else coarse_best
+
+    def _match_near(
+        self,
+        ref_data: np.ndarray,
+        search_data: np.ndarray,
+        loc_x: int,
+        loc_y: int,
+        mask: np.ndarray = None,
+    ) -> float:
+        """Best full resolution score in a small window around loc"""
+        ref_h, ref_w = ref_data.shape[:2]
+        pad = self.pyramid_pad
+        top, left = max(loc_y - pad, 0), max(loc_x - pad, 0)
+        window = search_data[top : loc_y + ref_h + pad, left : loc_x + ref_w + pad]
+        if window.shape[0] < ref_h or window.shape[1] < ref_w:
+            return -1.0
+        return float(self.response(window, ref_data, mask).max())
+
+    def any(self, ref_img: Img, search_img: Img, crop: Rect = None) -> bool:
+        """Whether ref_img is in search_img"""
+        return self.exists(ref_img, search_img, crop)[0]
+
+    @staticmethod
+    def hsv_ranges(
+        color: Color | tuple[tuple, tuple], tolerance: tuple[int, int, int]
+    ) -> list[tuple[tuple, tuple]]:
+        """inRange bounds of a Color +- tolerance or an explicit HSV range
+
+        Hue is circular (0-179 in OpenCV), ranges crossing 0 are split in two.
+        """
+        if isinstance(color, Color):
+            pixel = np.array([[color.to_bgr()[:3]]], dtype=np.uint8)
+            hsv = cv.cvtColor(pixel, cv.COLOR_BGR2HSV)[0, 0].astype(int)
+            lower, upper = hsv - tolerance, hsv + tolerance
+        else:
+            lower, upper = (np.array(bound, dtype=int) for bound in color)
+        lower[1:], upper[1:] = np.clip(lower[1:], 0, 255), np.clip(upper[1:], 0, 255)
+        low_hue, high_hue = lower[0] % 180, upper[0] % 180
+        if upper[0] - lower[0] >= 179:
+            low_hue, high_hue = 0, 179
+        low_sv, high_sv = lower[1:].tolist(), upper[1:].tolist()
+        if low_hue <= high_hue:
+            return [((int(low_hue), *low_sv), (int(high_hue), *high_sv))]
+        return [
+            ((0, *low_sv), (int(high_hue), *high_sv)),
+            ((int(low_hue), *low_sv), (179, *high_sv)),
+        ]
+
+    def color_mask(
+        self,
+        search_img: Img,
+        color: Color | tuple[tuple, tuple],
+        crop: Rect = None,
+        tolerance: tuple[int, int, int] = None,
+    ) -> np.ndarray:
+        """Pixels of search_img (cached HSV version) matching color"""
+        hsv_data = search_img.derived(ColorFormat.BGR_HSV, crop=crop)
+        ranges = self.hsv_ranges(color, tolerance or self.color_tolerance)
+        mask = cv.inRange(hsv_data, *map(np.array, ranges[0]))
+        for lower, upper in ranges[1:]:
+            mask |= cv.inRange(hsv_data, np.array(lower), np.array(upper))
+        return mask
+
+    def find_color(
+        self,
+        search_img: Img,
+        color: Color | tuple[tuple, tuple],
+        crop: Rect = None,
+        min_area: int = None,
+        tolerance: tuple[int, int, int] = None,
+    ) -> SearchResult:
+        """Connected areas of color in search_img
+
+        color is a Color matched within tolerance (hue, saturation, value) or
+        an explicit ((h, s, v), (h, s, v)) range. Areas smaller than min_area
+        pixels are dropped. Scores are fill ratios: matching pixels over the
+        bounding box area, close to 1 for solid bars.
+        """
+        mask = self.color_mask(search_img, color, crop, tolerance)
+        matched = cv.countNonZero(mask)
+        if not matched:
+            return SearchResult(search_img=search_img)
+        # label only the bounding box of matches, with 16 bit labels if they fit
+        box_x, box_y, box_w, box_h = cv.boundingRect(mask)
+        _, _, stats, _ = cv.connectedComponentsWithStats(
+            mask[box_y : box_y + box_h, box_x : box_x + box_w],
+            connectivity=8,
+            ltype=cv.CV_16U if matched < 2**16 else cv.CV_32S,
+        )
+        stats = stats[1:]  # background
+        stats = stats[stats[:, cv.CC_STAT_AREA] >= (min_area or self.color_min_area)]
+        left = stats[:, cv.CC_STAT_LEFT] + box_x
+        top = stats[:, cv.CC_STAT_TOP] + box_y
+        width, height = stats[:, cv.CC_STAT_WIDTH], stats[:, cv.CC_STAT_HEIGHT]
+        boxes = np.column_stack((left, top, left + width, top + height))
+        boxes = boxes.astype(np.int64).reshape(-1, 4)
+        if crop:
+            boxes += (crop.left_top.x, crop.left_top.y) * 2
+        scores = stats[:, cv.CC_STAT_AREA] / (width * height)
+        return SearchResult.from_arrays(boxes, scores, search_img=search_img)
+
+    def bar_fill(
+        self,
+        search_img: Img,
+        color: Color | tuple[tuple, tuple],
+        bar: Rect,
+        tolerance: tuple[int, int, int] = None,
+    ) -> float:
+        """Filled fraction (0-1) of a left to right bar, e.g. HP percentage
+
+        The bar is filled up to its last column where at least half of the
+        pixels match color, so separators between segments don't count.
         """
+        mask = self.color_mask(search_img, color, bar, tolerance)
+        if not mask.size:
+            return 0.0
+        filled = np.flatnonzero(np.count_nonzero(mask, axis=0) * 2 >= mask.shape[0])
+        return float(filled[-1] + 1) / mask.shape[1] if len(filled) else 0.0
+
+    def find_text(self, search_img: Img, crop: Rect = None) -> str:
+        """Text in the crop region of search_img (search_img is left as is)"""
+        return self.text_reader.read(search_img, crop)
 
-    def find_text(self, search_img: Img, crop: Rect) -> str:
-        search_img.crop(crop)
-        return pytesseract.image_to_string(search_img.data)
+    def find_texts(self, search_img: Img, crops: List[Rect]) -> List[str]:
+        """Text of several regions of one frame, recognized in one batch"""
+        return self.text_reader.read_many(search_img, crops)
 
 
 class YoloVision:
+    """YOLOv5 detections of a model file
+
+    torch is imported and the model loaded in the background (see
+    core.common.warmup), `ready` is the future of the loaded model.
+    Accessing `model` blocks until it's loaded, bot loops poll
+    `ready.done()` instead and keep going meanwhile.
+
+    Models are loaded from their optimized graph (see core.display.models)
+    and warmed up with blank frames, so the first real frame doesn't pay
+    for kernel selection and graph setup.
+
+    #### Attributes:
+        :input_size: size frames are resized to for the model
+        :warmup_runs: blank frames run through the model after loading
+        :warmup_times: seconds each warm-up run took
+    """
+
     resolution = Rect(left_top=Pixel(0, 0), width=1920, height=1080)
+    input_size = Pixel(640, 640)
+    warmup_runs = 3
+    graph_cache: GraphCache = graph_cache
 
-    def __init__(self, model_path: str, classes: list[str]):
+    def __init__(self, model_path: str, classes: list[str], background=True):
         self.model_path = model_path
         self.classes = classes or self.classes
-        self.model = self.load_model()
+        self.warmup_times: list[float] = []
+        self.ready = warm_up(self.load_model)
+        if not background:
+            self.ready.result()
+
+    @property
+    def model(self):
+        return self.ready.result()
 
     def load_model(self):
-        model = torch.hub.load("ultralytics/yolov5", "custom", self.model_path)
+        import torch
+
+        shape = (self.input_size.y, self.input_size.x)
+        model_path = self.graph_cache.get(self.model_path, shape)
+        model = torch.hub.load("ultralytics/yolov5", "custom", model_path)
         model.cuda()
         model.multi_label = False
+        self.warm_up(model)
         return model
 
-    def find(self, search_img: Img, confidence: float = 0.65) -> List[Rect]:
-        search_img.cvt_color(ColorFormat.BGR_RGB)
-        search_img.resize(Pixel(640, 640))
-
-        results = self.model(search_img.data)
-        labels, cord = (
-            results.xyxyn[0][:, -1].cpu().numpy(),
-            results.xyxyn[0][:, :-1].cpu().numpy(),
+    def warm_up(self, model) -> None:
+        frame = np.zeros((self.input_size.y, self.input_size.x, 3), dtype=np.uint8)
+        for _ in range(self.warmup_runs):
+            start = perf_counter()
+            model(frame)
+            self.warmup_times.append(perf_counter() - start)
+
+    def find(self, search_img: Img, confidence: float = 0.65) -> SearchResult:
+        data = search_img.derived(ColorFormat.BGR_RGB, size=self.input_size)
+
+        results = self.model(data)
+        detections = results.xyxyn[0].cpu().numpy()
+        detections = detections[detections[:, 4] >= confidence]
+
+        scale = (self.resolution.width, self.resolution.height) * 2
+        boxes = (detections[:, :4] * scale).astype(np.int64)
+        labels = [self.classes[int(label)] for label in detections[:, -1]]
+        return SearchResult.from_arrays(
+            boxes, detections[:, 4], labels, search_img=search_img
         )
 
-        filtered_result = []
-        n = len(labels)
-        for i in range(n):
-            row = cord[i]
-            if row[4] >= confidence:
-                label = self.classes[int(labels[i])]
-                x1, y1, x2, y2 = (
-                    int(row[0] * self.resolution.width),
-                    int(row[1] * self.resolution.height),
-                    int(row[2] * self.resolution.width),
-                    int(row[3] * self.resolution.height),
-                )
-                filtered_result.append(
-                    Rect(
-                        left_top=Pixel(x1, y1), right_bottom=Pixel(x2, y2), label=label
-                    ),
-                )
-        search_img.reset()
-        return filtered_result
-
     def start(self):
+        from core.display.window import WindowHandler
+
         window = WindowHandler()
         loop_time = time()
         while True:
             search_img = window.grab()
-            result = self.find(search_img, confidence=0.6)
-
-            print("FPS {}".format(1.0 / (time() - loop_time)))
+            # frames are shown while the model is still loading and warming up
+            if self.ready.done():
+                result = self.find(search_img, confidence=0.6)
+                print("FPS {}".format(1.0 / (time() - loop_time)))
+            else:
+                result = SearchResult(search_img=search_img)
             loop_time = time()
 
             draw_rectangles(search_img, result, with_label=True)
@@ -146,6 +382,8 @@ class LiveVision:
         self.crop = crop
 
     def start(self) -> None:
+        from core.display.window import WindowHandler
+
         vision = Vision()
         window = WindowHandler()
         loop_time = time()
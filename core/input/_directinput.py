@@ -561,7 +561,7 @@ def update_MOUSEEVENT_mappings() -> None:
     )
 
 
-update_MOUSEEVENT_mappings()  # call the function on import to set mappings.
+# mappings are set on first use, see _get_mouse_struct_data
 # ------------------------------------------------------------------------------
 
 
@@ -1939,6 +1939,9 @@ def _get_mouse_struct_data(
         buttons_swapped = _get_system_metrics(_SM_SWAPBUTTON) != 0
         button = MOUSE_LEFT if buttons_swapped else MOUSE_RIGHT
 
+    if not _MOUSE_MAPPING_EVENTF:
+        update_MOUSEEVENT_mappings()
+
     event_value: int | None
     event_value = _MOUSE_MAPPING_EVENTF.get(button, (None, None, None))[method]
     mouseData: int = _MOUSE_MAPPING_DATA.get(button, 0)
@@ -2,18 +2,40 @@ import random
 from time import sleep
 
 import numpy as np
-import win32api
 
 from core.common.entities import Pixel
 
+from .backends import InputBackend, default_backend
+from .executor import NORMAL, ActionExecutor, ActionHandle
 from .keys import Keys
+from .mouse import wind_mouse_path
+from .scheduler import InputScheduler, PlaybackHandle, Timeline
 
 
 class Actions:
-    """Base actions for bots"""
+    """Base actions for bots, sending input through an InputBackend
 
-    def __init__(self) -> None:
-        self.keys = Keys()
+    Moves, clicks and presses are built into timelines and submitted to the
+    backend's InputScheduler, they return a PlaybackHandle right away
+    instead of blocking the caller for hold times and delays. Actions that
+    should be prioritized or superseded go through `queue` instead.
+
+    #### Attributes:
+        :hold_time: (min, max) seconds keys and buttons are held down
+        :move_interval: seconds between cursor moves of paths played with delay
+        :move_burst: relative moves of camera paths sent per call
+    """
+
+    hold_time: tuple[float, float] = (0.1, 0.25)
+    move_interval: float = 0.001
+    move_burst: int = 4
+
+    def __init__(self, backend: InputBackend = None, seed: int = None) -> None:
+        self.backend = default_backend() if backend is None else backend
+        self.rng = random.Random(seed)
+        self.keys = Keys(backend=self.backend)
+        self.scheduler = InputScheduler.for_backend(self.backend)
+        self.executor = ActionExecutor.for_scheduler(self.scheduler)
 
     def wind_mouse(
         self,
@@ -28,49 +50,32 @@ class Actions:
         delay=False,
     ):
         """
-        WindMouse algorithm. Calls the set_cursor with each new step.
+        WindMouse algorithm. The path is computed up front (see
+        core.input.mouse), then played, waiting until the cursor arrived.
         G_0 - magnitude of the gravitational force
         W_0 - magnitude of the wind force fluctuations
         M_0 - maximum step size (velocity clip threshold)
         D_0 - distance where wind behavior changes from random to damped
         """
-        sqrt3 = np.sqrt(3)
-        sqrt5 = np.sqrt(5)
-        current_x, current_y = start_x, start_y
-        v_x = v_y = W_x = W_y = 0
-        while (dist := np.hypot(dest_x - start_x, dest_y - start_y)) >= 1:
-            W_mag = min(W_0, dist)
-            if dist >= D_0:
-                W_x = W_x / sqrt3 + (2 * np.random.random() - 1) * W_mag / sqrt5
-                W_y = W_y / sqrt3 + (2 * np.random.random() - 1) * W_mag / sqrt5
-            else:
-                W_x /= sqrt3
-                W_y /= sqrt3
-                if M_0 < 3:
-                    M_0 = np.random.random() * 3 + 3
-                else:
-                    M_0 /= sqrt5
-            v_x += W_x + G_0 * (dest_x - start_x) / dist
-            v_y += W_y + G_0 * (dest_y - start_y) / dist
-            v_mag = np.hypot(v_x, v_y)
-            if v_mag > M_0:
-                v_clip = M_0 / 2 + np.random.random() * M_0 / 2
-                v_x = (v_x / v_mag) * v_clip
-                v_y = (v_y / v_mag) * v_clip
-            start_x += v_x
-            start_y += v_y
-            move_x = int(np.round(start_x))
-            move_y = int(np.round(start_y))
-
-            if current_x != move_x or current_y != move_y:
-                # This should wait for the mouse polling interval
-                self.set_cursor(current_x := move_x, current_y := move_y)
-                if delay:
-                    sleep(0.00001)
-        return current_x, current_y
+        path = wind_mouse_path(
+            (start_x, start_y), (dest_x, dest_y), G_0, W_0, M_0, D_0, seed=self.rng
+        )
+        self.play_path(path, delay).wait()
+        return (int(path[-1, 0]), int(path[-1, 1])) if len(path) else (start_x, start_y)
+
+    def path_timeline(self, x: int, y: int, delay=False, **kwargs) -> Timeline:
+        """WindMouse path to (x, y) from where the cursor will be"""
+        start = self.scheduler.planned_cursor or self.backend.cursor_position()
+        path = wind_mouse_path(start, (x, y), seed=self.rng, **kwargs)
+        return Timeline().path(path, self.move_interval if delay else 0)
+
+    def play_path(self, path: np.ndarray, delay=False) -> PlaybackHandle:
+        """Set the cursor to every point of a precomputed path"""
+        interval = self.move_interval if delay else 0
+        return self.scheduler.submit(Timeline().path(path, interval))
 
     def set_cursor(self, x, y):
-        win32api.SetCursorPos((x, y))
+        self.backend.set_cursor(x, y)
 
     def reset_cursor(self, x, y) -> None:
         """
@@ -80,48 +85,81 @@ class Actions:
         """
         if x >= 1900 or x <= 20:
             boundary_x = 1920 if x > 1900 else 0
-            win32api.SetCursorPos((boundary_x, y))
+            self.backend.set_cursor(boundary_x, y)
             sleep(0.1)
             return True
         return False
 
-    def move_camera(self, x: int, y: int, step=13, delay=True) -> None:
+    def move_camera(
+        self, x: int, y: int, step=13, delay=True, relative=False
+    ) -> PlaybackHandle:
         """Move from current position_x + x; current position_y + y
-        Increase step to accelerate"""
-        pos_x, pos_y = win32api.GetCursorPos()
-        x += pos_x
-        y += pos_y
-        self.wind_mouse(pos_x, pos_y, x, y, M_0=step, D_0=step, delay=delay)
-
-    def move_to(self, x: int, y: int, delay=0.2) -> None:
-        pos_x, pos_y = win32api.GetCursorPos()
-        self.wind_mouse(pos_x, pos_y, x, y)
-        if delay:
-            sleep(delay)
-
-    def click(self, button="left", clicks=1) -> None:
+        Increase step to accelerate. With relative, the path is sent as
+        bursts of relative mouse moves (move_burst per call), for games
+        reading raw mouse input; pointer acceleration scales those moves"""
+        if relative:
+            path = wind_mouse_path(
+                (0, 0), (x, y), max_step=step, damped_distance=step, seed=self.rng
+            )
+            interval = self.move_interval if delay else 0
+            timeline = Timeline().relative_path(path, (0, 0), interval, self.move_burst)
+            return self.scheduler.submit(timeline)
+        pos_x, pos_y = self.scheduler.planned_cursor or self.backend.cursor_position()
+        timeline = self.path_timeline(
+            pos_x + x, pos_y + y, delay, max_step=step, damped_distance=step
+        )
+        return self.scheduler.submit(timeline)
+
+    def move_to(self, x: int, y: int, delay=0.2) -> PlaybackHandle:
+        return self.scheduler.submit(self.path_timeline(x, y).wait(delay or 0))
+
+    def click_timeline(self, button="left", clicks=1) -> Timeline:
         buttons = {
-            "left": {
-                "press": self.keys.mouse_lb_press,
-                "release": self.keys.mouse_lb_release,
-            },
-            "right": {
-                "press": self.keys.mouse_rb_press,
-                "release": self.keys.mouse_rb_release,
-            },
+            "left": (self.keys.mouse_lb_press, self.keys.mouse_lb_release),
+            "right": (self.keys.mouse_rb_press, self.keys.mouse_rb_release),
         }
+        press, release = buttons[button]
+        timeline = Timeline()
         for _ in range(clicks):
-            self.keys.directMouse(buttons=buttons[button]["press"])
-            sleep(random.uniform(0.1, 0.25))
-            self.keys.directMouse(buttons=buttons[button]["release"])
-
-    def press(self, key: str, delay: float = 0) -> None:
-        self.keys.directKey(key)
-        sleep(random.uniform(0.1, 0.25))
-        self.keys.directKey(key, self.keys.key_release)
-        if delay:
-            sleep(delay)
-
-    def move_click(self, position: Pixel):
-        self.move_to(position.x, position.y)
-        self.click()
+            timeline.mouse(0, 0, press)
+            timeline.mouse(0, 0, release, after=self.rng.uniform(*self.hold_time))
+        return timeline
+
+    def click(self, button="left", clicks=1) -> PlaybackHandle:
+        return self.scheduler.submit(self.click_timeline(button, clicks))
+
+    def press_timeline(self, key: str, delay: float = 0) -> Timeline:
+        timeline = Timeline()
+        for event in self.keys.keyEvents(key):
+            timeline.add(event)
+        timeline.wait(self.rng.uniform(*self.hold_time))
+        for event in self.keys.keyEvents(key, release=True):
+            timeline.add(event)
+        return timeline.wait(delay)
+
+    def press(self, key: str, delay: float = 0) -> PlaybackHandle:
+        return self.scheduler.submit(self.press_timeline(key, delay))
+
+    def macro(self, string: str, delay: float = 0) -> PlaybackHandle:
+        """Play a key string, compiled on its first use (see compile_macro)"""
+        macro = self.keys.compileKeyString(string)
+        return self.scheduler.submit(macro.timeline().wait(delay))
+
+    def move_click_timeline(self, position: Pixel, delay=0.2) -> Timeline:
+        timeline = self.path_timeline(position.x, position.y).wait(delay)
+        return timeline.then(self.click_timeline())
+
+    def move_click(self, position: Pixel, delay=0.2) -> PlaybackHandle:
+        return self.scheduler.submit(self.move_click_timeline(position, delay))
+
+    def queue(
+        self, build, priority: int = NORMAL, key: str = None, interrupt=False
+    ) -> ActionHandle:
+        """Run build() -> Timeline on the executor (see ActionExecutor.submit)"""
+        return self.executor.submit(build, priority, key, interrupt)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait until every queued and submitted action was played"""
+        if not self.executor.wait_idle(timeout):
+            return False
+        return self.scheduler.wait_idle(timeout)
@@ -0,0 +1,263 @@
+import ctypes
+import sys
+from dataclasses import dataclass, replace
+from threading import Lock
+from time import perf_counter
+from typing import Optional, Sequence
+
+from .constants import HEX_MOUSE_KEYS
+
+KEY = "key"
+MOUSE = "mouse"
+CURSOR = "cursor"
+
+
+@dataclass(frozen=True, slots=True)
+class InputEvent:
+    """One input sent to the system
+
+    #### Attributes:
+        :kind: KEY, MOUSE (buttons / relative move) or CURSOR (absolute)
+        :code: scancode or virtual key code of KEY events, 0 otherwise
+        :flags: key flags (press/release, direct/virtual) or mouse buttons
+        :x: relative move of MOUSE events, position of CURSOR events
+        :y: see x
+        :time: perf_counter() when the event was sent
+    """
+
+    kind: str
+    code: int = 0
+    flags: int = 0
+    x: int = 0
+    y: int = 0
+    time: float = 0.0
+
+
+class InputBackend:
+    """Sends keyboard and mouse input
+
+    Every input of `Keys` and `Actions` goes through a backend, so the same
+    bot code can drive the real system (Win32Backend) or be recorded and
+    measured without a display (RecordingBackend).
+    """
+
+    def send_key(self, code: int, flags: int) -> None:
+        raise NotImplementedError
+
+    def send_mouse(self, dx: int, dy: int, buttons: int) -> None:
+        raise NotImplementedError
+
+    def set_cursor(self, x: int, y: int) -> None:
+        raise NotImplementedError
+
+    def cursor_position(self) -> tuple[int, int]:
+        raise NotImplementedError
+
+    def send(self, events: Sequence[InputEvent]) -> None:
+        """Send events meant for the same instant, one call where possible"""
+        for event in events:
+            if event.kind == KEY:
+                self.send_key(event.code, event.flags)
+            elif event.kind == MOUSE:
+                self.send_mouse(event.x, event.y, event.flags)
+            else:
+                self.set_cursor(event.x, event.y)
+
+
+class Win32Backend(InputBackend):
+    """SendInput and cursor calls of the Win32 API, imported on first use"""
+
+    def __init__(self) -> None:
+        self._win32api = None
+
+    @property
+    def win32api(self):
+        if self._win32api is None:
+            import win32api
+
+            self._win32api = win32api
+        return self._win32api
+
+    def send_key(self, code: int, flags: int) -> None:
+        self.send_input(keyboard_input(code, flags))
+
+    def send_mouse(self, dx: int, dy: int, buttons: int) -> None:
+        self.send_input(mouse_input(buttons, dx, dy))
+
+    def set_cursor(self, x: int, y: int) -> None:
+        self.win32api.SetCursorPos((x, y))
+
+    def cursor_position(self) -> tuple[int, int]:
+        return tuple(self.win32api.GetCursorPos())
+
+    def send(self, events: Sequence[InputEvent]) -> None:
+        """Keyboard and mouse events in one SendInput array
+
+        Absolute cursor moves can't be part of it, they split the array.
+        """
+        inputs = []
+        for event in events:
+            if event.kind == KEY:
+                inputs.append(keyboard_input(event.code, event.flags))
+            elif event.kind == MOUSE:
+                inputs.append(mouse_input(event.flags, event.x, event.y))
+            else:
+                if inputs:
+                    self.send_input(*inputs)
+                    inputs = []
+                self.set_cursor(event.x, event.y)
+        if inputs:
+            self.send_input(*inputs)
+
+    def send_input(self, *inputs: "INPUT") -> int:
+        """SendInput call with every input in one array, returns inputs sent"""
+        array = (INPUT * len(inputs))(*inputs)
+        size = ctypes.c_int(ctypes.sizeof(INPUT))
+        return ctypes.windll.user32.SendInput(len(inputs), array, size)
+
+
+class RecordingBackend(InputBackend):
+    """Keeps every input in memory with its timestamp instead of sending it
+
+    The cursor position is tracked from absolute and relative moves.
+
+    #### Example:
+        - backend = RecordingBackend()
+        - Actions(backend).move_click(Pixel(100, 100))
+        - backend.events[-1].time - backend.events[0].time
+    """
+
+    def __init__(self, cursor: tuple[int, int] = (0, 0)) -> None:
+        self.cursor = tuple(cursor)
+        self.events: list[InputEvent] = []
+        self.calls = 0
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self.events)
+
+    def __repr__(self):
+        return f"<RecordingBackend(events={len(self)}, cursor={self.cursor})>"
+
+    def record(self, *events: InputEvent) -> None:
+        """Events of one system call (calls counts them)"""
+        with self._lock:
+            self.events.extend(events)
+            self.calls += 1
+
+    def _stamp(self, event: InputEvent, now: float) -> InputEvent:
+        if event.kind == CURSOR:
+            self.cursor = (event.x, event.y)
+        elif event.kind == MOUSE and event.flags & HEX_MOUSE_KEYS["mouse_move"]:
+            self.cursor = (self.cursor[0] + event.x, self.cursor[1] + event.y)
+        return replace(event, time=now)
+
+    def send_key(self, code: int, flags: int) -> None:
+        self.send([InputEvent(KEY, code, flags)])
+
+    def send_mouse(self, dx: int, dy: int, buttons: int) -> None:
+        self.send([InputEvent(MOUSE, 0, buttons, dx, dy)])
+
+    def set_cursor(self, x: int, y: int) -> None:
+        self.send([InputEvent(CURSOR, x=x, y=y)])
+
+    def send(self, events: Sequence[InputEvent]) -> None:
+        """Like Win32Backend.send: one call per run of non-cursor events"""
+        now = perf_counter()
+        batch = []
+        for event in events:
+            if event.kind == CURSOR:
+                if batch:
+                    self.record(*batch)
+                    batch = []
+                self.record(self._stamp(event, now))
+            else:
+                batch.append(self._stamp(event, now))
+        if batch:
+            self.record(*batch)
+
+    def cursor_position(self) -> tuple[int, int]:
+        return self.cursor
+
+    def of_kind(self, kind: str) -> list[InputEvent]:
+        return [event for event in self.events if event.kind == kind]
+
+    def path(self) -> list[tuple[int, int]]:
+        """Absolute cursor positions in the order they were set"""
+        return [(event.x, event.y) for event in self.of_kind(CURSOR)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.events.clear()
+            self.calls = 0
+
+
+_default: Optional[InputBackend] = None
+
+
+def default_backend() -> InputBackend:
+    """Shared backend: Win32 on Windows, recording everywhere else"""
+    global _default
+    if _default is None:
+        _default = Win32Backend() if sys.platform == "win32" else RecordingBackend()
+    return _default
+
+
+def set_default_backend(backend: Optional[InputBackend]) -> None:
+    global _default
+    _default = backend
+
+
+def mouse_input(flags: int, x: int = 0, y: int = 0, data: int = 0) -> "INPUT":
+    return INPUT(0, _INPUTunion(mi=MOUSEINPUT(x, y, data, flags, 0, None)))
+
+
+def keyboard_input(code: int, flags: int = 0) -> "INPUT":
+    return INPUT(1, _INPUTunion(ki=KEYBDINPUT(code, code, flags, 0, None)))
+
+
+def hardware_input(message: int, parameter: int = 0) -> "INPUT":
+    hardware = HARDWAREINPUT(
+        message & 0xFFFFFFFF, parameter & 0xFFFF, parameter >> 16 & 0xFFFF
+    )
+    return INPUT(2, _INPUTunion(hi=hardware))
+
+
+# types
+LONG = ctypes.c_long
+DWORD = ctypes.c_ulong
+ULONG_PTR = ctypes.POINTER(DWORD)
+WORD = ctypes.c_ushort
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = (
+        ("dx", LONG),
+        ("dy", LONG),
+        ("mouseData", DWORD),
+        ("dwFlags", DWORD),
+        ("time", DWORD),
+        ("dwExtraInfo", ULONG_PTR),
+    )
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = (
+        ("wVk", WORD),
+        ("wScan", WORD),
+        ("dwFlags", DWORD),
+        ("time", DWORD),
+        ("dwExtraInfo", ULONG_PTR),
+    )
+
+
+class HARDWAREINPUT(ctypes.Structure):
+    _fields_ = (("uMsg", DWORD), ("wParamL", WORD), ("wParamH", WORD))
+
+
+class _INPUTunion(ctypes.Union):
+    _fields_ = (("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT))
+
+
+class INPUT(ctypes.Structure):
+    _fields_ = (("type", DWORD), ("union", _INPUTunion))
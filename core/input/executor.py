@@ -0,0 +1,192 @@
+import heapq
+from itertools import count
+from threading import Condition, Event, Lock, Thread
+from time import perf_counter
+from typing import Callable, Optional
+
+from .scheduler import InputScheduler, PlaybackHandle, Timeline
+
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+
+class ActionHandle:
+    """Progress of an action queued on an ActionExecutor
+
+    #### Attributes:
+        :priority: lower values are started first
+        :key: actions with the same key supersede each other (e.g. "move")
+        :playback: PlaybackHandle of the timeline, once the action started
+        :cancelled: cancelled or superseded before it finished
+        :exception: what build() or submitting its timeline raised, if anything
+    """
+
+    def __init__(
+        self, build: Callable[[], Timeline], priority: int, key: Optional[str]
+    ) -> None:
+        self.build = build
+        self.priority = priority
+        self.key = key
+        self.playback: Optional[PlaybackHandle] = None
+        self.cancelled = False
+        self.exception: Optional[Exception] = None
+        self._lock = Lock()
+        self._done = Event()
+
+    def __repr__(self):
+        state = "done" if self.done() else "running" if self.started else "pending"
+        return f"<ActionHandle({state}, key={self.key}, priority={self.priority})>"
+
+    @property
+    def started(self) -> bool:
+        return self.playback is not None
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def cancel(self) -> None:
+        """Drop the action if pending, otherwise stop its playback"""
+        with self._lock:
+            self.cancelled = True
+            if self.playback is None:
+                self._done.set()
+            else:
+                self.playback.cancel()
+
+    def _start(self, scheduler: InputScheduler) -> Optional[PlaybackHandle]:
+        with self._lock:
+            if self.cancelled:
+                return None
+            self.playback = scheduler.submit(self.build())
+            return self.playback
+
+
+class ActionExecutor:
+    """Runs queued actions one after another on a worker thread, by priority
+
+    Queuing returns an ActionHandle right away, so a bot keeps perceiving
+    while the cursor moves. Timelines are built when their action starts,
+    from where the previous action left the cursor. A newly queued action
+    supersedes pending ones with the same key, and with interrupt=True
+    also the running one.
+
+    #### Example:
+        - executor = ActionExecutor.for_scheduler(actions.scheduler)
+        - handle = executor.submit(lambda: actions.path_timeline(x, y), key="move")
+        - handle.wait()
+    """
+
+    _shared_lock = Lock()
+
+    def __init__(self, scheduler: InputScheduler) -> None:
+        self.scheduler = scheduler
+        self.running: Optional[ActionHandle] = None
+        self._heap: list[tuple[int, int, ActionHandle]] = []
+        self._order = count()
+        self._condition = Condition()
+        self._worker: Optional[Thread] = None
+        self._stopping = False
+
+    def __repr__(self):
+        return f"<ActionExecutor(pending={len(self.pending)}, running={self.running})>"
+
+    @classmethod
+    def for_scheduler(cls, scheduler: InputScheduler) -> "ActionExecutor":
+        """Executor shared by everything playing on scheduler"""
+        with cls._shared_lock:
+            executor = getattr(scheduler, "_executor", None)
+            if executor is None:
+                executor = scheduler._executor = cls(scheduler)
+            return executor
+
+    @property
+    def pending(self) -> list[ActionHandle]:
+        """Queued actions not started yet, in the order they will start"""
+        with self._condition:
+            entries = sorted(self._heap, key=lambda entry: entry[:2])
+        return [handle for *_, handle in entries if not handle.cancelled]
+
+    @property
+    def busy(self) -> bool:
+        return self.running is not None or bool(self.pending)
+
+    def submit(
+        self,
+        build: Callable[[], Timeline],
+        priority: int = NORMAL,
+        key: str = None,
+        interrupt: bool = False,
+    ) -> ActionHandle:
+        handle = ActionHandle(build, priority, key)
+        with self._condition:
+            if key is not None:
+                self._cancel(key, running=interrupt)
+            heapq.heappush(self._heap, (priority, next(self._order), handle))
+            if self._worker is None or not self._worker.is_alive():
+                self._stopping = False
+                self._worker = Thread(target=self._run, daemon=True)
+                self._worker.start()
+            self._condition.notify()
+        return handle
+
+    def cancel(self, key: str = None, running: bool = True) -> None:
+        """Cancel pending actions with key (all without), and the running one"""
+        with self._condition:
+            self._cancel(key, running)
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else perf_counter() + timeout
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self.running is None and not self._heap,
+                None if deadline is None else max(deadline - perf_counter(), 0),
+            )
+
+    def stop(self) -> None:
+        """End the worker once queued actions are done"""
+        with self._condition:
+            worker, self._worker = self._worker, None
+            self._stopping = True
+            self._condition.notify_all()
+        if worker is not None:
+            worker.join()
+
+    def _cancel(self, key: Optional[str], running: bool) -> None:
+        for *_, handle in self._heap:
+            if key is None or handle.key == key:
+                handle.cancel()
+        current = self.running
+        if running and current is not None and (key is None or current.key == key):
+            current.cancel()
+
+    def _next(self) -> Optional[ActionHandle]:
+        with self._condition:
+            while True:
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                if self._heap:
+                    self.running = heapq.heappop(self._heap)[2]
+                    return self.running
+                self._condition.notify_all()
+                if self._stopping:
+                    return None
+                self._condition.wait()
+
+    def _run(self) -> None:
+        while (handle := self._next()) is not None:
+            try:
+                if (playback := handle._start(self.scheduler)) is not None:
+                    playback.wait()
+            except Exception as e:
+                # a failing action must not stop the ones queued after it
+                handle.exception = e
+                print(f"- {self.__class__.__name__}: {handle} failed: {e!r}")
+            finally:
+                handle._done.set()
+                with self._condition:
+                    self.running = None
+                    self._condition.notify_all()
@@ -1,18 +1,22 @@
-import ctypes
-from queue import Queue
-from threading import Thread
-from time import sleep
+from collections import deque
+from queue import Empty, Queue
+from threading import Condition, Event, Lock, Thread
+from time import perf_counter, sleep
 
+from .backends import InputBackend, default_backend
 from .constants import HEX_DIRECT_KEYS, HEX_KEY_TYPES, HEX_MOUSE_KEYS, HEX_VIRTUAL_KEYS
+from .keytable import key_events, key_table
+from .macros import compile_macro, key_code
+from .scheduler import InputScheduler
 
 
 class Keys:
     common = None
     standalone = False
 
-    # instance of worker class
+    # worker of the backend, shared with other instances
     keys_worker = None
-    keys_process = None
+    last_batch = None
 
     # key constants
     direct_keys = HEX_KEY_TYPES["direct_keys"]
@@ -36,310 +40,229 @@ class Keys:
     vk = HEX_VIRTUAL_KEYS
 
     # setup object
-    def __init__(self, common=None):
-        self.keys_worker = KeysWorker(self)
-        # Thread(target=self.keys_worker.processQueue).start()
+    def __init__(self, common=None, backend: InputBackend = None):
+        self.backend = default_backend() if backend is None else backend
+        self.keys_worker = KeysWorker.for_backend(self.backend)
         self.common = common
         if common is None:
             self.standalone = True
 
-    # parses keys string and adds keys to the queue
-    def parseKeyString(self, string):
+    # compiles the key string (once, see compile_macro) and queues its timeline
+    # for the input scheduler, blocks while the queue is full (queue.Full is
+    # raised after timeout)
+    def parseKeyString(self, string, timeout=None):
         # print keys
         if not self.standalone:
             self.common.info(f"Processing keys: {string}")
 
-        key_queue = []
-        errors = []
-
-        # defaults to direct keys
-        key_type = self.direct_keys
-
-        # split by comma
-        keys = string.upper().split(",")
-
-        # translate
-        for key in keys:
-            # up, down or stroke?
-            up = True
-            down = True
-            direction = key.split("_")
-            subkey = direction[0]
-            if len(direction) >= 2:
-                if direction[1] == "UP":
-                    down = False
-                else:
-                    up = False
-
-            # switch to virtual keys
-            if subkey == "VK":
-                key_type = self.virtual_keys
-
-            # switch to direct keys
-            elif subkey == "DK":
-                key_type = self.direct_keys
-
-            # key code
-            elif subkey.startswith("0x"):
-                subkey = int(subkey, 16)
-                if subkey > 0 and subkey < 256:
-                    key_queue.append(
-                        {
-                            "key": int(subkey),
-                            "okey": subkey,
-                            "time": 0,
-                            "up": up,
-                            "down": down,
-                            "type": key_type,
-                        }
-                    )
-                else:
-                    errors.append(key)
-
-            # pause
-            elif subkey.startswith("-"):
-                time = float(subkey.replace("-", "")) / 1000
-                if time > 0 and time <= 10:
-                    key_queue.append(
-                        {
-                            "key": None,
-                            "okey": "",
-                            "time": time,
-                            "up": False,
-                            "down": False,
-                            "type": None,
-                        }
-                    )
-                else:
-                    errors.append(key)
-
-            # direct key
-            elif key_type == self.direct_keys and subkey in self.dk:
-                key_queue.append(
-                    {
-                        "key": self.dk[subkey],
-                        "okey": subkey,
-                        "time": 0,
-                        "up": up,
-                        "down": down,
-                        "type": key_type,
-                    }
-                )
-
-            # virtual key
-            elif key_type == self.virtual_keys and subkey in self.vk:
-                key_queue.append(
-                    {
-                        "key": self.vk[subkey],
-                        "okey": subkey,
-                        "time": 0,
-                        "up": up,
-                        "down": down,
-                        "type": key_type,
-                    }
-                )
-
-            # no match?
-            else:
-                errors.append(key)
+        macro = compile_macro(string)
 
         # if there are errors, do not process keys
-        if len(errors):
-            return errors
+        if macro.errors:
+            return list(macro.errors)
 
-        # create new thread if there is no active one
-        if self.keys_process is None or not self.keys_process.isAlive():
-            self.keys_process = Thread(target=self.keys_worker.processQueue)
-            self.keys_process.start()
-
-        # add keys to queue
-        for i in key_queue:
-            self.keys_worker.key_queue.put(i)
-        self.keys_worker.key_queue.put(None)
+        # add keys to the queue as one batch
+        self.last_batch = self.keys_worker.submit(self, macro, timeout)
 
         return True
 
+    # key string compiled for replaying through the input scheduler, cached
+    def compileKeyString(self, string):
+        return compile_macro(string)
+
+    # wait until every key string of the backend was sent
+    def flush(self, timeout=None):
+        return self.keys_worker.flush(timeout)
+
+    # wait until the last key string of this instance was sent
+    def wait(self, timeout=None):
+        return self.last_batch is None or self.last_batch.wait(timeout)
+
+    # print a key event of a key string
+    def logKey(self, event, pause=0.0):
+        self.common.info(
+            "Key: \033[1;35m0x%02X\033[0;37m, pause: \033[1;35m%f\033[0;37m, direction: \033[1;35m%s\033[0;37m, type: \033[1;35m%s"
+            % (
+                event.code,
+                pause,
+                "UP" if event.flags & self.key_release else "DOWN",
+                "DK" if event.flags & self.direct_keys else "VK",
+            ),
+            "\033[0;35mKEY:    \033[0;37m",
+        )
+
+    # key code of a key name or hex string
+    def keyCode(self, key, type=None):
+        if type is None:
+            type = self.direct_keys
+        code = key_code(key.upper(), type)
+        return 0x0000 if code is None else code
+
+    # integer id of a key name, for callers sending the same keys often
+    def keyId(self, key):
+        return key_table().id(key)
+
+    # events of a key press or release, sent in one call
+    def keyEvents(self, key, release=False, type=None):
+        if type is None:
+            type = self.direct_keys
+        code = key_code(key.upper(), type)
+        return () if code is None else key_events(code, type, release)
+
     # direct key press
     def directKey(self, key, direction=None, type=None):
         if type is None:
             type = self.direct_keys
         if direction is None:
             direction = self.key_press
-        if key.startswith("0x"):
-            key = int(key, 16)
-        else:
-            key = key.upper()
-            lookup_table = self.dk if type == self.direct_keys else self.vk
-            key = lookup_table[key] if key in lookup_table else 0x0000
+        release = bool(direction & self.key_release)
+        self.backend.send(key_events(self.keyCode(key, type), type, release))
 
-        self.keys_worker.sendKey(key, direction | type)
+    # direct key press by key id, without any name lookup
+    def directKeyId(self, key_id, direction=None, type=None):
+        if type is None:
+            type = self.direct_keys
+        if direction is None:
+            direction = self.key_press
+        release = bool(direction & self.key_release)
+        self.backend.send(key_table()[key_id].events(type, release))
 
     # direct mouse move or button press
     def directMouse(self, dx=0, dy=0, buttons=0):
-        self.keys_worker.sendMouse(dx, dy, buttons)
-
-
-class KeysWorker:
-    # keys object
-    keys = None
-
-    # queue of keys
-    key_queue = Queue()
-
-    # init
-    def __init__(self, keys):
-        self.keys = keys
-
-    # main function, process key's queue in loop
-    def processQueue(self):
-        # endless loop
-        while True:
-            # get one key
-            key = self.key_queue.get()
-
-            # terminate process if queue is empty
-            if key is None:
-                self.key_queue.task_done()
-                if self.key_queue.empty():
-                    return
-                continue
-            # print key
-            elif not self.keys.standalone:
-                self.keys.common.info(
-                    "Key: \033[1;35m%s/%s\033[0;37m, duration: \033[1;35m%f\033[0;37m, direction: \033[1;35m%s\033[0;37m, type: \033[1;35m%s"
-                    % (
-                        key["okey"] if key["okey"] else "None",
-                        key["key"],
-                        key["time"],
-                        "UP"
-                        if key["up"] and not key["down"]
-                        else "DOWN"
-                        if not key["up"] and key["down"]
-                        else "BOTH"
-                        if key["up"] and key["down"]
-                        else "NONE",
-                        "None"
-                        if key["type"] is None
-                        else "DK"
-                        if key["type"] == self.keys.direct_keys
-                        else "VK",
-                    ),
-                    "\033[0;35mKEY:    \033[0;37m",
-                )
-
-            # if it's a key
-            if key["key"]:
-                # press
-                if key["down"]:
-                    self.sendKey(key["key"], self.keys.key_press | key["type"])
-
-                # wait
-                sleep(key["time"])
-
-                # and release
-                if key["up"]:
-                    self.sendKey(key["key"], self.keys.key_release | key["type"])
-
-            # not an actual key, just pause
-            else:
-                sleep(key["time"])
-
-            # mark as done (decrement internal queue counter)
-            self.key_queue.task_done()
-
-    # send key
-    def sendKey(self, key, type):
-        self.SendInput(self.Keyboard(key, type))
-
-    # send mouse
-    def sendMouse(self, dx, dy, buttons):
         if dx != 0 or dy != 0:
-            buttons |= self.keys.mouse_move
-        self.SendInput(self.Mouse(buttons, dx, dy))
-
-    # send input
-    def SendInput(self, *inputs):
-        nInputs = len(inputs)
-        LPINPUT = INPUT * nInputs
-        pInputs = LPINPUT(*inputs)
-        cbSize = ctypes.c_int(ctypes.sizeof(INPUT))
-        return ctypes.windll.user32.SendInput(nInputs, pInputs, cbSize)
-
-    # get input object
-    def Input(self, structure):
-        if isinstance(structure, MOUSEINPUT):
-            return INPUT(0, _INPUTunion(mi=structure))
-        if isinstance(structure, KEYBDINPUT):
-            return INPUT(1, _INPUTunion(ki=structure))
-        if isinstance(structure, HARDWAREINPUT):
-            return INPUT(2, _INPUTunion(hi=structure))
-        raise TypeError("Cannot create INPUT structure!")
-
-    # mouse input
-    def MouseInput(self, flags, x, y, data):
-        return MOUSEINPUT(x, y, data, flags, 0, None)
-
-    # keyboard input
-    def KeybdInput(self, code, flags):
-        return KEYBDINPUT(code, code, flags, 0, None)
-
-    # hardware input
-    def HardwareInput(self, message, parameter):
-        return HARDWAREINPUT(
-            message & 0xFFFFFFFF, parameter & 0xFFFF, parameter >> 16 & 0xFFFF
-        )
-
-    # mouse object
-    def Mouse(self, flags, x=0, y=0, data=0):
-        return self.Input(self.MouseInput(flags, x, y, data))
+            buttons |= self.mouse_move
+        self.backend.send_mouse(dx, dy, buttons)
 
-    # keyboard object
-    def Keyboard(self, code, flags=0):
-        return self.Input(self.KeybdInput(code, flags))
 
-    # hardware object
-    def Hardware(self, message, parameter=0):
-        return self.Input(self.HardwareInput(message, parameter))
+class KeyBatch:
+    """Compiled key string queued on a KeysWorker, played as a whole
 
+    #### Attributes:
+        :playback: PlaybackHandle on the input scheduler, once it started
+    """
 
-# types
-LONG = ctypes.c_long
-DWORD = ctypes.c_ulong
-ULONG_PTR = ctypes.POINTER(DWORD)
-WORD = ctypes.c_ushort
-
+    def __init__(self, keys, macro):
+        self.keys = keys
+        self.macro = macro
+        self.enqueued = perf_counter()
+        self.playback = None
+        self.cancelled = False
+        self._done = Event()
 
-class MOUSEINPUT(ctypes.Structure):
-    _fields_ = (
-        ("dx", LONG),
-        ("dy", LONG),
-        ("mouseData", DWORD),
-        ("dwFlags", DWORD),
-        ("time", DWORD),
-        ("dwExtraInfo", ULONG_PTR),
-    )
+    def done(self):
+        return self._done.is_set()
 
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
 
-class KEYBDINPUT(ctypes.Structure):
-    _fields_ = (
-        ("wVk", WORD),
-        ("wScan", WORD),
-        ("dwFlags", DWORD),
-        ("time", DWORD),
-        ("dwExtraInfo", ULONG_PTR),
-    )
 
+class KeysWorker:
+    """Queues the key strings of every Keys instance on one backend
 
-class HARDWAREINPUT(ctypes.Structure):
-    _fields_ = (("uMsg", DWORD), ("wParamL", WORD), ("wParamH", WORD))
+    A bounded queue in front of the backend's InputScheduler: one thread per
+    backend hands batches to the scheduler one at a time, so key strings
+    play in order with every other timeline of the backend and never
+    interleave, and submitting blocks while the queue is full.
 
+    #### Attributes:
+        :maxsize: batches the queue holds before submit blocks
+        :latency: seconds each key event was sent later than planned
+        :max_depth: most batches that were waiting at once
+    """
 
-class _INPUTunion(ctypes.Union):
-    _fields_ = (("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT))
+    maxsize = 64
+    latency_history = 1000
+    _shared_lock = Lock()
 
+    # init
+    def __init__(self, backend, maxsize=None):
+        self.backend = backend
+        self.scheduler = InputScheduler.for_backend(backend)
+        self.key_queue = Queue(self.maxsize if maxsize is None else maxsize)
+        self.latency = deque(maxlen=self.latency_history)
+        self.max_depth = 0
+        self.submitted = 0
+        self.completed = 0
+        self._condition = Condition()
+        self._thread = None
+
+    # worker shared by every Keys instance of the backend
+    @classmethod
+    def for_backend(cls, backend):
+        with cls._shared_lock:
+            worker = getattr(backend, "_keys_worker", None)
+            if worker is None:
+                worker = backend._keys_worker = cls(backend)
+            return worker
+
+    # batches waiting to be played
+    @property
+    def depth(self):
+        return self.key_queue.qsize()
+
+    # queue a compiled key string, blocks while the queue is full (queue.Full
+    # is raised after timeout)
+    def submit(self, keys, macro, timeout=None):
+        batch = KeyBatch(keys, macro)
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self.processQueue, daemon=True)
+                self._thread.start()
+        self.key_queue.put(batch, timeout=timeout)
+        with self._condition:
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self.depth)
+        return batch
+
+    # wait until everything submitted so far was played
+    def flush(self, timeout=None):
+        with self._condition:
+            target = self.submitted
+            return self._condition.wait_for(lambda: self.completed >= target, timeout)
+
+    # drop batches that did not start yet, returns how many
+    def clear(self):
+        dropped = 0
+        while True:
+            try:
+                batch = self.key_queue.get_nowait()
+            except Empty:
+                return dropped
+            batch.cancelled = True
+            self.finish(batch)
+            dropped += 1
 
-class INPUT(ctypes.Structure):
-    _fields_ = (("type", DWORD), ("union", _INPUTunion))
+    # main function, process key's queue in loop
+    def processQueue(self):
+        while True:
+            batch = self.key_queue.get()
+            try:
+                self.process(batch)
+            finally:
+                self.finish(batch)
+
+    # play one key string on the scheduler, trailing pause included
+    def process(self, batch):
+        keys = batch.keys
+        if not keys.standalone:
+            offset = 0.0
+            for event in batch.macro.events:
+                keys.logKey(event, event.time - offset)
+                offset = event.time
+
+        batch.playback = self.scheduler.submit(batch.macro.timeline())
+        batch.playback.wait()
+
+        # planned when queued, the scheduler reports lateness of each event
+        start = batch.playback.started - batch.enqueued
+        self.latency.extend(start + late for late in batch.playback.jitter)
+
+    def finish(self, batch):
+        batch._done.set()
+        self.key_queue.task_done()
+        with self._condition:
+            self.completed += 1
+            self._condition.notify_all()
 
 
 if __name__ == "__main__":
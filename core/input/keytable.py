@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from threading import Lock
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from .backends import KEY, InputEvent
+from .constants import HEX_DIRECT_KEYS, HEX_KEY_TYPES, HEX_VIRTUAL_KEYS
+
+DIRECT_KEYS = HEX_KEY_TYPES["direct_keys"]
+VIRTUAL_KEYS = HEX_KEY_TYPES["virtual_keys"]
+KEY_PRESS = HEX_KEY_TYPES["key_press"]
+KEY_RELEASE = HEX_KEY_TYPES["key_release"]
+EXTENDED_KEY = 0x0001
+
+# direct key codes from 0x80 are E0 scancodes, sent with the extended flag
+_EXTENDED_OFFSET = 0x80
+
+
+@lru_cache(maxsize=None)
+def key_events(
+    code: int, key_type: int = DIRECT_KEYS, release: bool = False
+) -> tuple[InputEvent, ...]:
+    """Events sent together for one press or release of a key code
+
+    The events form a scancode sequence: one SendInput array, a single
+    event for every key of the tables.
+    """
+    flags = key_type | (KEY_RELEASE if release else KEY_PRESS)
+    if key_type == DIRECT_KEYS and code >= _EXTENDED_OFFSET:
+        return (InputEvent(KEY, code - _EXTENDED_OFFSET, flags | EXTENDED_KEY),)
+    return (InputEvent(KEY, code, flags),)
+
+
+@dataclass(frozen=True, slots=True)
+class KeyEntry:
+    """A key of the table
+
+    #### Attributes:
+        :id: index of the key in the table, stable while the process runs
+        :direct: DirectInput code, None if there's no direct key
+        :virtual: virtual key code, None if there's no virtual key
+        :strokes: direct press, direct release, virtual press and virtual
+            release events
+    """
+
+    id: int
+    name: str
+    direct: Optional[int]
+    virtual: Optional[int]
+    strokes: tuple[tuple[InputEvent, ...], ...]
+
+    def code(self, key_type: int = DIRECT_KEYS) -> Optional[int]:
+        return self.direct if key_type == DIRECT_KEYS else self.virtual
+
+    def events(
+        self, key_type: int = DIRECT_KEYS, release: bool = False
+    ) -> tuple[InputEvent, ...]:
+        return self.strokes[(key_type != DIRECT_KEYS) * 2 + release]
+
+
+class KeyTable:
+    """Direct and virtual key tables merged by name, with integer key ids
+
+    Names are looked up upper-case. Hot callers resolve a name to its id
+    once and index the table with it afterwards.
+
+    #### Example:
+        - a = key_table().id("a")
+        - backend.send(key_table()[a].events(DIRECT_KEYS))
+    """
+
+    def __init__(
+        self,
+        direct: Mapping[str, int] = HEX_DIRECT_KEYS,
+        virtual: Mapping[str, int] = HEX_VIRTUAL_KEYS,
+    ) -> None:
+        names = list(dict.fromkeys([*direct, *virtual]))
+        self.entries: tuple[KeyEntry, ...] = tuple(
+            KeyEntry(
+                index,
+                name,
+                direct.get(name),
+                virtual.get(name),
+                self._strokes(direct.get(name), virtual.get(name)),
+            )
+            for index, name in enumerate(names)
+        )
+        self.ids: Mapping[str, int] = MappingProxyType(
+            {entry.name: entry.id for entry in self.entries}
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"<KeyTable(keys={len(self)})>"
+
+    def __contains__(self, name: str) -> bool:
+        return name.upper() in self.ids
+
+    def __getitem__(self, key: int | str) -> KeyEntry:
+        return self.entries[key if isinstance(key, int) else self.id(key)]
+
+    @staticmethod
+    def _strokes(
+        direct: Optional[int], virtual: Optional[int]
+    ) -> tuple[tuple[InputEvent, ...], ...]:
+        strokes = []
+        for code, key_type in [(direct, DIRECT_KEYS), (virtual, VIRTUAL_KEYS)]:
+            for release in (False, True):
+                strokes.append(
+                    () if code is None else key_events(code, key_type, release)
+                )
+        return tuple(strokes)
+
+    def id(self, name: str) -> int:
+        """Key id of a name, KeyError if unknown"""
+        return self.ids[name.upper()]
+
+    def get(self, name: str) -> Optional[KeyEntry]:
+        index = self.ids.get(name.upper())
+        return None if index is None else self.entries[index]
+
+    def code(self, name: str, key_type: int = DIRECT_KEYS) -> Optional[int]:
+        entry = self.get(name)
+        return None if entry is None else entry.code(key_type)
+
+
+_table: Optional[KeyTable] = None
+_table_lock = Lock()
+
+
+def key_table() -> KeyTable:
+    """Shared key table, built on first use"""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = KeyTable()
+    return _table
@@ -0,0 +1,130 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import accumulate
+
+import numpy as np
+
+from .backends import KEY, InputEvent
+from .keytable import DIRECT_KEYS, VIRTUAL_KEYS, key_events, key_table
+from .scheduler import Timeline
+
+PROGRAM_DTYPE = np.dtype(
+    [("code", np.uint16), ("flags", np.uint16), ("delay", np.float32)]
+)
+
+
+@dataclass(frozen=True, eq=False)
+class KeyMacro:
+    """Key string compiled once into a program of key events
+
+    Macros compare and hash by identity, compile_macro shares one per string.
+
+    #### Attributes:
+        :source: the key string
+        :program: read-only array of (code, flags, delay) steps, delay is
+            seconds after the previous step
+        :duration: seconds from the first step to the end, trailing pause included
+        :events: the steps as InputEvents at their offsets, shared by every run
+        :errors: keys of the string that can't be compiled, the macro is
+            empty then
+
+    #### Example:
+        - macro = compile_macro("DK,A,-100,VK,SHIFT_DOWN")
+        - scheduler.submit(macro.timeline())
+    """
+
+    source: str
+    program: np.ndarray = field(repr=False)
+    duration: float
+    events: tuple[InputEvent, ...] = field(repr=False)
+    errors: tuple[str, ...] = ()
+
+    def __len__(self):
+        return len(self.program)
+
+    @property
+    def tail(self) -> float:
+        """Pause after the last step"""
+        return self.duration - (self.events[-1].time if self.events else 0.0)
+
+    @classmethod
+    def from_steps(
+        cls,
+        source: str,
+        steps: list[tuple[int, int, float]],
+        tail: float = 0.0,
+        errors: tuple[str, ...] = (),
+    ) -> "KeyMacro":
+        program = np.array(steps, dtype=PROGRAM_DTYPE)
+        program.flags.writeable = False
+        offsets = list(accumulate(delay for *_, delay in steps))
+        events = tuple(
+            InputEvent(KEY, code, flags, time=offset)
+            for (code, flags, _), offset in zip(steps, offsets)
+        )
+        duration = (offsets[-1] if offsets else 0.0) + tail
+        return cls(source, program, duration, events, errors)
+
+    def timeline(self) -> Timeline:
+        """Timeline playing the macro, without parsing or building events
+
+        Raises ValueError listing the errors of a macro that didn't compile.
+        """
+        if self.errors:
+            raise ValueError(f"Keys can't be compiled: {', '.join(self.errors)}")
+        timeline = Timeline(self.events)
+        timeline.end = self.duration
+        return timeline
+
+
+def key_code(name: str, key_type: int) -> int | None:
+    """Code of an upper-case key name or 0x.. hex string, None if unknown"""
+    if name.startswith("0X"):
+        try:
+            code = int(name, 16)
+        except ValueError:
+            return None
+        return code if 0 < code < 256 else None
+    return key_table().code(name, key_type)
+
+
+@lru_cache(maxsize=256)
+def compile_macro(string: str) -> KeyMacro:
+    """Compile a key string, same syntax as Keys.parseKeyString
+
+    Comma separated keys, KEY_DOWN / KEY_UP for one direction only, DK / VK
+    to switch to direct or virtual keys and -N to pause N milliseconds.
+    Compiled macros are cached by string, keys that can't be compiled are
+    listed in the errors of an empty macro.
+    """
+    steps = []
+    errors = []
+    key_type = DIRECT_KEYS
+    delay = 0.0
+    for key in string.upper().split(","):
+        name, *direction = key.split("_")
+        down = not direction or direction[0] != "UP"
+        up = not direction or direction[0] == "UP"
+        if name == "VK":
+            key_type = VIRTUAL_KEYS
+        elif name == "DK":
+            key_type = DIRECT_KEYS
+        elif name.startswith("-"):
+            try:
+                pause = float(name[1:]) / 1000
+            except ValueError:
+                pause = 0
+            if 0 < pause <= 10:
+                delay += pause
+            else:
+                errors.append(key)
+        elif (code := key_code(name, key_type)) is None:
+            errors.append(key)
+        else:
+            for release in [False] * down + [True] * up:
+                for event in key_events(code, key_type, release):
+                    steps.append((event.code, event.flags, delay))
+                    delay = 0.0
+    if errors:
+        return KeyMacro.from_steps(string, [], errors=tuple(errors))
+    return KeyMacro.from_steps(string, steps, delay)
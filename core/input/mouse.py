@@ -0,0 +1,134 @@
+import math
+import random
+from typing import Optional, Sequence
+
+import numpy as np
+
+SQRT3 = math.sqrt(3)
+SQRT5 = math.sqrt(5)
+
+
+def _rng(seed: Optional[int | random.Random]) -> random.Random:
+    return seed if isinstance(seed, random.Random) else random.Random(seed)
+
+
+def wind_mouse_path(
+    start: Sequence[int],
+    dest: Sequence[int],
+    gravity: float = 12,
+    wind: float = 3,
+    max_step: float = 13,
+    damped_distance: float = 13,
+    seed: Optional[int | random.Random] = None,
+) -> np.ndarray:
+    """WindMouse cursor path from start to dest, computed up front
+
+    Every distinct integer position after start is returned as an (n, 2)
+    int32 array, ending exactly at dest. Same seed, same path.
+
+    - gravity - magnitude of the gravitational force (G_0)
+    - wind - magnitude of the wind force fluctuations (W_0)
+    - max_step - maximum step size, velocity clip threshold (M_0)
+    - damped_distance - distance where wind changes from random to damped (D_0)
+    """
+    rng = _rng(seed)
+    uniform = rng.random
+    dest_x, dest_y = dest
+    x, y = float(start[0]), float(start[1])
+    last_x, last_y = int(start[0]), int(start[1])
+    v_x = v_y = w_x = w_y = 0.0
+    points = []
+    while (dist := math.hypot(dest_x - x, dest_y - y)) >= 1:
+        w_mag = min(wind, dist)
+        if dist >= damped_distance:
+            w_x = w_x / SQRT3 + (2 * uniform() - 1) * w_mag / SQRT5
+            w_y = w_y / SQRT3 + (2 * uniform() - 1) * w_mag / SQRT5
+        else:
+            w_x /= SQRT3
+            w_y /= SQRT3
+            if max_step < 3:
+                max_step = uniform() * 3 + 3
+            else:
+                max_step /= SQRT5
+        v_x += w_x + gravity * (dest_x - x) / dist
+        v_y += w_y + gravity * (dest_y - y) / dist
+        v_mag = math.hypot(v_x, v_y)
+        if v_mag > max_step:
+            v_clip = max_step / 2 + uniform() * max_step / 2
+            v_x = (v_x / v_mag) * v_clip
+            v_y = (v_y / v_mag) * v_clip
+        x += v_x
+        y += v_y
+        move_x, move_y = round(x), round(y)
+        if move_x != last_x or move_y != last_y:
+            points.append((last_x := move_x, last_y := move_y))
+    if (last_x, last_y) != (dest_x, dest_y):
+        points.append((dest_x, dest_y))
+    return np.array(points, dtype=np.int32).reshape(-1, 2)
+
+
+def wind_mouse_paths(
+    starts: Sequence[Sequence[int]],
+    dests: Sequence[Sequence[int]],
+    gravity: float = 12,
+    wind: float = 3,
+    max_step: float = 13,
+    damped_distance: float = 13,
+    seed: Optional[int | np.random.Generator] = None,
+) -> list[np.ndarray]:
+    """WindMouse paths for many start/dest pairs at once
+
+    Each step advances every unfinished path with array operations, which
+    pays off when precomputing many candidate paths (e.g. a path per
+    target). Paths have the same form as wind_mouse_path, but use NumPy
+    random numbers, so they differ from it for the same seed.
+    """
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    dests = np.asarray(dests, dtype=float).reshape(-1, 2)
+    positions = np.asarray(starts, dtype=float).reshape(-1, 2).copy()
+    count = len(positions)
+    velocity = np.zeros((count, 2))
+    wind_force = np.zeros((count, 2))
+    max_steps = np.full(count, float(max_step))
+    steps = [np.rint(positions).astype(np.int32)]
+    active = np.ones(count, dtype=bool)
+    finished_at = np.zeros(count, dtype=int)
+    while True:
+        deltas = dests - positions
+        dist = np.hypot(deltas[:, 0], deltas[:, 1])
+        done = active & (dist < 1)
+        finished_at[done] = len(steps)
+        active &= ~done
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        dist_a = dist[idx, None]
+        w_mag = np.minimum(wind, dist_a)
+        windy = dist_a >= damped_distance
+        random_wind = (2 * rng.random((len(idx), 2)) - 1) * w_mag / SQRT5
+        wind_force[idx] = wind_force[idx] / SQRT3 + np.where(windy, random_wind, 0)
+        damped = idx[~windy[:, 0]]
+        small = damped[max_steps[damped] < 3]
+        max_steps[small] = rng.random(len(small)) * 3 + 3
+        max_steps[np.setdiff1d(damped, small)] /= SQRT5
+        velocity[idx] += wind_force[idx] + gravity * deltas[idx] / dist_a
+        v_mag = np.hypot(velocity[idx, 0], velocity[idx, 1])
+        clipped = v_mag > max_steps[idx]
+        clip_idx = idx[clipped]
+        v_clip = max_steps[clip_idx] / 2 * (1 + rng.random(len(clip_idx)))
+        velocity[clip_idx] *= (v_clip / v_mag[clipped])[:, None]
+        positions[idx] += velocity[idx]
+        steps.append(np.rint(positions).astype(np.int32))
+
+    trajectories = np.stack(steps, axis=1)  # (count, steps, 2)
+    paths = []
+    for i in range(count):
+        points = trajectories[i, : finished_at[i]]
+        moved = np.any(points[1:] != points[:-1], axis=1)
+        points = points[1:][moved]
+        last = points[-1] if len(points) else trajectories[i, 0]
+        dest = np.rint(dests[i]).astype(np.int32)
+        if (last != dest).any():
+            points = np.vstack([points, dest])
+        paths.append(np.ascontiguousarray(points))
+    return paths
@@ -0,0 +1,364 @@
+from collections import deque
+from dataclasses import replace
+from itertools import groupby
+from queue import Queue
+from threading import Event, Lock, Thread
+from time import perf_counter, sleep
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from .backends import CURSOR, KEY, MOUSE, InputBackend, InputEvent
+from .constants import HEX_KEY_TYPES, HEX_MOUSE_KEYS
+
+KEY_RELEASE = HEX_KEY_TYPES["key_release"]
+MOUSE_PRESS = (
+    HEX_MOUSE_KEYS["mouse_lb_press"]
+    | HEX_MOUSE_KEYS["mouse_rb_press"]
+    | HEX_MOUSE_KEYS["mouse_mb_press"]
+)
+MOUSE_RELEASE = (
+    HEX_MOUSE_KEYS["mouse_lb_release"]
+    | HEX_MOUSE_KEYS["mouse_rb_release"]
+    | HEX_MOUSE_KEYS["mouse_mb_release"]
+)
+
+
+def calibrate_min_sleep(runs: int = 10, precision: float = 1e-4) -> float:
+    """Longest time a minimal sleep() actually takes, rounded up
+
+    Sleeping is only precise above this, shorter waits have to spin.
+    """
+    samples = []
+    for _ in range(runs):
+        start = perf_counter()
+        sleep(1e-6)
+        samples.append(perf_counter() - start)
+    return float(np.ceil(max(samples) / precision) * precision)
+
+
+def wait_until(deadline: float, min_sleep: float, cancel: Event = None) -> bool:
+    """Sleep while far from deadline, then spin (yielding) up to it
+
+    Returns False when cancel was set before the deadline.
+    """
+    while (remaining := deadline - perf_counter()) > 0:
+        if remaining > min_sleep:
+            if cancel is None:
+                sleep(remaining - min_sleep)
+            elif cancel.wait(remaining - min_sleep):
+                return False
+        else:
+            sleep(0)
+    return cancel is None or not cancel.is_set()
+
+
+class HeldInputs:
+    """Keys and mouse buttons a playback pressed and didn't release yet
+
+    Every button's release flag is its press flag shifted left by one.
+    """
+
+    def __init__(self) -> None:
+        self.keys: set[tuple[int, int]] = set()
+        self.buttons = 0
+
+    def __bool__(self):
+        return bool(self.keys or self.buttons)
+
+    def update(self, events: Sequence[InputEvent]) -> None:
+        for event in events:
+            if event.kind == KEY:
+                key = (event.code, event.flags & ~KEY_RELEASE)
+                if event.flags & KEY_RELEASE:
+                    self.keys.discard(key)
+                else:
+                    self.keys.add(key)
+            elif event.kind == MOUSE:
+                self.buttons |= event.flags & MOUSE_PRESS
+                self.buttons &= ~((event.flags & MOUSE_RELEASE) >> 1)
+
+    def releases(self, events: Sequence[InputEvent]) -> list[InputEvent]:
+        """Releases among events of keys and buttons that are held"""
+        releases = []
+        for event in events:
+            if event.kind == KEY and event.flags & KEY_RELEASE:
+                if (event.code, event.flags & ~KEY_RELEASE) in self.keys:
+                    releases.append(event)
+            elif event.kind == MOUSE and (flags := event.flags & (self.buttons << 1)):
+                releases.append(replace(event, flags=flags, x=0, y=0))
+        return releases
+
+
+class Timeline:
+    """Input events at offsets (seconds) from the start of their playback
+
+    Every added event is placed `after` seconds after the previous one.
+    Events at the same offset are sent together, in one SendInput call
+    where the backend supports it.
+
+    #### Example:
+        - timeline = Timeline().path(points, interval=0.001).wait(0.2)
+        - timeline.mouse(0, 0, press).mouse(0, 0, release, after=0.15)
+        - timeline.chord([ctrl, a], press, release, hold=0.1)
+    """
+
+    def __init__(self, events: Iterable[InputEvent] = ()) -> None:
+        self.events: list[InputEvent] = list(events)
+        self.end = self.events[-1].time if self.events else 0.0
+
+    def __len__(self):
+        return len(self.events)
+
+    def __repr__(self):
+        return f"<Timeline(events={len(self)}, duration={self.end:.3f})>"
+
+    def add(self, event: InputEvent, after: float = 0.0) -> "Timeline":
+        self.end += after
+        self.events.append(replace(event, time=self.end))
+        return self
+
+    def key(self, code: int, flags: int, after: float = 0.0) -> "Timeline":
+        return self.add(InputEvent(KEY, code, flags), after)
+
+    def mouse(self, dx: int, dy: int, buttons: int, after: float = 0.0) -> "Timeline":
+        return self.add(InputEvent(MOUSE, 0, buttons, dx, dy), after)
+
+    def cursor(self, x: int, y: int, after: float = 0.0) -> "Timeline":
+        return self.add(InputEvent(CURSOR, x=x, y=y), after)
+
+    def path(self, points: np.ndarray, interval: float = 0.0) -> "Timeline":
+        """Absolute cursor moves, interval seconds apart"""
+        for i, (x, y) in enumerate(np.asarray(points).tolist()):
+            self.cursor(x, y, after=interval if i or self.events else 0.0)
+        return self
+
+    def chord(
+        self,
+        codes: Sequence[int],
+        press: int,
+        release: int,
+        hold: float = 0.0,
+        after: float = 0.0,
+    ) -> "Timeline":
+        """Keys pressed at once and released together, in reverse order, after hold"""
+        for i, code in enumerate(codes):
+            self.key(code, press, after=0.0 if i else after)
+        for i, code in enumerate(reversed(codes)):
+            self.key(code, release, after=0.0 if i else hold)
+        return self
+
+    def relative_path(
+        self,
+        points: np.ndarray,
+        start: Sequence[int],
+        interval: float = 0.0,
+        burst: int = 1,
+    ) -> "Timeline":
+        """Relative mouse moves through the points of an absolute path
+
+        Every `burst` consecutive moves share an offset, so they are sent in
+        one call, interval seconds after the previous burst. The result
+        depends on the system's pointer speed and acceleration settings.
+        """
+        points = np.asarray(points).reshape(-1, 2)
+        deltas = np.diff(np.vstack([start, points]), axis=0).tolist()
+        for i, (dx, dy) in enumerate(deltas):
+            after = interval if i % burst == 0 and (i or self.events) else 0.0
+            self.mouse(dx, dy, HEX_MOUSE_KEYS["mouse_move"], after=after)
+        return self
+
+    def groups(self) -> Iterator[tuple[float, list[InputEvent]]]:
+        """Offsets with the consecutive events to send at them"""
+        for offset, events in groupby(self.events, key=lambda event: event.time):
+            yield offset, list(events)
+
+    def wait(self, seconds: float) -> "Timeline":
+        self.end += seconds
+        return self
+
+    def then(self, other: "Timeline") -> "Timeline":
+        start = self.end
+        for event in other.events:
+            self.events.append(replace(event, time=start + event.time))
+        self.end = start + other.end
+        return self
+
+    @property
+    def last_cursor(self) -> Optional[tuple[int, int]]:
+        for event in reversed(self.events):
+            if event.kind == CURSOR:
+                return event.x, event.y
+        return None
+
+
+class PlaybackHandle:
+    """Progress of a submitted timeline
+
+    #### Attributes:
+        :jitter: seconds each played event was sent after its scheduled time
+        :cancelled: playback stopped early by cancel()
+    """
+
+    def __init__(self, timeline: Timeline) -> None:
+        self.timeline = timeline
+        self.jitter: list[float] = []
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.cancelled = False
+        self._cancel = Event()
+        self._done = Event()
+
+    def __repr__(self):
+        state = "done" if self.done() else "pending"
+        return f"<PlaybackHandle({state}, events={len(self.timeline)})>"
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def cancel(self) -> None:
+        """Skip what is left, only releases of keys/buttons it pressed are sent"""
+        self._cancel.set()
+
+    @property
+    def max_jitter(self) -> float:
+        return max(self.jitter, default=0.0)
+
+
+class InputScheduler:
+    """Plays timelines of input events on a worker thread with precise timing
+
+    Timelines are played in submission order. Waits longer than the
+    calibrated minimum sleep are slept, the rest is spun, so events are sent
+    close to their scheduled time without busy waiting whole intervals.
+    Submitting returns immediately with a PlaybackHandle.
+
+    #### Attributes:
+        :min_sleep: shortest reliable sleep, calibrated on first use
+        :jitter_history: how many recent event jitters are kept in `jitter`
+
+    #### Example:
+        - scheduler = InputScheduler.for_backend(backend)
+        - handle = scheduler.submit(Timeline().key(code, flags))
+        - handle.wait()
+    """
+
+    min_sleep: Optional[float] = None
+    jitter_history: int = 1000
+    _shared_lock = Lock()
+
+    def __init__(self, backend: InputBackend, min_sleep: float = None) -> None:
+        self.backend = backend
+        if min_sleep is not None:
+            self.min_sleep = min_sleep
+        self.jitter: deque[float] = deque(maxlen=self.jitter_history)
+        self.played = 0
+        self._queue: Queue[Optional[PlaybackHandle]] = Queue()
+        self._pending: list[PlaybackHandle] = []
+        self._lock = Lock()
+        self._worker: Optional[Thread] = None
+
+    def __repr__(self):
+        return f"<InputScheduler(pending={len(self._pending)}, played={self.played})>"
+
+    @classmethod
+    def for_backend(cls, backend: InputBackend) -> "InputScheduler":
+        """Scheduler shared by everything sending input through backend"""
+        with cls._shared_lock:
+            scheduler = getattr(backend, "_scheduler", None)
+            if scheduler is None:
+                scheduler = backend._scheduler = cls(backend)
+            return scheduler
+
+    def submit(self, timeline: Timeline) -> PlaybackHandle:
+        handle = PlaybackHandle(timeline)
+        with self._lock:
+            self._pending.append(handle)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = Thread(target=self._run, daemon=True)
+                self._worker.start()
+        self._queue.put(handle)
+        return handle
+
+    def play(self, timeline: Timeline) -> PlaybackHandle:
+        """Submit and wait until played"""
+        handle = self.submit(timeline)
+        handle.wait()
+        return handle
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._pending)
+
+    @property
+    def planned_cursor(self) -> Optional[tuple[int, int]]:
+        """Cursor position once every pending timeline is played, if they move it"""
+        with self._lock:
+            for handle in reversed(self._pending):
+                if (cursor := handle.timeline.last_cursor) is not None:
+                    return cursor
+        return None
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        with self._lock:
+            pending = list(self._pending)
+        deadline = None if timeout is None else perf_counter() + timeout
+        for handle in pending:
+            remaining = None if deadline is None else max(deadline - perf_counter(), 0)
+            if not handle.wait(remaining):
+                return False
+        return True
+
+    def cancel_all(self) -> None:
+        with self._lock:
+            for handle in self._pending:
+                handle.cancel()
+
+    def stop(self) -> None:
+        """End the worker once pending timelines are played"""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._queue.put(None)
+            worker.join()
+
+    def _run(self) -> None:
+        if self.min_sleep is None:
+            self.min_sleep = calibrate_min_sleep()
+        while (handle := self._queue.get()) is not None:
+            try:
+                self._play(handle)
+            finally:
+                with self._lock:
+                    self._pending.remove(handle)
+                handle._done.set()
+
+    def _play(self, handle: PlaybackHandle) -> None:
+        handle.started = start = perf_counter()
+        cancel = handle._cancel
+        held = HeldInputs()
+        for offset, events in handle.timeline.groups():
+            if not handle.cancelled:
+                handle.cancelled = not wait_until(
+                    start + offset, self.min_sleep, cancel
+                )
+            if handle.cancelled:
+                # never leave keys or buttons held down, nor release others
+                if held and (releases := held.releases(events)):
+                    self.backend.send(releases)
+                    held.update(releases)
+                continue
+            self.backend.send(events)
+            held.update(events)
+            late = perf_counter() - start - offset
+            handle.jitter.extend([late] * len(events))
+            self.jitter.extend([late] * len(events))
+            self.played += len(events)
+        if not handle.cancelled:
+            handle.cancelled = not wait_until(
+                start + handle.timeline.end, self.min_sleep, cancel
+            )
+        handle.finished = perf_counter()
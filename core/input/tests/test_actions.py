@@ -2,7 +2,11 @@ from unittest import TestCase, skip
 
 import win32api
 
+from core.common.entities import Pixel
+
 from ..actions import Actions
+from ..backends import KEY, MOUSE, RecordingBackend
+from ..executor import HIGH
 
 
 class TestActions(TestCase):
@@ -49,3 +53,78 @@ class TestActions(TestCase):
         self.actions.press("b")
         self.actions.press("c")
         self.actions.press("c", delay=0.3)
+
+
+class TestRecordedActions(TestCase):
+    def setUp(self) -> None:
+        self.backend = RecordingBackend(cursor=(500, 500))
+        self.actions = Actions(self.backend, seed=0)
+
+    def test_wind_mouse(self):
+        end = self.actions.wind_mouse(500, 500, 100, 300)
+        path = self.backend.path()
+        self.assertEqual(end, (100, 300))
+        self.assertEqual(path[-1], end)
+        self.assertEqual(len(set(path)), len(path))
+
+    def test_wind_mouse_seeded(self):
+        self.actions.wind_mouse(500, 500, 100, 300)
+        other = RecordingBackend(cursor=(500, 500))
+        Actions(other, seed=0).wind_mouse(500, 500, 100, 300)
+        self.assertEqual(self.backend.path(), other.path())
+
+    def test_move_to(self):
+        self.actions.move_to(120, 80, delay=0).wait()
+        self.assertEqual(self.backend.cursor_position(), (120, 80))
+
+    def test_queued_moves(self):
+        self.actions.move_to(120, 80, delay=0)
+        self.actions.move_to(300, 300, delay=0)
+        self.actions.wait()
+        path = self.backend.path()
+        self.assertIn((120, 80), path)
+        self.assertEqual(path[-1], (300, 300))
+        # the second path starts where the first one ends
+        index = path.index((120, 80))
+        step = abs(path[index + 1][0] - 120) + abs(path[index + 1][1] - 80)
+        self.assertLessEqual(step, 26)
+
+    def test_press(self):
+        handle = self.actions.press("a", delay=0.1)
+        self.assertFalse(handle.done())
+        self.assertTrue(handle.wait(1))
+        self.assertGreaterEqual(handle.finished - handle.started, 0.2)
+        press, release = self.backend.of_kind(KEY)
+        self.assertEqual(press.flags & self.actions.keys.key_release, 0)
+        self.assertTrue(release.flags & self.actions.keys.key_release)
+        self.assertGreaterEqual(release.time - press.time, 0.1)
+
+    def test_move_click(self):
+        self.actions.move_click(Pixel(200, 200)).wait()
+        press, release = self.backend.of_kind(MOUSE)
+        self.assertEqual(self.backend.cursor_position(), (200, 200))
+        self.assertEqual(press.flags, self.actions.keys.mouse_lb_press)
+        self.assertEqual(release.flags, self.actions.keys.mouse_lb_release)
+        self.assertLess(self.backend.events[-3].time, press.time)
+
+    def test_move_camera_relative(self):
+        self.actions.move_camera(200, -40, delay=False, relative=True).wait()
+        self.assertEqual(self.backend.cursor_position(), (700, 460))
+        self.assertFalse(self.backend.path())
+        self.assertEqual(self.backend.calls, 1)
+        self.backend.clear()
+        self.actions.move_camera(200, -40, relative=True).wait()
+        bursts = -(-len(self.backend) // self.actions.move_burst)
+        self.assertEqual(self.backend.calls, bursts)
+
+    def test_queue(self):
+        self.actions.queue(lambda: self.actions.press_timeline("b", delay=0.05))
+        move = self.actions.queue(
+            lambda: self.actions.move_click_timeline(Pixel(200, 200)), key="move"
+        )
+        press = self.actions.queue(lambda: self.actions.press_timeline("a"), HIGH)
+        self.assertFalse(move.done())
+        self.assertTrue(self.actions.wait(2))
+        self.assertTrue(move.done() and press.done())
+        self.assertLess(press.playback.finished, move.playback.started)
+        self.assertEqual(self.backend.cursor_position(), (200, 200))
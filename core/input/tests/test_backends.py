@@ -0,0 +1,92 @@
+from unittest import TestCase
+
+from ..backends import (
+    CURSOR,
+    INPUT,
+    KEY,
+    MOUSE,
+    InputEvent,
+    RecordingBackend,
+    default_backend,
+    keyboard_input,
+    mouse_input,
+    set_default_backend,
+)
+from ..keys import Keys
+
+
+class TestRecordingBackend(TestCase):
+    def setUp(self) -> None:
+        self.backend = RecordingBackend(cursor=(10, 20))
+        self.keys = Keys(backend=self.backend)
+
+    def test_keys(self):
+        self.keys.directKey("a")
+        self.keys.directKey("a", self.keys.key_release)
+        self.keys.directKey("a", type=self.keys.virtual_keys)
+        events = self.backend.of_kind(KEY)
+        self.assertEqual([event.code for event in events], [0x1E, 0x1E, 0x41])
+        self.assertEqual([event.flags for event in events], [0x0008, 0x000A, 0x0000])
+        self.assertTrue(events[0].time <= events[1].time <= events[2].time)
+
+    def test_mouse(self):
+        self.keys.directMouse(5, -5)
+        self.keys.directMouse(buttons=self.keys.mouse_lb_press)
+        self.assertEqual(self.backend.cursor_position(), (15, 15))
+        move, press = self.backend.of_kind(MOUSE)
+        self.assertEqual((move.x, move.y, move.flags), (5, -5, self.keys.mouse_move))
+        self.assertEqual(press.flags, self.keys.mouse_lb_press)
+
+    def test_cursor(self):
+        self.backend.set_cursor(100, 200)
+        self.backend.set_cursor(101, 201)
+        self.assertEqual(self.backend.cursor_position(), (101, 201))
+        self.assertEqual(self.backend.path(), [(100, 200), (101, 201)])
+        self.assertEqual(len(self.backend.of_kind(CURSOR)), 2)
+        self.backend.clear()
+        self.assertFalse(len(self.backend))
+
+    def test_send(self):
+        self.backend.send(
+            [
+                InputEvent(KEY, 0x1D, self.keys.key_press),
+                InputEvent(MOUSE, 0, self.keys.mouse_move, 1, 1),
+                InputEvent(CURSOR, x=50, y=50),
+                InputEvent(MOUSE, 0, self.keys.mouse_move, 2, 2),
+            ]
+        )
+        # the absolute move splits the batch
+        self.assertEqual(self.backend.calls, 3)
+        self.assertEqual(len(self.backend), 4)
+        self.assertEqual(self.backend.cursor_position(), (52, 52))
+        self.assertEqual(len({event.time for event in self.backend.events}), 1)
+
+    def test_key_string_batches(self):
+        self.keys.parseKeyString("LCONTROL_DOWN,A,LCONTROL_UP,-10,B")
+        self.assertTrue(self.keys.wait(1))
+        self.assertEqual(len(self.backend), 6)
+        # chord before the pause in one call, the last stroke in another
+        self.assertEqual(self.backend.calls, 2)
+        events = self.backend.events
+        self.assertEqual(events[0].time, events[3].time)
+        # played by the scheduler, the pause is kept from the playback start
+        started = self.keys.last_batch.playback.started
+        self.assertGreaterEqual(events[4].time - started, 0.01)
+
+    def test_default_backend(self):
+        backend = RecordingBackend()
+        set_default_backend(backend)
+        try:
+            self.assertIs(default_backend(), backend)
+            self.assertIs(Keys().backend, backend)
+        finally:
+            set_default_backend(None)
+
+
+class TestInputStructures(TestCase):
+    def test_inputs(self):
+        key = keyboard_input(0x1E, 0x0008)
+        self.assertIsInstance(key, INPUT)
+        self.assertEqual((key.type, key.union.ki.wScan), (1, 0x1E))
+        mouse = mouse_input(0x0001, 3, -4)
+        self.assertEqual((mouse.type, mouse.union.mi.dx, mouse.union.mi.dy), (0, 3, -4))
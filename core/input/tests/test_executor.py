@@ -0,0 +1,92 @@
+from time import sleep
+from unittest import TestCase
+
+from ..backends import KEY, RecordingBackend
+from ..constants import HEX_KEY_TYPES
+from ..executor import HIGH, LOW, ActionExecutor
+from ..scheduler import InputScheduler, Timeline
+
+PRESS = HEX_KEY_TYPES["key_press"] | HEX_KEY_TYPES["direct_keys"]
+RELEASE = HEX_KEY_TYPES["key_release"] | HEX_KEY_TYPES["direct_keys"]
+
+
+def stroke(code: int, hold: float = 0.0):
+    return lambda: Timeline().key(code, PRESS).key(code, RELEASE, after=hold)
+
+
+class TestActionExecutor(TestCase):
+    def setUp(self) -> None:
+        self.backend = RecordingBackend()
+        self.scheduler = InputScheduler(self.backend, min_sleep=0.002)
+        self.executor = ActionExecutor(self.scheduler)
+
+    def tearDown(self) -> None:
+        self.executor.stop()
+        self.scheduler.stop()
+
+    def codes(self) -> list[int]:
+        return [event.code for event in self.backend.of_kind(KEY)][::2]
+
+    def test_submit(self):
+        handle = self.executor.submit(stroke(1, hold=0.05))
+        self.assertFalse(handle.done())
+        self.assertTrue(handle.wait(1))
+        self.assertTrue(handle.started)
+        self.assertFalse(handle.cancelled)
+        self.assertEqual(self.codes(), [1])
+
+    def test_priority(self):
+        self.executor.submit(stroke(1, hold=0.05))
+        sleep(0.01)
+        self.executor.submit(stroke(2), priority=LOW)
+        self.executor.submit(stroke(3))
+        self.executor.submit(stroke(4), priority=HIGH)
+        self.assertEqual(
+            [handle.priority for handle in self.executor.pending], [0, 1, 2]
+        )
+        self.assertTrue(self.executor.wait_idle(1))
+        self.assertEqual(self.codes(), [1, 4, 3, 2])
+        self.assertFalse(self.executor.busy)
+
+    def test_supersede(self):
+        self.executor.submit(stroke(1, hold=0.05))
+        sleep(0.01)
+        first = self.executor.submit(stroke(2), key="move")
+        second = self.executor.submit(stroke(3), key="move")
+        self.assertTrue(first.done() and first.cancelled)
+        self.assertFalse(first.started)
+        self.assertTrue(second.wait(1))
+        self.assertEqual(self.codes(), [1, 3])
+
+    def test_interrupt(self):
+        first = self.executor.submit(stroke(1, hold=0.5), key="move")
+        sleep(0.02)
+        second = self.executor.submit(stroke(2), key="move", interrupt=True)
+        self.assertTrue(second.wait(0.3))
+        self.assertTrue(first.cancelled and first.playback.cancelled)
+        # the interrupted key is still released
+        self.assertEqual(len(self.backend.of_kind(KEY)), 4)
+
+    def test_cancel(self):
+        self.executor.submit(stroke(1, hold=0.05))
+        sleep(0.01)
+        handle = self.executor.submit(stroke(2), key="move")
+        self.executor.cancel("move")
+        self.assertTrue(handle.done())
+        self.assertTrue(self.executor.wait_idle(1))
+        self.assertEqual(self.codes(), [1])
+
+    def test_failing_action(self):
+        def fail():
+            raise ValueError("no target")
+
+        failed = self.executor.submit(fail)
+        handle = self.executor.submit(stroke(1))
+        self.assertTrue(failed.wait(1) and handle.wait(1))
+        self.assertIsInstance(failed.exception, ValueError)
+        self.assertIsNone(handle.exception)
+        self.assertEqual(self.codes(), [1])
+
+    def test_for_scheduler(self):
+        executor = ActionExecutor.for_scheduler(self.scheduler)
+        self.assertIs(ActionExecutor.for_scheduler(self.scheduler), executor)
@@ -0,0 +1,84 @@
+from queue import Full
+from time import sleep
+from unittest import TestCase
+
+from ..backends import KEY, RecordingBackend
+from ..keys import Keys, KeysWorker
+from ..scheduler import InputScheduler, Timeline
+
+
+class TestKeysWorker(TestCase):
+    def setUp(self) -> None:
+        self.backend = RecordingBackend()
+        self.keys = Keys(backend=self.backend)
+
+    def codes(self) -> list[int]:
+        return [event.code for event in self.backend.of_kind(KEY)]
+
+    def test_for_backend(self):
+        worker = self.keys.keys_worker
+        self.assertIs(Keys(backend=self.backend).keys_worker, worker)
+        self.assertIsNot(Keys(backend=RecordingBackend()).keys_worker, worker)
+        self.assertIsNot(worker.key_queue, KeysWorker(self.backend).key_queue)
+
+    def test_parse_errors(self):
+        self.assertEqual(self.keys.parseKeyString("A,NOPE,-20000"), ["NOPE", "-20000"])
+        self.assertIsNone(self.keys.last_batch)
+        self.assertFalse(self.keys.keys_worker.submitted)
+
+    def test_compiled_once(self):
+        self.keys.parseKeyString("a,0x1f,-20")
+        first = self.keys.last_batch
+        self.keys.parseKeyString("a,0x1f,-20")
+        self.assertIs(self.keys.last_batch.macro, first.macro)
+        self.assertTrue(self.keys.wait(1))
+        # played from the macro's prebuilt events
+        timeline = first.playback.timeline
+        self.assertEqual(timeline.events, list(first.macro.events))
+        self.assertAlmostEqual(timeline.end, first.macro.duration)
+        self.assertEqual(self.codes(), [0x1E, 0x1E, 0x1F, 0x1F] * 2)
+        # the trailing pause holds the queue
+        started = first.playback.started
+        self.assertGreaterEqual(self.backend.events[4].time - started, 0.02)
+
+    def test_batches_do_not_interleave(self):
+        other = Keys(backend=self.backend)
+        self.keys.parseKeyString("A,-30,B")
+        other.parseKeyString("C")
+        self.assertTrue(self.keys.flush(1))
+        self.assertTrue(self.keys.wait(0) and other.wait(0))
+        self.assertEqual(self.codes(), [0x1E, 0x1E, 0x30, 0x30, 0x2E, 0x2E])
+        # keys before the pause in one call, then the rest of both strings
+        self.assertEqual(self.backend.calls, 3)
+
+    def test_shares_the_scheduler(self):
+        scheduler = InputScheduler.for_backend(self.backend)
+        self.assertIs(self.keys.keys_worker.scheduler, scheduler)
+        press = self.keys.direct_keys | self.keys.key_press
+        release = self.keys.direct_keys | self.keys.key_release
+        scheduler.submit(Timeline().key(0x30, press).key(0x30, release, after=0.05))
+        self.keys.parseKeyString("A")
+        self.assertTrue(self.keys.wait(1))
+        # the key string waits for the timeline holding B
+        self.assertEqual(self.codes(), [0x30, 0x30, 0x1E, 0x1E])
+
+    def test_backpressure(self):
+        worker = self.keys.keys_worker = KeysWorker(self.backend, maxsize=1)
+        self.keys.parseKeyString("A,-100")
+        sleep(0.02)
+        self.keys.parseKeyString("B")
+        with self.assertRaises(Full):
+            self.keys.parseKeyString("C", timeout=0.01)
+        self.assertEqual(worker.depth, 1)
+        self.assertEqual(worker.clear(), 1)
+        self.assertTrue(worker.flush(1))
+        self.assertEqual(self.codes(), [0x1E, 0x1E])
+        self.assertEqual(worker.max_depth, 1)
+
+    def test_latency(self):
+        self.keys.parseKeyString("A,-20,B")
+        self.keys.wait(1)
+        worker = self.keys.keys_worker
+        self.assertEqual(len(worker.latency), 4)
+        # the pause is planned, it doesn't count as latency
+        self.assertLess(max(worker.latency), 0.015)
@@ -0,0 +1,82 @@
+from unittest import TestCase
+
+from ..backends import KEY, RecordingBackend
+from ..constants import HEX_DIRECT_KEYS, HEX_VIRTUAL_KEYS
+from ..keys import Keys
+from ..keytable import (
+    DIRECT_KEYS,
+    EXTENDED_KEY,
+    KEY_RELEASE,
+    VIRTUAL_KEYS,
+    KeyTable,
+    key_events,
+    key_table,
+)
+from ..macros import compile_macro
+
+
+class TestKeyTable(TestCase):
+    def setUp(self) -> None:
+        self.table = key_table()
+
+    def test_entries(self):
+        self.assertIs(key_table(), self.table)
+        self.assertEqual(
+            len(self.table), len(HEX_DIRECT_KEYS.keys() | HEX_VIRTUAL_KEYS)
+        )
+        entry = self.table["a"]
+        self.assertEqual((entry.name, entry.direct, entry.virtual), ("A", 0x1E, 0x41))
+        self.assertIs(self.table[entry.id], entry)
+        self.assertEqual(self.table.id("A"), entry.id)
+        self.assertIn("lshift", self.table)
+        self.assertIsNone(self.table.get("nope"))
+        with self.assertRaises(KeyError):
+            self.table.id("nope")
+
+    def test_frozen(self):
+        with self.assertRaises(TypeError):
+            self.table.ids["NEW"] = 0
+        with self.assertRaises(AttributeError):
+            self.table["a"].direct = 0
+
+    def test_events(self):
+        entry = self.table["a"]
+        (press,) = entry.events()
+        (release,) = entry.events(release=True)
+        self.assertEqual(
+            (press.kind, press.code, press.flags), (KEY, 0x1E, DIRECT_KEYS)
+        )
+        self.assertEqual(release.flags, DIRECT_KEYS | KEY_RELEASE)
+        (virtual,) = entry.events(VIRTUAL_KEYS)
+        self.assertEqual((virtual.code, virtual.flags), (0x41, VIRTUAL_KEYS))
+        # precomputed once, shared by every lookup
+        self.assertIs(entry.events(), key_events(0x1E, DIRECT_KEYS, False))
+
+    def test_extended(self):
+        (up,) = self.table["up"].events()
+        self.assertEqual((up.code, up.flags), (0x48, DIRECT_KEYS | EXTENDED_KEY))
+        (virtual,) = self.table["up"].events(VIRTUAL_KEYS)
+        self.assertEqual((virtual.code, virtual.flags), (0x26, VIRTUAL_KEYS))
+        macro = compile_macro("RCONTROL")
+        self.assertEqual(macro.program["code"].tolist(), [0x1D, 0x1D])
+        self.assertTrue(all(macro.program["flags"] & EXTENDED_KEY))
+
+    def test_custom_table(self):
+        table = KeyTable({"X": 0x2D}, {"X": 0x58, "F13": 0x7C})
+        self.assertEqual([entry.name for entry in table.entries], ["X", "F13"])
+        self.assertEqual(table["f13"].events(), ())
+        self.assertIsNone(table.code("F13", DIRECT_KEYS))
+
+
+class TestKeysIds(TestCase):
+    def test_direct_key_id(self):
+        backend = RecordingBackend()
+        keys = Keys(backend=backend)
+        key_id = keys.keyId("a")
+        keys.directKeyId(key_id)
+        keys.directKeyId(key_id, keys.key_release)
+        keys.directKey("a")
+        codes = [(event.code, event.flags) for event in backend.events]
+        self.assertEqual(codes, [(0x1E, 0x0008), (0x1E, 0x000A), (0x1E, 0x0008)])
+        self.assertEqual(keys.keyEvents("0x1E"), key_events(0x1E))
+        self.assertEqual(keys.keyEvents("nope"), ())
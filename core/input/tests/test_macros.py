@@ -0,0 +1,61 @@
+from unittest import TestCase
+
+from ..actions import Actions
+from ..backends import KEY, RecordingBackend
+from ..constants import HEX_KEY_TYPES
+from ..macros import compile_macro
+
+DK_PRESS = HEX_KEY_TYPES["key_press"] | HEX_KEY_TYPES["direct_keys"]
+DK_RELEASE = HEX_KEY_TYPES["key_release"] | HEX_KEY_TYPES["direct_keys"]
+VK_PRESS = HEX_KEY_TYPES["key_press"] | HEX_KEY_TYPES["virtual_keys"]
+
+
+class TestCompileMacro(TestCase):
+    def test_program(self):
+        macro = compile_macro("dk,a,-100,VK,LSHIFT_DOWN,-50")
+        self.assertEqual(len(macro), 3)
+        self.assertEqual(macro.program["code"].tolist(), [0x1E, 0x1E, 0xA0])
+        self.assertEqual(
+            macro.program["flags"].tolist(), [DK_PRESS, DK_RELEASE, VK_PRESS]
+        )
+        self.assertEqual([event.time for event in macro.events], [0, 0, 0.1])
+        self.assertAlmostEqual(macro.duration, 0.15)
+        self.assertFalse(macro.program.flags.writeable)
+        with self.assertRaises(AttributeError):
+            macro.duration = 0
+
+    def test_directions_and_hex(self):
+        macro = compile_macro("A_DOWN,0x1F,A_UP")
+        self.assertEqual(macro.program["code"].tolist(), [0x1E, 0x1F, 0x1F, 0x1E])
+        self.assertEqual(macro.program["flags"].tolist()[-1], DK_RELEASE)
+
+    def test_errors(self):
+        macro = compile_macro("A,NOPE,-20000")
+        self.assertEqual(macro.errors, ("NOPE", "-20000"))
+        self.assertEqual(len(macro), 0)
+        with self.assertRaisesRegex(ValueError, "NOPE, -20000"):
+            macro.timeline()
+
+    def test_cache(self):
+        macro = compile_macro("B,-10,C")
+        hits = compile_macro.cache_info().hits
+        self.assertIs(compile_macro("B,-10,C"), macro)
+        self.assertEqual(compile_macro.cache_info().hits, hits + 1)
+        self.assertEqual({macro: 1}[compile_macro("B,-10,C")], 1)
+
+    def test_timeline(self):
+        macro = compile_macro("A,-20")
+        timeline = macro.timeline().key(0x30, DK_PRESS)
+        self.assertEqual(len(macro), 2)
+        self.assertAlmostEqual(timeline.events[-1].time, 0.02)
+
+
+class TestPlayMacro(TestCase):
+    def test_macro(self):
+        backend = RecordingBackend()
+        handle = Actions(backend).macro("LCONTROL_DOWN,A,-30,LCONTROL_UP")
+        self.assertTrue(handle.wait(1))
+        codes = [event.code for event in backend.of_kind(KEY)]
+        self.assertEqual(codes, [0x1D, 0x1E, 0x1E, 0x1D])
+        self.assertEqual(backend.calls, 2)
+        self.assertGreaterEqual(backend.events[-1].time - backend.events[0].time, 0.03)
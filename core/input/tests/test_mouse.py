@@ -0,0 +1,51 @@
+import random
+from unittest import TestCase
+
+import numpy as np
+
+from ..mouse import wind_mouse_path, wind_mouse_paths
+
+
+class TestWindMousePath(TestCase):
+    def test_path(self):
+        path = wind_mouse_path((500, 500), (100, 300), seed=1)
+        self.assertEqual(path.dtype, np.int32)
+        self.assertEqual(path.shape[1], 2)
+        self.assertEqual(tuple(path[-1]), (100, 300))
+        steps = np.abs(np.diff(path, axis=0))
+        self.assertTrue((steps.sum(axis=1) > 0).all())
+        self.assertLessEqual(steps.max(), 13)
+
+    def test_seed(self):
+        path = wind_mouse_path((0, 0), (800, 600), seed=7)
+        np.testing.assert_array_equal(path, wind_mouse_path((0, 0), (800, 600), seed=7))
+        rng = random.Random(7)
+        np.testing.assert_array_equal(
+            path, wind_mouse_path((0, 0), (800, 600), seed=rng)
+        )
+        other = wind_mouse_path((0, 0), (800, 600), seed=8)
+        self.assertFalse(np.array_equal(path, other))
+
+    def test_no_move(self):
+        self.assertEqual(wind_mouse_path((5, 5), (5, 5)).shape, (0, 2))
+
+
+class TestWindMousePaths(TestCase):
+    def test_paths(self):
+        starts = [(500, 500), (0, 0), (5, 5)]
+        dests = [(100, 300), (1900, 1000), (5, 5)]
+        paths = wind_mouse_paths(starts, dests, seed=1)
+        self.assertEqual(len(paths), 3)
+        for path, dest in zip(paths[:2], dests):
+            self.assertEqual(path.dtype, np.int32)
+            self.assertEqual(tuple(path[-1]), dest)
+            self.assertLessEqual(np.abs(np.diff(path, axis=0)).max(), 13)
+        self.assertEqual(paths[2].shape, (0, 2))
+
+    def test_seed(self):
+        first = wind_mouse_paths([(0, 0)] * 2, [(300, 200)] * 2, seed=3)
+        second = wind_mouse_paths([(0, 0)] * 2, [(300, 200)] * 2, seed=3)
+        for a, b in zip(first, second):
+            np.testing.assert_array_equal(a, b)
+        # each path gets its own random numbers
+        self.assertFalse(np.array_equal(*first))
@@ -0,0 +1,131 @@
+from time import perf_counter, sleep
+from unittest import TestCase
+
+from ..backends import CURSOR, KEY, MOUSE, RecordingBackend
+from ..constants import HEX_KEY_TYPES, HEX_MOUSE_KEYS
+from ..scheduler import InputScheduler, Timeline, calibrate_min_sleep, wait_until
+
+PRESS = HEX_KEY_TYPES["key_press"] | HEX_KEY_TYPES["direct_keys"]
+RELEASE = HEX_KEY_TYPES["key_release"] | HEX_KEY_TYPES["direct_keys"]
+
+
+class TestTimeline(TestCase):
+    def test_offsets(self):
+        timeline = Timeline().key(0x1E, PRESS).key(0x1E, RELEASE, after=0.1)
+        timeline.wait(0.05).cursor(10, 20, after=0.01)
+        for event, offset in zip(timeline.events, [0, 0.1, 0.16]):
+            self.assertAlmostEqual(event.time, offset)
+        self.assertAlmostEqual(timeline.end, 0.16)
+        self.assertEqual(timeline.last_cursor, (10, 20))
+
+    def test_path_and_then(self):
+        timeline = Timeline().path([(1, 1), (2, 2), (3, 3)], interval=0.01)
+        self.assertEqual([event.kind for event in timeline.events], [CURSOR] * 3)
+        self.assertAlmostEqual(timeline.end, 0.02)
+        click = Timeline().mouse(0, 0, HEX_MOUSE_KEYS["mouse_lb_press"])
+        timeline.wait(0.1).then(click)
+        self.assertAlmostEqual(timeline.events[-1].time, 0.12)
+        self.assertEqual(timeline.events[-1].kind, MOUSE)
+
+    def test_chord(self):
+        timeline = Timeline().chord([0x1D, 0x1E], PRESS, RELEASE, hold=0.1)
+        self.assertEqual([event.code for event in timeline.events], [29, 30, 30, 29])
+        self.assertEqual([event.time for event in timeline.events], [0, 0, 0.1, 0.1])
+        self.assertEqual([offset for offset, _ in timeline.groups()], [0, 0.1])
+
+    def test_relative_path(self):
+        path = [(1, 0), (3, 1), (4, 4), (6, 5), (7, 7)]
+        timeline = Timeline().relative_path(path, (0, 0), interval=0.01, burst=2)
+        self.assertEqual([event.kind for event in timeline.events], [MOUSE] * 5)
+        deltas = [(event.x, event.y) for event in timeline.events]
+        self.assertEqual(deltas, [(1, 0), (2, 1), (1, 3), (2, 1), (1, 2)])
+        groups = [len(events) for _, events in timeline.groups()]
+        self.assertEqual(groups, [2, 2, 1])
+        self.assertAlmostEqual(timeline.end, 0.02)
+
+
+class TestInputScheduler(TestCase):
+    def setUp(self) -> None:
+        self.backend = RecordingBackend()
+        self.scheduler = InputScheduler(self.backend, min_sleep=0.002)
+
+    def tearDown(self) -> None:
+        self.scheduler.stop()
+
+    def test_submit(self):
+        timeline = Timeline().key(0x1E, PRESS).key(0x1E, RELEASE, after=0.05)
+        start = perf_counter()
+        handle = self.scheduler.submit(timeline)
+        self.assertLess(perf_counter() - start, 0.02)
+        self.assertTrue(handle.wait(1))
+        press, release = self.backend.of_kind(KEY)
+        self.assertAlmostEqual(release.time - press.time, 0.05, delta=0.01)
+        self.assertEqual(len(handle.jitter), 2)
+        self.assertLess(handle.max_jitter, 0.01)
+        self.assertEqual(self.scheduler.played, 2)
+
+    def test_batches(self):
+        timeline = Timeline().chord([0x1D, 0x1E], PRESS, RELEASE, hold=0.02)
+        timeline.relative_path([(1, 1), (2, 2), (3, 3)], (0, 0), burst=3)
+        handle = self.scheduler.play(timeline)
+        self.assertEqual(len(self.backend), 7)
+        self.assertEqual(self.backend.calls, 2)
+        self.assertEqual(self.backend.cursor_position(), (3, 3))
+        self.assertEqual(len(handle.jitter), 7)
+
+    def test_order(self):
+        first = self.scheduler.submit(Timeline().cursor(1, 1).wait(0.05))
+        second = self.scheduler.submit(Timeline().cursor(2, 2))
+        self.assertEqual(self.scheduler.planned_cursor, (2, 2))
+        self.assertTrue(self.scheduler.wait_idle(1))
+        self.assertTrue(first.done() and second.done())
+        self.assertEqual(self.backend.path(), [(1, 1), (2, 2)])
+        self.assertLessEqual(first.finished, second.started)
+        self.assertIsNone(self.scheduler.planned_cursor)
+
+    def test_cancel(self):
+        timeline = Timeline().key(0x1E, PRESS).cursor(5, 5, after=0.5)
+        timeline.key(0x1E, RELEASE, after=0.1)
+        handle = self.scheduler.submit(timeline)
+        sleep(0.05)
+        handle.cancel()
+        self.assertTrue(handle.wait(0.3))
+        self.assertTrue(handle.cancelled)
+        # the held key is still released, the move is skipped
+        self.assertEqual(
+            [event.flags for event in self.backend.events], [PRESS, RELEASE]
+        )
+
+    def test_cancel_before_press(self):
+        lb_press = HEX_MOUSE_KEYS["mouse_lb_press"]
+        lb_release = HEX_MOUSE_KEYS["mouse_lb_release"]
+        rb_press = HEX_MOUSE_KEYS["mouse_rb_press"]
+        rb_release = HEX_MOUSE_KEYS["mouse_rb_release"]
+        timeline = Timeline().mouse(0, 0, rb_press).cursor(5, 5, after=0.5)
+        timeline.mouse(0, 0, lb_press).key(0x1E, PRESS)
+        timeline.mouse(0, 0, lb_release | rb_release, after=0.1)
+        timeline.key(0x1E, RELEASE)
+        handle = self.scheduler.submit(timeline)
+        sleep(0.05)
+        handle.cancel()
+        self.assertTrue(handle.wait(0.3))
+        # only the button pressed before the cancel is released
+        self.assertEqual(
+            [event.flags for event in self.backend.events], [rb_press, rb_release]
+        )
+
+    def test_for_backend(self):
+        backend = RecordingBackend()
+        scheduler = InputScheduler.for_backend(backend)
+        self.assertIs(InputScheduler.for_backend(backend), scheduler)
+        self.assertIsNot(InputScheduler.for_backend(RecordingBackend()), scheduler)
+
+
+class TestTiming(TestCase):
+    def test_calibrate_min_sleep(self):
+        self.assertGreater(calibrate_min_sleep(runs=3), 0)
+
+    def test_wait_until(self):
+        deadline = perf_counter() + 0.02
+        self.assertTrue(wait_until(deadline, 0.002))
+        self.assertLess(perf_counter() - deadline, 0.002)
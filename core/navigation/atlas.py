@@ -0,0 +1,230 @@
+import glob
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import cv2 as cv
+import numpy as np
+
+from config import settings
+from core.common.entities import Img, ImgLoader, Node, Pixel
+from core.common.enums import ColorFormat
+from core.display.maps import FeatureIndex, MapIndex, PersistentMapIndex
+
+
+def color_descriptor(data: np.ndarray, bins: tuple[int, int] = (16, 4)) -> np.ndarray:
+    """L1 normalized hue/saturation histogram, insensitive to rotation and shifts"""
+    if data.ndim == 3 and data.shape[2] == 4:
+        data = cv.cvtColor(data, cv.COLOR_BGRA2BGR)
+    hsv = cv.cvtColor(data, ColorFormat.BGR_HSV)
+    hist = cv.calcHist([hsv], [0, 1], None, list(bins), [0, 180, 0, 256])
+    hist = hist.ravel()
+    return hist / max(float(hist.sum()), 1.0)
+
+
+class ZoneDescriptors(PersistentMapIndex):
+    """Color descriptors of minimap sized tiles covering a zone map"""
+
+    suffix = ".tiles.npz"
+    tile = 91
+    stride = 45
+
+    def __init__(self, descriptors: np.ndarray, positions: np.ndarray) -> None:
+        self.descriptors = descriptors
+        self.positions = positions
+
+    @classmethod
+    def build(cls, map_img: Img, map_path: str = "") -> "ZoneDescriptors":
+        data = map_img.data
+        height, width = data.shape[:2]
+        descriptors, positions = [], []
+        for y in range(0, max(height - cls.tile, 0) + 1, cls.stride):
+            for x in range(0, max(width - cls.tile, 0) + 1, cls.stride):
+                tile = data[y : y + cls.tile, x : x + cls.tile]
+                descriptors.append(color_descriptor(tile))
+                positions.append((x + cls.tile // 2, y + cls.tile // 2))
+        return cls(np.float32(descriptors), np.int32(positions))
+
+    @classmethod
+    def _from_arrays(cls, arrays: dict[str, np.ndarray], map_path: str):
+        return cls(arrays["descriptors"], arrays["positions"])
+
+    def _arrays(self) -> dict[str, np.ndarray]:
+        return {"descriptors": self.descriptors, "positions": self.positions}
+
+
+@dataclass
+class Zone:
+    """A zone map and its gathering nodes
+
+    #### Attributes:
+        :name: str
+        :map_path: str - map image path relative to STATIC_PATH
+        :nodes: list[Node]
+    """
+
+    name: str
+    map_path: str
+    nodes: list[Node] = field(default_factory=list)
+
+
+@dataclass
+class ZoneMaps:
+    """Heavy per zone data, only kept for resident zones"""
+
+    img: ImgLoader
+    map_index: MapIndex
+    feature_index: FeatureIndex
+
+
+@dataclass(frozen=True)
+class AtlasLocation:
+    zone: Zone
+    center: Pixel
+
+
+class WorldAtlas:
+    """Registry of zone maps with zone detection and localisation
+
+    Zones are found in `maps_dir`: map images `<name>.png` with their nodes in
+    `<name>_nodes.txt`, other images (extracted maps, masks) are skipped. Tile
+    color descriptors of every zone are small and always in memory, they rank
+    zones for a minimap crop. Map images and their localisation indexes are
+    loaded lazily and at most `max_resident` zones are kept, least recently
+    used first out.
+
+    #### Example:
+        - atlas = WorldAtlas()
+        - location = atlas.locate(minimap, hint="mase_knoll")
+    """
+
+    maps_dir = "albion/maps/"
+    max_resident = 4
+    top_tiles = 10
+    max_candidates = 3
+    confidence = 0.6
+    nodes_suffix = "_nodes.txt"
+    node_pattern = re.compile(r"x=(\d+), y=(\d+)")
+
+    def __init__(self, maps_dir: str = None, max_resident: int = None) -> None:
+        self.maps_dir = maps_dir or self.maps_dir
+        self.max_resident = max_resident or self.max_resident
+        self.zones: dict[str, Zone] = {}
+        self._descriptors: dict[str, ZoneDescriptors] = {}
+        self._resident: OrderedDict[str, ZoneMaps] = OrderedDict()
+        self._tile_zones: np.ndarray = np.empty(0, dtype=np.int32)
+        self._tile_descriptors: np.ndarray = np.empty((0, 0), dtype=np.float32)
+        self._zone_names: list[str] = []
+
+    def __len__(self):
+        return len(self.zones)
+
+    def __contains__(self, name: str):
+        return name in self.zones
+
+    def discover(self) -> None:
+        """Register every zone map in maps_dir, the images with a nodes file"""
+        pattern = os.path.join(settings.STATIC_PATH + self.maps_dir, "*.png")
+        for path in sorted(glob.glob(pattern)):
+            name = os.path.splitext(os.path.basename(path))[0]
+            nodes_path = os.path.splitext(path)[0] + self.nodes_suffix
+            if name not in self.zones and os.path.exists(nodes_path):
+                self.register(name, self.maps_dir + os.path.basename(path))
+
+    def register(self, name: str, map_path: str, nodes: list[Node] = None) -> Zone:
+        if nodes is None:
+            nodes = self.load_nodes(map_path)
+        zone = Zone(name, map_path, nodes)
+        self.zones[name] = zone
+        self._descriptors[name] = ZoneDescriptors.load(map_path)
+        self._resident.pop(name, None)
+        self._zone_names = []
+        return zone
+
+    def load_nodes(self, map_path: str) -> list[Node]:
+        nodes_path = settings.STATIC_PATH + os.path.splitext(map_path)[0]
+        nodes_path += self.nodes_suffix
+        if not os.path.exists(nodes_path):
+            return []
+        with open(nodes_path, encoding="utf-8") as file:
+            content = file.read()
+        return [Node(int(x), int(y)) for x, y in self.node_pattern.findall(content)]
+
+    def _stack_descriptors(self) -> None:
+        self._zone_names = list(self._descriptors)
+        if not self._zone_names:
+            return
+        descriptors = [self._descriptors[name].descriptors for name in self._zone_names]
+        self._tile_descriptors = np.concatenate(descriptors)
+        self._tile_zones = np.concatenate(
+            [
+                np.full(len(tiles), i, dtype=np.int32)
+                for i, tiles in enumerate(descriptors)
+            ]
+        )
+
+    @property
+    def resident(self) -> list[str]:
+        return list(self._resident)
+
+    def maps(self, name: str) -> ZoneMaps:
+        """Map image and indexes of a zone, loaded on first use"""
+        if name in self._resident:
+            self._resident.move_to_end(name)
+            return self._resident[name]
+
+        map_path = self.zones[name].map_path
+        zone_maps = ZoneMaps(
+            img=ImgLoader(map_path),
+            map_index=MapIndex.load(map_path),
+            feature_index=FeatureIndex.load(map_path),
+        )
+        self._resident[name] = zone_maps
+        while len(self._resident) > self.max_resident:
+            self._resident.popitem(last=False)
+        return zone_maps
+
+    def candidates(self, minimap: Img) -> list[str]:
+        """Zone names ranked by votes of the tiles closest to the minimap colors"""
+        if not self._zone_names:
+            self._stack_descriptors()
+        if not len(self._tile_descriptors):
+            return []
+        query = color_descriptor(minimap.data)
+        distances = np.abs(self._tile_descriptors - query).sum(axis=1)
+        count = min(self.top_tiles, len(distances))
+        closest = np.argpartition(distances, count - 1)[:count]
+        closest = closest[np.argsort(distances[closest])]
+        zones = self._tile_zones[closest]
+        votes = np.bincount(zones, minlength=len(self._zone_names))
+        # most votes first, ties go to the zone with the closest tile
+        ranked = sorted(dict.fromkeys(zones.tolist()), key=lambda i: -votes[i])
+        return [self._zone_names[i] for i in ranked[: self.max_candidates]]
+
+    def localise(self, name: str, minimap: Img) -> Optional[Pixel]:
+        """Character position within a zone, None if the minimap doesn't fit"""
+        zone_maps = self.maps(name)
+        location = zone_maps.map_index.locate(minimap, self.confidence)
+        if location is None:
+            location = zone_maps.feature_index.locate(minimap)
+        return location.center if location else None
+
+    def locate(self, minimap: Img, hint: str = None) -> Optional[AtlasLocation]:
+        """Detect the zone of a minimap crop and the position within it
+
+        The hinted (current) zone is tried first, the global lookup only runs
+        when the character left it.
+        """
+        if hint in self.zones:
+            center = self.localise(hint, minimap)
+            if center:
+                return AtlasLocation(self.zones[hint], center)
+        for name in self.candidates(minimap):
+            if name == hint:
+                continue
+            center = self.localise(name, minimap)
+            if center:
+                return AtlasLocation(self.zones[name], center)
+        return None
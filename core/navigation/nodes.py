@@ -0,0 +1,142 @@
+from time import time
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+from core.common.entities import Node, Pixel
+from core.common.spatial import SpatialIndex
+
+
+class NodeView:
+    """Node-like handle to one row of a NodeStore
+
+    Reads and cooldown updates go straight to the store arrays, so a view
+    stays in sync with vectorized updates done on the store.
+    """
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: "NodeStore", index: int) -> None:
+        self.store = store
+        self.index = index
+
+    @property
+    def x(self) -> int:
+        return int(self.store.xs[self.index])
+
+    @property
+    def y(self) -> int:
+        return int(self.store.ys[self.index])
+
+    @property
+    def cooldown(self) -> float:
+        return float(self.store.cooldowns[self.index])
+
+    @property
+    def visits(self) -> int:
+        return int(self.store.visits[self.index])
+
+    def __iter__(self):
+        return iter((self.x, self.y))
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"NodeView(index={self.index}, x={self.x}, y={self.y})"
+
+    def update_cooldown(self, cooldown_time: float):
+        self.store.cooldowns[self.index] = cooldown_time
+
+    def reset_cooldown(self):
+        """Set cooldown to 0"""
+        self.store.cooldowns[self.index] = 0
+
+    def node(self) -> Node:
+        return Node(self.x, self.y)
+
+
+class NodeStore:
+    """Columnar storage of gathering nodes
+
+    Positions, cooldown expiry times (0 - no cooldown) and visit counts are
+    kept in NumPy arrays, so availability and expiry are single array
+    operations instead of per node loops. Indexing returns a `NodeView`,
+    which behaves like the `Node` it was created from.
+
+    #### Example:
+        - store = NodeStore(nodes)
+        - store.visit(index, duration=20)
+        - store.expire()
+        - node = store.nearest_available(char_pos)
+    """
+
+    def __init__(self, nodes: Sequence[Node] = ()) -> None:
+        count = len(nodes)
+        self.xs = np.array([node.x for node in nodes], dtype=np.int32).reshape(count)
+        self.ys = np.array([node.y for node in nodes], dtype=np.int32).reshape(count)
+        self.cooldowns = np.array(
+            [getattr(node, "cooldown", 0) for node in nodes], dtype=np.float64
+        ).reshape(count)
+        self.visits = np.zeros(count, dtype=np.int32)
+        self._spatial: Optional[SpatialIndex] = None
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __getitem__(self, index: int) -> NodeView:
+        if not -len(self) <= index < len(self):
+            raise IndexError("NodeStore index out of range")
+        return NodeView(self, index % len(self))
+
+    def __iter__(self) -> Iterator[NodeView]:
+        return (NodeView(self, index) for index in range(len(self)))
+
+    def __repr__(self):
+        return (
+            f"<NodeStore(nodes={len(self)}, available={int(self.available().sum())})>"
+        )
+
+    def __array__(self, dtype=None, copy=None):
+        return self.positions if dtype is None else self.positions.astype(dtype)
+
+    @property
+    def positions(self) -> np.ndarray:
+        return np.column_stack((self.xs, self.ys))
+
+    @property
+    def spatial(self) -> SpatialIndex:
+        if self._spatial is None:
+            self._spatial = SpatialIndex(self.positions)
+        return self._spatial
+
+    def available(self, now: float = None) -> np.ndarray:
+        """Mask of nodes without a running cooldown"""
+        now = time() if now is None else now
+        return self.cooldowns <= now
+
+    def available_indexes(self, now: float = None) -> list[int]:
+        return np.flatnonzero(self.available(now)).tolist()
+
+    def on_cooldown(self, now: float = None) -> list[NodeView]:
+        return [self[index] for index in np.flatnonzero(~self.available(now))]
+
+    def visit(self, index: int, duration: float, now: float = None) -> None:
+        """Count a visit and put the node on cooldown for duration seconds"""
+        now = time() if now is None else now
+        self.cooldowns[index] = now + duration
+        self.visits[index] += 1
+
+    def expire(self, now: float = None) -> int:
+        """Reset expired cooldowns, returns how many were reset"""
+        now = time() if now is None else now
+        expired = (self.cooldowns != 0) & (self.cooldowns < now)
+        self.cooldowns[expired] = 0
+        return int(expired.sum())
+
+    def nearest_available(self, origin: Pixel, now: float = None) -> Optional[NodeView]:
+        index = self.spatial.nearest(origin, mask=self.available(now))
+        return None if index is None else self[index]
@@ -0,0 +1,230 @@
+from itertools import permutations
+from typing import Optional, Sequence
+
+import numpy as np
+
+from core.common.entities import Img, Node, Pixel
+from core.common.enums import ColorFormat
+from core.common.spatial import as_points
+
+
+def walkable_mask(map_img: Img, blocked_below: int = 20) -> np.ndarray:
+    """Walkable map pixels: everything except the dark area around the zone"""
+    gray = map_img.derived(ColorFormat.BGR_GRAY)
+    return gray >= blocked_below
+
+
+class RoutePlanner:
+    """Plans the order in which gathering nodes of a cluster are visited
+
+    Nodes are connected when the straight line between them stays on walkable
+    pixels; travel costs are shortest paths over that graph, nodes without a
+    walkable path between them are joined by a penalised straight line so
+    disconnected groups still end up in one tour. Tours start at
+    the character position and are solved exactly for small clusters and with
+    nearest neighbour + 2-opt otherwise. When nodes go on cooldown they drop
+    out of the current tour, nodes coming back are inserted where they are
+    cheapest, so a full replan only happens when the tour runs out.
+
+    #### Example:
+        - planner = RoutePlanner(nodes, walkable_mask(cluster))
+        - index = planner.next_node(char_pos, available)
+    """
+
+    max_edge = 150
+    step = 2
+    exact_limit = 8
+    unreachable_penalty = 3
+
+    def __init__(self, nodes: Sequence[Node], walkable: np.ndarray = None) -> None:
+        self.positions = as_points(nodes)
+        self.walkable = walkable
+        self.distances = self._shortest_paths()
+        self.travel = self._travel_costs()
+        self.route: list[int] = []
+
+    def __len__(self):
+        return len(self.positions)
+
+    def is_walkable(self, start: np.ndarray, end: np.ndarray) -> bool:
+        """Straight line between two points stays on walkable pixels"""
+        if self.walkable is None:
+            return True
+        samples = max(int(np.hypot(*(end - start)) // self.step), 1) + 1
+        points = np.rint(np.linspace(start, end, samples)).astype(int)
+        height, width = self.walkable.shape
+        xs = np.clip(points[:, 0], 0, width - 1)
+        ys = np.clip(points[:, 1], 0, height - 1)
+        return bool(self.walkable[ys, xs].all())
+
+    def _shortest_paths(self) -> np.ndarray:
+        """All pairs travel distances over walkable edges (Floyd-Warshall)"""
+        count = len(self.positions)
+        deltas = self.positions[:, None, :] - self.positions[None, :, :]
+        euclidean = np.hypot(deltas[..., 0], deltas[..., 1])
+        distances = np.full((count, count), np.inf)
+        np.fill_diagonal(distances, 0)
+        for i in range(count):
+            for j in range(i + 1, count):
+                if euclidean[i, j] > self.max_edge:
+                    continue
+                if self.is_walkable(self.positions[i], self.positions[j]):
+                    distances[i, j] = distances[j, i] = euclidean[i, j]
+        for k in range(count):
+            distances = np.minimum(distances, distances[:, k, None] + distances[k])
+        return distances
+
+    def _travel_costs(self) -> np.ndarray:
+        """Shortest paths, penalised straight lines between unconnected nodes"""
+        deltas = self.positions[:, None, :] - self.positions[None, :, :]
+        straight = np.hypot(deltas[..., 0], deltas[..., 1])
+        return np.where(
+            np.isinf(self.distances),
+            straight * self.unreachable_penalty,
+            self.distances,
+        )
+
+    def start_distances(self, position: Pixel) -> np.ndarray:
+        """Travel distance from a free position to every node
+
+        Through the best node in line of sight, falling back to a penalised
+        straight line for nodes that can't be reached that way.
+        """
+        origin = np.array([position.x, position.y], dtype=float)
+        direct = np.hypot(*(self.positions - origin).T)
+        visible = np.array(
+            [
+                distance <= self.max_edge and self.is_walkable(origin, node)
+                for node, distance in zip(self.positions, direct)
+            ],
+            dtype=bool,
+        )
+        if not visible.any():
+            return direct * self.unreachable_penalty
+        via = (direct[visible, None] + self.distances[visible]).min(axis=0)
+        return np.where(np.isinf(via), direct * self.unreachable_penalty, via)
+
+    def plan(self, position: Pixel, available: Sequence[int]) -> list[int]:
+        """Visiting order of available node indexes starting at position"""
+        available = list(available)
+        if len(available) <= 1:
+            return available
+        start = self.start_distances(position)[available]
+        distances = self.travel[np.ix_(available, available)]
+        if len(available) <= self.exact_limit:
+            order = self._exact(start, distances)
+        else:
+            order = self._heuristic(start, distances)
+        return [available[i] for i in order]
+
+    @staticmethod
+    def cost(start: np.ndarray, distances: np.ndarray, order: Sequence[int]) -> float:
+        order = list(order)
+        if not order:
+            return 0
+        legs = distances[order[:-1], order[1:]].sum()
+        return float(start[order[0]] + legs)
+
+    def _exact(self, start: np.ndarray, distances: np.ndarray) -> list[int]:
+        count = len(start)
+        if not np.isfinite(start).any() or not np.isfinite(distances).all():
+            return self._heuristic(start, distances)
+        if count <= 6:
+            orders = permutations(range(count))
+            return list(min(orders, key=lambda o: self.cost(start, distances, o)))
+        # Held-Karp over subsets for an open path with a fixed start
+        full = 1 << count
+        best = np.full((full, count), np.inf)
+        parent = np.full((full, count), -1, dtype=int)
+        for i in range(count):
+            best[1 << i, i] = start[i]
+        for subset in range(1, full):
+            for last in range(count):
+                if not subset & (1 << last) or best[subset, last] == np.inf:
+                    continue
+                for nxt in range(count):
+                    if subset & (1 << nxt):
+                        continue
+                    extended = subset | (1 << nxt)
+                    cost = best[subset, last] + distances[last, nxt]
+                    if cost < best[extended, nxt]:
+                        best[extended, nxt] = cost
+                        parent[extended, nxt] = last
+        if np.isinf(best[full - 1]).all():
+            return self._heuristic(start, distances)
+        last = int(np.argmin(best[full - 1]))
+        order, subset = [], full - 1
+        while last != -1:
+            order.append(last)
+            subset, last = subset ^ (1 << last), parent[subset, last]
+        return order[::-1]
+
+    def _heuristic(self, start: np.ndarray, distances: np.ndarray) -> list[int]:
+        return self._two_opt(start, distances, self._nearest(start, distances))
+
+    @staticmethod
+    def _nearest(start: np.ndarray, distances: np.ndarray) -> list[int]:
+        remaining = set(range(len(start)))
+        current = int(np.argmin(start))
+        order = [current]
+        remaining.remove(current)
+        while remaining:
+            current = min(remaining, key=lambda i: distances[current, i])
+            order.append(current)
+            remaining.remove(current)
+        return order
+
+    @staticmethod
+    def _two_opt(
+        start: np.ndarray, distances: np.ndarray, order: list[int]
+    ) -> list[int]:
+        """Reverse route segments while that shortens the path
+
+        Costs are symmetric, so a reversal only changes the edges at both
+        ends of the segment, the open end of the path has no edge.
+        """
+        start, d = start.tolist(), distances.tolist()
+        order = list(order)
+        last = len(order) - 1
+        improved = True
+        while improved:
+            improved = False
+            for i in range(last):
+                for j in range(i + 1, last + 1):
+                    a, b = order[i], order[j]
+                    if i == 0:
+                        delta = start[b] - start[a]
+                    else:
+                        before = order[i - 1]
+                        delta = d[before][b] - d[before][a]
+                    if j < last:
+                        after = order[j + 1]
+                        delta += d[a][after] - d[b][after]
+                    if delta < -1e-9:
+                        order[i : j + 1] = order[i : j + 1][::-1]
+                        improved = True
+        return order
+
+    def _insert(self, position: Pixel, index: int) -> None:
+        """Cheapest insertion of a node into the current route"""
+        start = self.start_distances(position)
+        route = self.route
+        travel = self.travel
+        costs = [start[index] + travel[index, route[0]] - start[route[0]]]
+        for a, b in zip(route, route[1:]):
+            costs.append(travel[a, index] + travel[index, b] - travel[a, b])
+        costs.append(travel[route[-1], index])
+        self.route.insert(int(np.argmin(costs)), index)
+
+    def next_node(self, position: Pixel, available: Sequence[int]) -> Optional[int]:
+        """Index of the next node to visit, updating the route incrementally"""
+        available_set = set(available)
+        self.route = [index for index in self.route if index in available_set]
+        if not self.route:
+            self.route = self.plan(position, available)
+        else:
+            planned = set(self.route)
+            for index in available:
+                if index not in planned:
+                    self._insert(position, index)
+        return self.route[0] if self.route else None
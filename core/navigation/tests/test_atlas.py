@@ -0,0 +1,92 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import cv2 as cv
+import numpy as np
+
+from bots.albion.actions.utils import minimap_crop
+from config import settings
+from core.common.entities import Img, ImgLoader, Node, Pixel
+
+from ..atlas import (
+    AtlasLocation,
+    WorldAtlas,
+    ZoneDescriptors,
+    ZoneMaps,
+    color_descriptor,
+)
+
+
+class ColorDescriptorTests(TestCase):
+    def test_normalized(self):
+        data = np.random.default_rng(0).integers(0, 255, (20, 20, 4), dtype=np.uint8)
+        descriptor = color_descriptor(data)
+        self.assertEqual(descriptor.shape, (64,))
+        self.assertAlmostEqual(float(descriptor.sum()), 1.0, places=5)
+
+
+class WorldAtlasTests(TestCase):
+    def setUp(self) -> None:
+        self.map_path = "albion/maps/mase_knoll.png"
+        self.atlas = WorldAtlas(max_resident=1)
+        search_img = ImgLoader("albion/tests/7.png")
+        self.minimap = Img(search_img.derived(crop=minimap_crop(), scale=0.70))
+
+    def test_discover(self):
+        self.atlas.discover()
+        self.assertIn("mase_knoll", self.atlas)
+        nodes = self.atlas.zones["mase_knoll"].nodes
+        self.assertTrue(len(nodes))
+        self.assertIsInstance(nodes[0], Node)
+
+    def test_discover_zone_maps_only(self):
+        data = np.random.default_rng(0).integers(0, 255, (100, 100, 3), np.uint8)
+        with TemporaryDirectory() as maps_dir:
+            for name in ["zone", "map", "zone_mask"]:
+                cv.imwrite(os.path.join(maps_dir, f"{name}.png"), data)
+            with open(os.path.join(maps_dir, "zone_nodes.txt"), "w") as file:
+                file.write("Node(x=10, y=20)")
+            atlas = WorldAtlas(os.path.relpath(maps_dir, settings.STATIC_PATH) + "/")
+            atlas.discover()
+        self.assertEqual(list(atlas.zones), ["zone"])
+        self.assertEqual(atlas.zones["zone"].nodes, [Node(10, 20)])
+
+    def test_register_nodes(self):
+        nodes = [Node(1, 2)]
+        zone = self.atlas.register("zone", self.map_path, nodes)
+        self.assertEqual(zone.nodes, nodes)
+
+    def test_maps_lru(self):
+        self.atlas.register("first", self.map_path)
+        self.atlas.register("second", self.map_path)
+        self.assertIsInstance(self.atlas.maps("first"), ZoneMaps)
+        self.atlas.maps("second")
+        self.assertEqual(self.atlas.resident, ["second"])
+
+    def test_candidates(self):
+        self.atlas.register("mase_knoll", self.map_path)
+        self.assertEqual(self.atlas.candidates(self.minimap), ["mase_knoll"])
+
+    def test_candidates_by_votes(self):
+        query = color_descriptor(self.minimap.data)
+        near = np.float32([query + 0.01] * 3 + [query + 1] * 3)
+        positions = np.zeros((6, 2), np.int32)
+        self.atlas._descriptors = {
+            "closest": ZoneDescriptors(np.float32([query, query + 1]), positions[:2]),
+            "most": ZoneDescriptors(near, positions),
+        }
+        self.atlas.top_tiles = 4
+        self.assertEqual(self.atlas.candidates(self.minimap), ["most", "closest"])
+
+    def test_locate(self):
+        self.atlas.register("mase_knoll", self.map_path)
+        location = self.atlas.locate(self.minimap)
+        self.assertIsInstance(location, AtlasLocation)
+        self.assertEqual(location.zone.name, "mase_knoll")
+        self.assertEqual(location.center, Pixel(620, 694))
+
+    def test_locate_not_found(self):
+        self.atlas.register("mase_knoll", self.map_path)
+        flat = Img(np.full((91, 91, 3), 128, dtype=np.uint8))
+        self.assertIsNone(self.atlas.locate(flat, hint="mase_knoll"))
@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+import numpy as np
+
+from core.common.entities import Node, Pixel
+
+from ..nodes import NodeStore, NodeView
+
+
+class NodeStoreTests(TestCase):
+    def setUp(self) -> None:
+        self.nodes = [Node(10, 10), Node(20, 10), Node(30, 10)]
+        self.store = NodeStore(self.nodes)
+
+    def test_views(self):
+        view = self.store[1]
+        self.assertIsInstance(view, NodeView)
+        self.assertEqual(view, self.nodes[1])
+        self.assertEqual(self.nodes[1], view)
+        self.assertEqual((view.x, view.y), (20, 10))
+        self.assertEqual(list(self.store), self.nodes)
+        self.assertEqual(self.store[-1], self.nodes[-1])
+        with self.assertRaises(IndexError):
+            self.store[3]
+
+    def test_positions(self):
+        self.assertEqual(self.store.positions.tolist(), [[10, 10], [20, 10], [30, 10]])
+        self.assertEqual(np.asarray(self.store).shape, (3, 2))
+
+    def test_visit(self):
+        self.store.visit(0, duration=20, now=100)
+        self.assertEqual(self.store[0].cooldown, 120)
+        self.assertEqual(self.store[0].visits, 1)
+        self.assertEqual(self.store.available(now=110).tolist(), [False, True, True])
+        self.assertEqual(self.store.available_indexes(now=130), [0, 1, 2])
+        self.assertEqual(self.store.on_cooldown(now=110), [self.nodes[0]])
+
+    def test_view_updates_store(self):
+        view = self.store[2]
+        view.update_cooldown(50)
+        self.assertEqual(self.store.cooldowns[2], 50)
+        view.reset_cooldown()
+        self.assertEqual(self.store.cooldowns[2], 0)
+
+    def test_expire(self):
+        self.store.visit(0, duration=10, now=100)
+        self.store.visit(1, duration=30, now=100)
+        self.assertEqual(self.store.expire(now=120), 1)
+        self.assertEqual(self.store.cooldowns.tolist(), [0, 130, 0])
+
+    def test_nearest_available(self):
+        self.assertEqual(self.store.nearest_available(Pixel(12, 10)), self.nodes[0])
+        self.store.visit(0, duration=20, now=100)
+        nearest = self.store.nearest_available(Pixel(12, 10), now=110)
+        self.assertEqual(nearest.index, 1)
+        self.store.visit(1, duration=20, now=100)
+        self.store.visit(2, duration=20, now=100)
+        self.assertIsNone(self.store.nearest_available(Pixel(12, 10), now=110))
+
+    def test_empty(self):
+        store = NodeStore([])
+        self.assertEqual(len(store), 0)
+        self.assertIsNone(store.nearest_available(Pixel(0, 0)))
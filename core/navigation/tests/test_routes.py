@@ -0,0 +1,92 @@
+from itertools import permutations
+from unittest import TestCase
+
+import numpy as np
+
+from core.common.entities import Img, Node, Pixel
+
+from ..routes import RoutePlanner, walkable_mask
+
+
+class WalkableMaskTests(TestCase):
+    def test_dark_pixels_blocked(self):
+        data = np.full((10, 10, 3), 200, dtype=np.uint8)
+        data[:, 5] = 0
+        mask = walkable_mask(Img(data))
+        self.assertTrue(mask[0, 0])
+        self.assertFalse(mask[0, 5])
+
+
+class RoutePlannerTests(TestCase):
+    def setUp(self) -> None:
+        self.nodes = [Node(10, 10), Node(50, 10), Node(90, 10), Node(90, 50)]
+        self.planner = RoutePlanner(self.nodes)
+
+    def test_distances(self):
+        self.assertEqual(self.planner.distances[0, 1], 40)
+        self.assertAlmostEqual(self.planner.distances[0, 3], np.hypot(80, 40))
+        self.assertEqual(self.planner.distances[0, 0], 0)
+
+    def test_wall_blocks_edges(self):
+        walkable = np.ones((100, 100), dtype=bool)
+        walkable[0:30, 70] = False  # wall between node 1 and node 2
+        planner = RoutePlanner(self.nodes, walkable)
+        self.assertGreater(planner.distances[1, 2], 40)
+
+    def test_unreachable(self):
+        walkable = np.ones((100, 100), dtype=bool)
+        walkable[:, 70] = False
+        planner = RoutePlanner(self.nodes, walkable)
+        self.assertEqual(planner.distances[0, 2], np.inf)
+
+    def test_plan_line(self):
+        route = self.planner.plan(Pixel(0, 10), range(4))
+        self.assertEqual(route, [0, 1, 2, 3])
+
+    def test_plan_exact_is_optimal(self):
+        rng = np.random.default_rng(0)
+        nodes = [Node(int(x), int(y)) for x, y in rng.integers(0, 100, (7, 2))]
+        planner = RoutePlanner(nodes)
+        start = planner.start_distances(Pixel(0, 0))
+        route = planner.plan(Pixel(0, 0), range(7))
+        best = min(
+            planner.cost(start, planner.distances, order)
+            for order in permutations(range(7))
+        )
+        self.assertAlmostEqual(planner.cost(start, planner.distances, route), best)
+
+    def test_plan_heuristic_visits_all(self):
+        rng = np.random.default_rng(1)
+        nodes = [Node(int(x), int(y)) for x, y in rng.integers(0, 500, (30, 2))]
+        planner = RoutePlanner(nodes)
+        route = planner.plan(Pixel(0, 0), range(30))
+        self.assertEqual(sorted(route), list(range(30)))
+
+    def test_next_node_skips_cooldown(self):
+        self.assertEqual(self.planner.next_node(Pixel(0, 10), [0, 1, 2, 3]), 0)
+        self.assertEqual(self.planner.next_node(Pixel(10, 10), [1, 2, 3]), 1)
+        self.assertEqual(self.planner.route, [1, 2, 3])
+
+    def test_next_node_inserts_available(self):
+        self.planner.next_node(Pixel(0, 10), [0, 2, 3])
+        self.planner.next_node(Pixel(0, 10), [0, 1, 2, 3])
+        self.assertEqual(self.planner.route, [0, 1, 2, 3])
+
+    def test_next_node_none_available(self):
+        self.assertIsNone(self.planner.next_node(Pixel(0, 0), []))
+
+    def test_plan_disconnected_clusters(self):
+        # two groups further apart than max_edge, no walkable path between them
+        nodes = [Node(10 + 10 * i, 10) for i in range(4)]
+        nodes += [Node(300 + 10 * i, 10) for i in range(4)]
+        planner = RoutePlanner(nodes)
+        self.assertEqual(planner.distances[0, 4], np.inf)
+        for count in (4, 8):
+            available = [*range(count // 2), *range(4, 4 + count // 2)]
+            route = planner.plan(Pixel(0, 10), available)
+            self.assertEqual(sorted(route), available)
+            self.assertEqual(route[: count // 2], available[: count // 2])
+        route = planner.plan(Pixel(0, 10), range(8))
+        self.assertEqual(route, list(range(8)))
+        self.assertEqual(planner.next_node(Pixel(0, 10), range(8)), 0)
+        self.assertEqual(planner.route, list(range(8)))